@@ -0,0 +1,45 @@
+"""Bytes per live ExecutionContext at 10k and 100k sessions.
+
+Run from the repo root:  python -m benchmarks.context_memory
+"""
+import gc
+import tracemalloc
+from orchestrator.execution import ExecutionContext, ExecutionState
+
+# A typical finished voice session: short transcript, a couple of commands,
+# one Q&A round and a few KB of agent output
+TRANSCRIPT = ["check the disk and restart the web container if it's full"]
+COMMANDS = ["df -h", "docker restart web"]
+OUTPUT = "Filesystem      Size  Used Avail Use% Mounted on\n" + "/dev/sda1        50G   31G   19G  62% /\n" * 200
+
+
+def make_session(i: int) -> ExecutionContext:
+    ctx = ExecutionContext(
+        state=ExecutionState.COMPLETED,
+        transcript=list(TRANSCRIPT),
+        commands=list(COMMANDS),
+    )
+    ctx.add_answer("Which container?", "web")
+    ctx.add_result(OUTPUT + str(i))
+    return ctx
+
+
+def bytes_per_session(n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [make_session(i) for i in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+    return (after - before) / n
+
+
+def main() -> None:
+    print(f"raw output per session: {len(OUTPUT)} bytes")
+    for n in (10_000, 100_000):
+        print(f"{n:>7} sessions: {bytes_per_session(n):8.0f} bytes/session")
+
+
+if __name__ == "__main__":
+    main()
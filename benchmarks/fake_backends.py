@@ -0,0 +1,124 @@
+"""Local stand-ins for the Anthropic API, the Moltbot gateway and Moshi.
+
+Serves all three from one port so the orchestrator can be pointed at it with
+ANTHROPIC_BASE_URL, MOLTBOT_GATEWAY_URL and MOSHI_URL. Latency is set with
+FAKE_LLM_LATENCY_MS and FAKE_MOLTBOT_LATENCY_MS.
+
+    python -m uvicorn benchmarks.fake_backends:app --port 9100
+"""
+import asyncio
+import json
+import os
+import re
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY_MS", "400")) / 1000
+MOLTBOT_LATENCY = float(os.getenv("FAKE_MOLTBOT_LATENCY_MS", "150")) / 1000
+
+# First matching keyword decides the command the fake model "extracts"
+KEYWORDS = [
+    ("storage", "df -h"),
+    ("disk", "df -h"),
+    ("memory", "free -h"),
+    ("container", "docker ps"),
+    ("process", "ps aux"),
+]
+
+app = FastAPI()
+
+
+def commands_for(transcript: str) -> list[str]:
+    text = transcript.lower()
+    found = [command for keyword, command in KEYWORDS if keyword in text]
+    return list(dict.fromkeys(found)) or ["ls -la"]
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_message(message: dict):
+    """Replay `message` as Messages API stream events.
+
+    Half the latency goes before the first token, the rest is spread across
+    the text, so streamed callers see early commands sooner.
+    """
+    await asyncio.sleep(LLM_LATENCY / 2)
+    text = message["content"][0]["text"]
+    chunks = [text[i:i + 8] for i in range(0, len(text), 8)]
+    yield _sse("message_start", {"type": "message_start", "message": {**message, "content": []}})
+    yield _sse("content_block_start", {
+        "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+    })
+    for chunk in chunks:
+        yield _sse("content_block_delta", {
+            "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk},
+        })
+        await asyncio.sleep(LLM_LATENCY / 2 / len(chunks))
+    yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield _sse("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+        "usage": {"output_tokens": message["usage"]["output_tokens"]},
+    })
+    yield _sse("message_stop", {"type": "message_stop"})
+
+
+@app.post("/v1/messages")
+async def messages(request: Request):
+    body = await request.json()
+    system = " ".join(block["text"] for block in body.get("system", []))
+    prompt = body["messages"][-1]["content"]
+    match = re.search(r"<transcript>(.*?)</transcript>", prompt, re.S)
+    commands = commands_for(match.group(1) if match else prompt)
+    if '"commands"' in system:
+        text = json.dumps({"commands": commands})
+    else:
+        text = json.dumps({"command": commands[0]})
+    message = {
+        "id": f"msg_{uuid.uuid4().hex}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "fake"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": 40,
+            "output_tokens": 12,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 300,
+        },
+    }
+    if body.get("stream"):
+        return StreamingResponse(_stream_message(message), media_type="text/event-stream")
+    await asyncio.sleep(LLM_LATENCY)
+    return message
+
+
+@app.post("/v1/chat/completions")
+async def agent(request: Request):
+    body = await request.json()
+    await asyncio.sleep(MOLTBOT_LATENCY)
+    message = body["messages"][-1]["content"]
+    return {"choices": [{"message": {"role": "assistant", "content": f"ran: {message}"}}]}
+
+
+@app.post("/tools/invoke")
+async def invoke_tool(request: Request):
+    body = await request.json()
+    if body["tool"] == "sessions_history":
+        return {"ok": True, "result": {"messages": [{"role": "assistant", "content": "Disk is 62% full"}]}}
+    return {"ok": True, "result": {}}
+
+
+@app.get("/health")
+async def health():
+    return {"ok": True}
+
+
+@app.api_route("/", methods=["GET", "HEAD"])
+async def moshi_index():
+    return {}
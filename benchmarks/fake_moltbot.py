@@ -0,0 +1,28 @@
+"""Stub `moltbot` CLI: answers `--version`, `cron add` and `agent --message ...`.
+
+latency.py puts a `moltbot` wrapper for this script first on PATH.
+FAKE_MOLTBOT_LATENCY_MS sets how long an agent run takes.
+"""
+import os
+import sys
+import time
+
+
+def main(argv: list[str]) -> int:
+    if argv[:1] == ["--version"]:
+        print("moltbot 0.0.0-fake")
+        return 0
+    if argv[:2] == ["cron", "add"]:
+        return 0
+    if argv[:1] != ["agent"] or "--message" not in argv:
+        print(f"fake moltbot: unsupported arguments {argv}", file=sys.stderr)
+        return 2
+    message = argv[argv.index("--message") + 1]
+    time.sleep(float(os.getenv("FAKE_MOLTBOT_LATENCY_MS", "150")) / 1000)
+    first_line = message.strip().splitlines()[0] if message.strip() else ""
+    print(f"Done: {first_line[:200]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,279 @@
+"""End-to-end latency and throughput of the orchestrator API.
+
+Starts the fake backends (fake_backends.py) and the real orchestrator as
+uvicorn subprocesses, with a stub `moltbot` (fake_moltbot.py) first on PATH,
+then drives each scenario at several concurrency levels over real HTTP.
+
+Run from the repo root:
+    python -m benchmarks.latency --concurrency 1 8 32 --requests 200 --output latency.json
+    python -m benchmarks.latency --compare latency.json      # rerun and print deltas
+
+Extraction and result caches stay on, as in production; pass --no-cache to
+measure the uncached pipeline. --no-gateway forces the CLI fallback path.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+SCENARIOS = ("process", "execute", "background", "health_deep")
+TERMINAL_STATES = {"completed", "failed", "cancelled"}
+
+# Phrasings the local intent matcher doesn't know, so they reach the LLM
+TRANSCRIPTS = [
+    "how full is my storage looking",
+    "is the box running low on memory",
+    "what containers do I have going",
+    "what did I put in the workspace",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _uvicorn(app: str, port: int, env: dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT,
+        env=env,
+    )
+
+
+async def _wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up within {timeout}s")
+                await asyncio.sleep(0.1)
+
+
+def _environment(args, workdir: Path, fake_url: str) -> dict[str, str]:
+    bin_dir = workdir / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "moltbot"
+    stub.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{BENCH_DIR / "fake_moltbot.py"}" "$@"\n')
+    stub.chmod(0o755)
+
+    env = dict(os.environ)
+    env.update({
+        "PATH": f"{bin_dir}{os.pathsep}{env.get('PATH', '')}",
+        "PYTHONPATH": str(REPO_ROOT),
+        "ANTHROPIC_API_KEY": "bench",
+        "ANTHROPIC_BASE_URL": fake_url,
+        "MOLTBOT_GATEWAY_URL": fake_url,
+        "MOSHI_URL": f"{fake_url}/",
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_MOLTBOT_LATENCY_MS": str(args.moltbot_latency_ms),
+        "EXECUTION_STORE_PATH": str(workdir / "executions.db"),
+        "NOTIFY_ON_COMPLETE": "false",
+        "NOTIFY_ON_QUESTION": "false",
+        "NOTIFY_DEAD_LETTER_PATH": str(workdir / "dead-letter.jsonl"),
+        "HEALTH_PROBE_INTERVAL_SECONDS": "1",
+    })
+    if args.no_gateway:
+        env["MOLTBOT_GATEWAY_URL"] = f"http://127.0.0.1:{_free_port()}"
+        env["GATEWAY_MAX_RETRIES"] = "0"
+    if args.no_cache:
+        env["LLM_CACHE_SIZE"] = "0"
+        env["RESULT_CACHE_SIZE"] = "0"
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+async def _one_request(client: httpx.AsyncClient, scenario: str, i: int) -> bool:
+    """Run one scenario iteration; returns whether it succeeded."""
+    transcript = TRANSCRIPTS[i % len(TRANSCRIPTS)]
+    if scenario == "process":
+        resp = await client.post("/process", json={"transcript": transcript})
+        return resp.status_code == 200
+    if scenario == "execute":
+        resp = await client.post("/execute", json={"transcript": [transcript, "and the memory too"]})
+        return resp.status_code == 200
+    if scenario == "health_deep":
+        resp = await client.get("/health/deep")
+        return resp.status_code == 200
+    # background: submit, then poll /context until the run finishes
+    resp = await client.post("/execute/background", json={"transcript": transcript, "commands": ["df -h"]})
+    if resp.status_code != 200:
+        return False
+    session_id = resp.json()["session_id"]
+    while True:
+        ctx = await client.get(f"/context/{session_id}")
+        if ctx.status_code == 200:
+            body = ctx.json()
+            if "error" in body:
+                return False
+            if body.get("state") in TERMINAL_STATES:
+                return body["state"] == "completed"
+        await asyncio.sleep(0.01)
+
+
+async def run_scenario(base_url: str, scenario: str, concurrency: int, requests: int) -> dict:
+    """Closed loop: `concurrency` workers issue `requests` iterations in total."""
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        async def worker() -> None:
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    ok = await _one_request(client, scenario, i)
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(_percentile(ms, 50), 2),
+        "p95_ms": round(_percentile(ms, 95), 2),
+        "p99_ms": round(_percentile(ms, 99), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else None,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: list[dict], baseline: dict | None = None) -> None:
+    header = f"{'scenario':<12} {'conc':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'err':>4}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        line = (
+            f"{row['scenario']:<12} {row['concurrency']:>4} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}"
+            f" {row['p99_ms']:>9.1f} {row['throughput_rps']:>8.1f} {row['errors']:>4}"
+        )
+        old = (baseline or {}).get((row["scenario"], row["concurrency"]))
+        if old:
+            line += f"   p95 {row['p95_ms'] - old['p95_ms']:+.1f}ms, req/s {row['throughput_rps'] - old['throughput_rps']:+.1f}"
+        print(line)
+
+
+async def main_async(args) -> dict:
+    with tempfile.TemporaryDirectory(prefix="orchestrator-bench-") as tmp:
+        fake_port, app_port = _free_port(), _free_port()
+        fake_url = f"http://127.0.0.1:{fake_port}"
+        base_url = f"http://127.0.0.1:{app_port}"
+        env = _environment(args, Path(tmp), fake_url)
+
+        procs = [_uvicorn("benchmarks.fake_backends:app", fake_port, env)]
+        try:
+            await _wait_ready(f"{fake_url}/health")
+            procs.append(_uvicorn("orchestrator.main:app", app_port, env))
+            await _wait_ready(f"{base_url}/health")
+            # Let the first health probes land so /health/deep reports healthy
+            await asyncio.sleep(1.5)
+
+            results = []
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    row = await run_scenario(base_url, scenario, concurrency, args.requests)
+                    results.append(row)
+                    print(f"  {scenario} x{concurrency}: p95 {row['p95_ms']}ms, {row['throughput_rps']} req/s",
+                          file=sys.stderr)
+        finally:
+            for proc in procs:
+                proc.terminate()
+            for proc in procs:
+                proc.wait(timeout=10)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "llm_latency_ms": args.llm_latency_ms,
+            "moltbot_latency_ms": args.moltbot_latency_ms,
+            "requests_per_level": args.requests,
+            "cache": not args.no_cache,
+            "gateway": not args.no_gateway,
+            "env": args.env,
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="iterations per scenario and level")
+    parser.add_argument("--llm-latency-ms", type=float, default=400)
+    parser.add_argument("--moltbot-latency-ms", type=float, default=150)
+    parser.add_argument("--no-cache", action="store_true", help="disable extraction and result caches")
+    parser.add_argument("--no-gateway", action="store_true", help="force the moltbot CLI fallback")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra orchestrator setting, e.g. --env MOLTBOT_POOL_SIZE=4")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="earlier results JSON to print deltas against")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(main_async(args))
+
+    baseline = None
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        baseline = {(row["scenario"], row["concurrency"]): row for row in previous["results"]}
+    print_table(report["results"], baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compiled validate_command() against the original per-character implementation.
+
+Run from the repo root:  python -m benchmarks.validation
+"""
+import shlex
+import time
+from orchestrator.config import ALLOWED_CHARS, COMMAND_SCHEMAS
+from orchestrator.safety import validate_command
+
+
+# The pre-compilation implementation, the baseline being timed
+def reference_validate(cmd: str) -> dict:
+    for char in cmd:
+        if char not in ALLOWED_CHARS:
+            return {"allowed": False, "needs_confirmation": False, "reason": f"Blocked character: {char!r}"}
+    tokens = shlex.split(cmd)
+    if not tokens:
+        return {"allowed": False, "needs_confirmation": False, "reason": "Empty command"}
+    base_cmd = tokens[0]
+    if base_cmd not in COMMAND_SCHEMAS:
+        return {"allowed": False, "needs_confirmation": False, "reason": f"Unknown command: {base_cmd}"}
+    schema = COMMAND_SCHEMAS[base_cmd]
+    args = tokens[1:]
+    destructive = schema.get("destructive_subcommands", [])
+    for arg in args:
+        if arg in destructive:
+            return {"allowed": True, "needs_confirmation": True, "reason": f"Destructive subcommand: {arg}"}
+    allowed_subs = schema.get("allowed_subcommands")
+    if allowed_subs is not None and args:
+        if args[0] not in allowed_subs and args[0] not in destructive:
+            return {"allowed": False, "needs_confirmation": False, "reason": f"Subcommand not allowed: {args[0]}"}
+    allowed_flags = schema.get("allowed_flags")
+    if allowed_flags is not None:
+        for arg in args:
+            if arg.startswith("-") and arg not in allowed_flags:
+                return {"allowed": False, "needs_confirmation": False, "reason": f"Flag not allowed: {arg}"}
+    return {"allowed": True, "needs_confirmation": False, "reason": "OK"}
+
+
+CORPUS = [
+    "ls -la", "ls", "df -h", "free -m", "top -b -n 1", "ps aux", "ps --forest",
+    "systemctl status nginx", "systemctl restart nginx", "systemctl enable nginx",
+    "docker ps", "docker logs web", "docker stop abc", "docker run alpine", "docker",
+    "rm -rf /", "ls | cat /etc/passwd", "ls --color=always", "", "   ", "ls\t-la",
+    "cat /etc/shadow", "df -h; reboot", "ls $(whoami)", "free -h -g",
+]
+
+
+def seconds_per_call(validate, batch: list[str]) -> float:
+    start = time.perf_counter()
+    for cmd in batch:
+        validate(cmd)
+    return (time.perf_counter() - start) / len(batch)
+
+
+def main() -> None:
+    batch = CORPUS * 2000
+    reference = seconds_per_call(reference_validate, batch)
+    compiled = seconds_per_call(validate_command, batch)
+    print(f"reference: {reference * 1e6:6.2f} us/call")
+    print(f"compiled:  {compiled * 1e6:6.2f} us/call  ({reference / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import { useState, useCallback } from 'react';
 import { useMoshiConnection } from './hooks/useMoshiConnection';
 import { useTranscript } from './hooks/useTranscript';
 import { useAutoSend } from './hooks/useAutoSend';
+import { useTranscriptStream } from './hooks/useTranscriptStream';
 import { useExecution } from './hooks/useExecution';
 import { executeBackground, resumeExecution } from './api/orchestrator';
 import { RecordButton } from './components/RecordButton';
@@ -39,20 +40,28 @@ function App() {
     onSend: handleSend,
   });
 
+  // Streaming ingestion: the orchestrator detects the end of each utterance
+  const { sendWord, endUtterance } = useTranscriptStream({
+    onEndpoint: markSent,
+    onExecution: setSessionId,
+  });
+
   // Text event handler - receives transcribed text tokens from Moshi
   const handleText = useCallback((text: string) => {
     // Moshi sends text tokens (words or punctuation)
-    // Add each token and trigger auto-send detection
+    // Stream each token; fall back to auto-send detection without the socket
     if (text.trim()) {
       addWord(text);
-      onAutoSendWord(); // Trigger auto-send silence detection
+      if (!sendWord(text)) {
+        onAutoSendWord(); // Trigger auto-send silence detection
+      }
 
       // End sentence on terminal punctuation
       if (text.match(/[.!?]$/)) {
         endSentence();
       }
     }
-  }, [addWord, onAutoSendWord, endSentence]);
+  }, [addWord, sendWord, onAutoSendWord, endSentence]);
 
   // Moshi WebSocket + Audio connection
   const {
@@ -66,6 +75,11 @@ function App() {
     onText: handleText,
   });
 
+  const handleStopRecording = useCallback(() => {
+    stopRecording();
+    endUtterance();
+  }, [stopRecording, endUtterance]);
+
   // Execution status monitoring
   const { context, error: executionError, isLoading } = useExecution(sessionId);
 
@@ -95,7 +109,7 @@ function App() {
             isRecording={isRecording}
             onConnect={connect}
             onStartRecording={startRecording}
-            onStopRecording={stopRecording}
+            onStopRecording={handleStopRecording}
           />
         </div>
 
@@ -62,6 +62,10 @@ export async function getExecutionContext(sessionId: string): Promise<ExecutionC
   return response.json();
 }
 
+export function executionEventsUrl(sessionId: string): string {
+  return `/api/context/${sessionId}/events`;
+}
+
 export async function resumeExecution(
   sessionId: string,
   answer: string
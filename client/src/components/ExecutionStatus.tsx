@@ -23,6 +23,7 @@ export function ExecutionStatus({ context, isLoading, error }: ExecutionStatusPr
   const getStatusColor = (state: string) => {
     switch (state) {
       case 'pending':
+      case 'queued':
         return 'bg-gray-100 text-gray-800 border-gray-200';
       case 'running':
         return 'bg-blue-50 text-blue-800 border-blue-200';
@@ -32,6 +33,8 @@ export function ExecutionStatus({ context, isLoading, error }: ExecutionStatusPr
         return 'bg-green-50 text-green-800 border-green-200';
       case 'failed':
         return 'bg-red-50 text-red-800 border-red-200';
+      case 'cancelled':
+        return 'bg-gray-100 text-gray-500 border-gray-200';
       default:
         return 'bg-gray-100 text-gray-800 border-gray-200';
     }
@@ -1,10 +1,44 @@
 import { useState, useEffect } from 'react';
-import { getExecutionContext } from '../api/orchestrator';
-import type { ExecutionContext } from '../types';
+import { executionEventsUrl, getExecutionContext } from '../api/orchestrator';
+import type { ExecutionContext, ExecutionEventType } from '../types';
 
-const POLL_INTERVAL = 2000; // 2 seconds
+const POLL_INTERVAL = 2000; // 2 seconds, only used if streaming is unavailable
 const MAX_POLL_FAILURES = 3;
 
+const EVENT_TYPES: ExecutionEventType[] = ['snapshot', 'state', 'question', 'answer', 'result', 'error'];
+
+function isTerminal(state: string) {
+  return state === 'completed' || state === 'failed' || state === 'cancelled';
+}
+
+// Fold one pushed event into the current context
+function applyEvent(
+  ctx: ExecutionContext | null,
+  type: ExecutionEventType,
+  data: Record<string, unknown>
+): ExecutionContext | null {
+  if (type === 'snapshot') return data as unknown as ExecutionContext;
+  if (!ctx) return ctx;
+
+  const next = { ...ctx, state: data.state as ExecutionContext['state'], updated_at: data.updated_at as string };
+  switch (type) {
+    case 'question':
+      return { ...next, current_question: data.question as string, question_context: data.context as string | null };
+    case 'answer':
+      return {
+        ...next,
+        current_question: null,
+        answers: [...ctx.answers, { question: data.question as string, answer: data.answer as string }],
+      };
+    case 'result':
+      return { ...next, results: [...ctx.results, { output: data.output as string }] };
+    case 'error':
+      return { ...next, error_message: data.error_message as string };
+    default:
+      return next;
+  }
+}
+
 export function useExecution(sessionId: string | null) {
   const [context, setContext] = useState<ExecutionContext | null>(null);
   const [error, setError] = useState<string | null>(null);
@@ -18,6 +52,7 @@ export function useExecution(sessionId: string | null) {
 
     let pollFailures = 0;
     let isMounted = true;
+    let interval: ReturnType<typeof setInterval> | undefined;
 
     const poll = async () => {
       if (!isMounted) return;
@@ -32,7 +67,7 @@ export function useExecution(sessionId: string | null) {
         pollFailures = 0; // Reset on success
 
         // Stop polling on terminal states
-        if (ctx.state === 'completed' || ctx.state === 'failed') {
+        if (isTerminal(ctx.state)) {
           clearInterval(interval);
           setIsLoading(false);
         }
@@ -52,11 +87,36 @@ export function useExecution(sessionId: string | null) {
     };
 
     setIsLoading(true);
-    poll(); // Initial fetch
-    const interval = setInterval(poll, POLL_INTERVAL);
+
+    // EventSource reconnects on its own and sends Last-Event-ID, so the
+    // server resumes from the last event we saw
+    const source = new EventSource(executionEventsUrl(sessionId));
+
+    for (const type of EVENT_TYPES) {
+      source.addEventListener(type, (e) => {
+        if (!isMounted) return;
+        const data = JSON.parse((e as MessageEvent).data);
+        setContext((prev) => applyEvent(prev, type, data));
+        setError(null);
+        if (isTerminal(data.state)) {
+          source.close();
+          setIsLoading(false);
+        }
+      });
+    }
+
+    source.onerror = () => {
+      // CLOSED means the server refused the stream (e.g. unknown session);
+      // fall back to polling so we still surface its answer
+      if (source.readyState === EventSource.CLOSED && isMounted && interval === undefined) {
+        poll();
+        interval = setInterval(poll, POLL_INTERVAL);
+      }
+    };
 
     return () => {
       isMounted = false;
+      source.close();
       clearInterval(interval);
     };
   }, [sessionId]);
@@ -0,0 +1,77 @@
+import { useRef, useState, useCallback, useEffect } from 'react';
+import type { TranscriptStreamMessage } from '../types';
+
+const RECONNECT_DELAY = 3000;
+
+interface UseTranscriptStreamOptions {
+  onEndpoint: (transcript: string) => void;
+  onExecution: (sessionId: string) => void;
+}
+
+// Streams recognized words to the orchestrator, which finds the end of each
+// utterance itself. sendWord() returns false while the socket is down so the
+// caller can fall back to silence-based auto-send.
+export function useTranscriptStream({ onEndpoint, onExecution }: UseTranscriptStreamOptions) {
+  const wsRef = useRef<WebSocket | null>(null);
+  const reconnectTimeoutRef = useRef<NodeJS.Timeout>();
+  const handlersRef = useRef({ onEndpoint, onExecution });
+  const [isStreaming, setIsStreaming] = useState(false);
+
+  handlersRef.current = { onEndpoint, onExecution };
+
+  useEffect(() => {
+    let closed = false;
+
+    const open = () => {
+      const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+      const ws = new WebSocket(`${protocol}//${window.location.host}/api/transcript/stream`);
+      wsRef.current = ws;
+
+      ws.onopen = () => setIsStreaming(true);
+
+      ws.onmessage = (event) => {
+        const message = JSON.parse(event.data) as TranscriptStreamMessage;
+        switch (message.type) {
+          case 'endpoint':
+            handlersRef.current.onEndpoint(message.transcript);
+            break;
+          case 'execution':
+            handlersRef.current.onExecution(message.session_id);
+            break;
+          case 'error':
+            console.error('Transcript stream rejected utterance', message.status, message.detail);
+            break;
+        }
+      };
+
+      ws.onclose = () => {
+        setIsStreaming(false);
+        wsRef.current = null;
+        if (!closed) {
+          reconnectTimeoutRef.current = setTimeout(open, RECONNECT_DELAY);
+        }
+      };
+    };
+
+    open();
+    return () => {
+      closed = true;
+      clearTimeout(reconnectTimeoutRef.current);
+      wsRef.current?.close();
+    };
+  }, []);
+
+  const send = useCallback((message: object) => {
+    const ws = wsRef.current;
+    if (!ws || ws.readyState !== WebSocket.OPEN) return false;
+    ws.send(JSON.stringify(message));
+    return true;
+  }, []);
+
+  const sendWord = useCallback((text: string) => send({ type: 'word', text }), [send]);
+
+  // Close the current utterance now, e.g. when recording stops
+  const endUtterance = useCallback(() => send({ type: 'end' }), [send]);
+
+  return { sendWord, endUtterance, isStreaming };
+}
@@ -10,10 +10,12 @@ export interface Sentence {
 // Execution Types (must match Python ExecutionState enum)
 export enum ExecutionState {
   PENDING = 'pending',
+  QUEUED = 'queued',
   RUNNING = 'running',
   WAITING_FOR_INPUT = 'waiting_for_input',
   COMPLETED = 'completed',
   FAILED = 'failed',
+  CANCELLED = 'cancelled',
 }
 
 export interface ExecutionContext {
@@ -27,10 +29,20 @@ export interface ExecutionContext {
   answers: Array<{ question: string; answer: string }>;
   topics: string[];
   error_message: string | null;
+  partial_output: string; // tail of the running agent's output
   created_at: string; // ISO datetime
   updated_at: string; // ISO datetime
 }
 
+// Server-Sent Events from /context/{session_id}/events
+export type ExecutionEventType = 'snapshot' | 'state' | 'question' | 'answer' | 'result' | 'error';
+
+// Server messages on the /transcript/stream WebSocket
+export type TranscriptStreamMessage =
+  | { type: 'endpoint'; transcript: string }
+  | { type: 'execution'; session_id: string; state: ExecutionState }
+  | { type: 'error'; status: number; detail: string };
+
 // API Response Types
 export interface BackgroundExecuteResponse {
   session_id: string;
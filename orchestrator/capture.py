@@ -0,0 +1,64 @@
+import asyncio
+from typing import Callable
+
+CHUNK_SIZE = 4096
+
+
+class BoundedCapture:
+    """Byte-capped capture of a process stream.
+
+    Keeps the first `head_limit` bytes, a ring buffer of the last `tail_limit`
+    bytes and the total byte count, so memory stays constant however much
+    the process prints. Errors and summaries usually sit at the end of agent
+    output, which is why the tail is kept rather than dropped.
+    """
+
+    def __init__(self, limit: int, tail_fraction: float = 0.2):
+        self.tail_limit = int(limit * tail_fraction)
+        self.head_limit = limit - self.tail_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def feed(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data and self.tail_limit:
+            self.tail += data
+            excess = len(self.tail) - self.tail_limit
+            if excess > 0:
+                del self.tail[:excess]
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.head) + len(self.tail)
+
+    def text(self) -> str:
+        """Decoded capture, with a marker where the middle was dropped."""
+        head = self.head.decode(errors="replace")
+        tail = self.tail.decode(errors="replace")
+        if not self.truncated:
+            return head + tail
+        omitted = self.total - len(self.head) - len(self.tail)
+        return f"{head}\n... (truncated {omitted} bytes, total {self.total} bytes) ...\n{tail}"
+
+
+async def read_into(
+    stream: asyncio.StreamReader,
+    capture: BoundedCapture,
+    on_first: Callable[[], None] | None = None,
+) -> None:
+    """Drain `stream` into `capture` chunk by chunk until EOF.
+
+    `on_first` is called when the first bytes arrive.
+    """
+    while True:
+        data = await stream.read(CHUNK_SIZE)
+        if not data:
+            return
+        if on_first and not capture.total:
+            on_first()
+        capture.feed(data)
@@ -11,19 +11,22 @@ PERSONAPLEX_VOICE = os.getenv("PERSONAPLEX_VOICE", "NATM1")
 LLM_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 LLM_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
 
+# cache_ttl: seconds a read-only command's output may be reused (0 = never)
 COMMAND_SCHEMAS = {
-    "ls": {"allowed_flags": ["-l", "-a", "-h", "-la", "-lah"]},
-    "df": {"allowed_flags": ["-h"]},
-    "free": {"allowed_flags": ["-h", "-m", "-g"]},
-    "top": {"allowed_flags": ["-b", "-n"]},
-    "ps": {"allowed_flags": ["aux", "-ef", "-e"]},
+    "ls": {"allowed_flags": ["-l", "-a", "-h", "-la", "-lah"], "cache_ttl": 10},
+    "df": {"allowed_flags": ["-h"], "cache_ttl": 30},
+    "free": {"allowed_flags": ["-h", "-m", "-g"], "cache_ttl": 5},
+    "top": {"allowed_flags": ["-b", "-n"], "cache_ttl": 2},
+    "ps": {"allowed_flags": ["aux", "-ef", "-e"], "cache_ttl": 5},
     "systemctl": {
         "allowed_subcommands": ["status"],
         "destructive_subcommands": ["restart", "stop", "start"],
+        "cache_ttl": 10,
     },
     "docker": {
         "allowed_subcommands": ["ps", "images", "stats", "logs"],
         "destructive_subcommands": ["rm", "stop", "kill"],
+        "cache_ttl": 5,
     },
 }
 
@@ -36,9 +39,77 @@ ALLOWED_CHARS = set(
 
 PENDING_COMMAND_TTL_SECONDS = 120
 
+# Max read-only commands from one /execute request running at once
+EXECUTE_CONCURRENCY = max(1, int(os.getenv("EXECUTE_CONCURRENCY", "4")))
+
 # Two-Way Communication Settings
 WHATSAPP_PHONE = os.getenv("WHATSAPP_PHONE")
 PERSONAPLEX_URL = os.getenv("PERSONAPLEX_URL", "https://your-deployment.salad.cloud:8998")
 NOTIFY_ON_COMPLETE = os.getenv("NOTIFY_ON_COMPLETE", "true").lower() == "true"
 NOTIFY_ON_QUESTION = os.getenv("NOTIFY_ON_QUESTION", "true").lower() == "true"
 EXECUTION_TIMEOUT_MINUTES = max(1, int(os.getenv("EXECUTION_TIMEOUT_MINUTES", "60")))
+# Background agent passes running at once, and how many may wait for a slot
+BACKGROUND_CONCURRENCY = max(1, int(os.getenv("BACKGROUND_CONCURRENCY", "2")))
+BACKGROUND_QUEUE_SIZE = max(0, int(os.getenv("BACKGROUND_QUEUE_SIZE", "20")))
+
+# Moltbot Worker Pool
+MOLTBOT_POOL_SIZE = max(1, int(os.getenv("MOLTBOT_POOL_SIZE", "2")))
+MOLTBOT_WORKER_MAX_USES = max(1, int(os.getenv("MOLTBOT_WORKER_MAX_USES", "50")))
+MOLTBOT_WORKER_CHECK_INTERVAL_SECONDS = max(1, int(os.getenv("MOLTBOT_WORKER_CHECK_INTERVAL_SECONDS", "300")))
+# Seconds an interactive command waits for a free worker before giving up
+MOLTBOT_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("MOLTBOT_ACQUIRE_TIMEOUT_SECONDS", "10"))
+MOLTBOT_COMPILE_CACHE_DIR = os.getenv("MOLTBOT_COMPILE_CACHE_DIR", "~/.cache/moltbot-node")
+# Seconds a cancelled or timed-out agent's process group gets between SIGTERM and SIGKILL
+PROCESS_KILL_GRACE_SECONDS = float(os.getenv("PROCESS_KILL_GRACE_SECONDS", "5"))
+
+# Moltbot Gateway HTTP API
+MOLTBOT_GATEWAY_URL = os.getenv("MOLTBOT_GATEWAY_URL", "http://127.0.0.1:18789")
+MOLTBOT_GATEWAY_TOKEN = os.getenv("MOLTBOT_GATEWAY_TOKEN")
+GATEWAY_MAX_CONNECTIONS = max(1, int(os.getenv("GATEWAY_MAX_CONNECTIONS", "10")))
+GATEWAY_MAX_RETRIES = max(0, int(os.getenv("GATEWAY_MAX_RETRIES", "2")))
+
+# Background Health Probes
+MOSHI_URL = os.getenv("MOSHI_URL", "https://127.0.0.1:8999/")
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "5"))
+HEALTH_PROBE_MAX_BACKOFF_SECONDS = float(os.getenv("HEALTH_PROBE_MAX_BACKOFF_SECONDS", "30"))
+
+# Notification Dispatcher
+NOTIFY_QUEUE_SIZE = max(1, int(os.getenv("NOTIFY_QUEUE_SIZE", "100")))
+NOTIFY_MAX_ATTEMPTS = max(1, int(os.getenv("NOTIFY_MAX_ATTEMPTS", "4")))
+NOTIFY_RETRY_BASE_SECONDS = float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "2"))
+NOTIFY_DIGEST_WINDOW_SECONDS = float(os.getenv("NOTIFY_DIGEST_WINDOW_SECONDS", "2"))
+NOTIFY_DEAD_LETTER_PATH = os.getenv("NOTIFY_DEAD_LETTER_PATH", "/var/log/orchestrator-notify-dead-letter.jsonl")
+
+# LLM Extraction Cache
+LLM_CACHE_SIZE = max(0, int(os.getenv("LLM_CACHE_SIZE", "256")))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+
+# Durable Execution Store
+# Inside the /root/clawd volume so executions outlive container restarts
+EXECUTION_STORE_PATH = os.getenv("EXECUTION_STORE_PATH", "/root/clawd/.orchestrator/executions.db")
+EXECUTION_STORE_FLUSH_SECONDS = float(os.getenv("EXECUTION_STORE_FLUSH_SECONDS", "0.5"))
+# How long finished executions stay readable via /context
+EXECUTION_RETENTION_SECONDS = max(60, int(os.getenv("EXECUTION_RETENTION_SECONDS", "86400")))
+
+# Read-only Command Result Cache
+RESULT_CACHE_SIZE = max(0, int(os.getenv("RESULT_CACHE_SIZE", "128")))
+
+# Event Loop Monitor
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL_SECONDS = float(os.getenv("LOOP_MONITOR_INTERVAL_SECONDS", "0.25"))
+# A callback holding the loop longer than this gets its stack logged
+LOOP_BLOCK_THRESHOLD_SECONDS = float(os.getenv("LOOP_BLOCK_THRESHOLD_SECONDS", "0.1"))
+
+# Request Tracing
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+TRACE_PATH = os.getenv("TRACE_PATH", "/var/log/orchestrator-traces.jsonl")
+TRACE_MAX_BYTES = max(1024, int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024))))
+TRACE_BACKUP_COUNT = max(0, int(os.getenv("TRACE_BACKUP_COUNT", "3")))
+
+# Streamed Transcript Endpointing
+# Pause that ends an utterance; shorter after terminal punctuation
+ENDPOINT_SILENCE_SECONDS = float(os.getenv("ENDPOINT_SILENCE_SECONDS", "0.8"))
+ENDPOINT_PUNCTUATED_SILENCE_SECONDS = float(os.getenv("ENDPOINT_PUNCTUATED_SILENCE_SECONDS", "0.3"))
+ENDPOINT_MIN_WORDS = max(1, int(os.getenv("ENDPOINT_MIN_WORDS", "3")))
+# Pause after which extraction starts speculatively on the words so far
+SPECULATE_AFTER_SECONDS = float(os.getenv("SPECULATE_AFTER_SECONDS", "0.25"))
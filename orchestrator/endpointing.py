@@ -0,0 +1,126 @@
+"""End-of-utterance detection for streamed transcripts, plus speculative extraction.
+
+The client sends words as Moshi recognizes them instead of waiting out its
+own silence timer. An Utterance decides when the speaker has stopped: a
+short pause after terminal punctuation, a longer one otherwise. Shortly
+before that, once the words have been stable briefly, a Speculator starts
+command extraction on the text so far. If the utterance ends without new
+words, the finished extraction is used instead of starting from scratch.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable
+from . import metrics
+from .config import (
+    ENDPOINT_SILENCE_SECONDS,
+    ENDPOINT_PUNCTUATED_SILENCE_SECONDS,
+    ENDPOINT_MIN_WORDS,
+    SPECULATE_AFTER_SECONDS,
+)
+
+SPECULATE = "speculate"
+ENDPOINT = "endpoint"
+
+SPECULATIONS = metrics.counter(
+    "orchestrator_speculative_extractions_total",
+    "Finished utterances by speculation outcome: hit, stale (words changed) or none.",
+    ("outcome",),
+)
+
+
+class Utterance:
+    """Words of the utterance in progress and when they arrived."""
+
+    def __init__(
+        self,
+        silence: float = ENDPOINT_SILENCE_SECONDS,
+        punctuated_silence: float = ENDPOINT_PUNCTUATED_SILENCE_SECONDS,
+        stable: float = SPECULATE_AFTER_SECONDS,
+        min_words: int = ENDPOINT_MIN_WORDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.silence = silence
+        self.punctuated_silence = punctuated_silence
+        self.stable = stable
+        self.min_words = min_words
+        self._clock = clock
+        self.words: list[str] = []
+        self._last_word = 0.0
+        self._speculated = False
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.words)
+
+    def add(self, word: str) -> None:
+        word = word.strip()
+        if not word:
+            return
+        self.words.append(word)
+        self._last_word = self._clock()
+        self._speculated = False
+
+    def take(self) -> str:
+        """Return the utterance text and start a new one."""
+        text = self.text
+        self.words = []
+        self._speculated = False
+        return text
+
+    def _endpoint_silence(self) -> float:
+        return self.punctuated_silence if self.words[-1][-1] in ".!?" else self.silence
+
+    def wait(self) -> float | None:
+        """Seconds until poll() may have something to do; None while too short."""
+        if len(self.words) < self.min_words:
+            return None
+        quiet = self._clock() - self._last_word
+        due = self._endpoint_silence()
+        if not self._speculated:
+            due = min(due, self.stable)
+        return max(0.0, due - quiet)
+
+    def poll(self) -> str | None:
+        """ENDPOINT once the speaker has stopped, SPECULATE once per stable prefix."""
+        if len(self.words) < self.min_words:
+            return None
+        quiet = self._clock() - self._last_word
+        if quiet >= self._endpoint_silence():
+            return ENDPOINT
+        if not self._speculated and quiet >= self.stable:
+            self._speculated = True
+            return SPECULATE
+        return None
+
+
+class Speculator:
+    """At most one extraction running ahead of the endpoint, keyed by its text."""
+
+    def __init__(self, extract: Callable[[str], Awaitable[dict]]):
+        self._extract = extract
+        self._text: str | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self, text: str) -> None:
+        if text == self._text:
+            return
+        self.cancel()
+        self._text = text
+        self._task = asyncio.ensure_future(self._extract(text))
+
+    async def result(self, text: str) -> dict:
+        """Extraction for the final `text`, reusing the speculation when it matches."""
+        task, speculated = self._task, self._text
+        self._task = self._text = None
+        if task is not None and speculated == text:
+            SPECULATIONS.inc(outcome="hit")
+            return await task
+        if task is not None:
+            task.cancel()
+        SPECULATIONS.inc(outcome="stale" if task is not None else "none")
+        return await self._extract(text)
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._task = self._text = None
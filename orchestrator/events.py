@@ -0,0 +1,72 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator
+
+EVENT_BUFFER_SIZE = 256
+
+# Pseudo-events yielded by EventLog.subscribe; never stored in the log
+RESYNC = "resync"
+KEEPALIVE = "keepalive"
+
+
+class EventLog:
+    """Per-execution event buffer with monotonically increasing sequence numbers.
+
+    Subscribers resume by passing the last sequence number they saw. Events
+    older than the buffer are gone; `subscribe` reports that with a RESYNC
+    pseudo-event so the caller can send a full snapshot instead.
+    """
+
+    def __init__(self, maxlen: int = EVENT_BUFFER_SIZE):
+        self.seq = 0
+        self.closed = False
+        self._events: deque[tuple[int, str, dict]] = deque(maxlen=maxlen)
+        self._changed = asyncio.Event()
+
+    def publish(self, kind: str, data: dict) -> int:
+        self.seq += 1
+        self._events.append((self.seq, kind, data))
+        self._wake()
+        return self.seq
+
+    def close(self) -> None:
+        """Mark the log finished; subscribers drain what's left and stop."""
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        # Swap in a fresh Event so waiters see exactly one wake-up per change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def since(self, after: int) -> list[tuple[int, str, dict]] | None:
+        """Events with seq > after, or None if the caller must resync from a snapshot."""
+        if after > self.seq or (self._events and after < self._events[0][0] - 1):
+            return None
+        return [e for e in self._events if e[0] > after]
+
+    async def subscribe(
+        self, after: int, keepalive: float = 15.0
+    ) -> AsyncIterator[tuple[int, str, dict | None]]:
+        """Yield (seq, kind, data) for events after `after` as they're published.
+
+        Yields RESYNC when the subscriber fell behind the buffer, and
+        KEEPALIVE after each idle `keepalive` interval.
+        """
+        while True:
+            changed = self._changed
+            pending = self.since(after)
+            if pending is None:
+                after = self.seq
+                yield (after, RESYNC, None)
+                continue
+            for event in pending:
+                yield event
+                after = event[0]
+            if self.closed:
+                return
+            if not pending:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield (after, KEEPALIVE, None)
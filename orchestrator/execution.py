@@ -1,30 +1,141 @@
 from enum import Enum
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
+import time
 import uuid
+import zlib
+
+# Per-field caps; long-lived sessions keep their most recent entries
+MAX_TRANSCRIPT_ITEMS = 50
+MAX_COMMANDS = 20
+MAX_RESULTS = 20
+MAX_ANSWERS = 50
+MAX_TEXT_CHARS = 4_000
+# Outputs longer than this are kept zlib-compressed until serialized
+COMPRESS_THRESHOLD = 4_096
+# Decompressed outputs kept around, since every publish serializes the context
+UNPACK_CACHE_SIZE = 64
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def _clip(text: Optional[str]) -> Optional[str]:
+    if text is None or len(text) <= MAX_TEXT_CHARS:
+        return text
+    return text[:MAX_TEXT_CHARS]
+
+
+def _pack(output: str) -> str | bytes:
+    if len(output) <= COMPRESS_THRESHOLD:
+        return output
+    return zlib.compress(output.encode(), 1)
+
+
+@lru_cache(maxsize=UNPACK_CACHE_SIZE)
+def _decompress(output: bytes) -> str:
+    return zlib.decompress(output).decode()
+
+
+def _unpack(output: str | bytes) -> str:
+    return output if isinstance(output, str) else _decompress(output)
 
-def _utcnow() -> datetime:
-    return datetime.now(timezone.utc)
 
 class ExecutionState(Enum):
     PENDING = "pending"
+    QUEUED = "queued"
     RUNNING = "running"
     WAITING_FOR_INPUT = "waiting_for_input"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
-@dataclass
+@dataclass(slots=True)
 class ExecutionContext:
+    """State of one background execution.
+
+    Slotted, with epoch-float timestamps and capped lists, so many live
+    sessions stay cheap. Large result outputs are stored compressed; use
+    add_result/add_answer/set_question/set_error rather than writing the
+    fields directly, so the caps apply.
+    """
     session_id: str = field(default_factory=lambda: str(uuid.uuid4()))
     state: ExecutionState = ExecutionState.PENDING
     transcript: list[str] = field(default_factory=list)
     commands: list[str] = field(default_factory=list)
-    results: list[dict] = field(default_factory=list)
+    results: list[str | bytes] = field(default_factory=list)
     current_question: Optional[str] = None
     question_context: Optional[str] = None
     answers: list[dict] = field(default_factory=list)
     topics: list[str] = field(default_factory=list)
     error_message: Optional[str] = None
-    created_at: datetime = field(default_factory=_utcnow)
-    updated_at: datetime = field(default_factory=_utcnow)
+    partial_output: str = ""
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.transcript = [_clip(t) for t in self.transcript[-MAX_TRANSCRIPT_ITEMS:]]
+        self.commands = [_clip(c) for c in self.commands[:MAX_COMMANDS]]
+        self.current_question = _clip(self.current_question)
+        self.question_context = _clip(self.question_context)
+        self.error_message = _clip(self.error_message)
+
+    def touch(self) -> None:
+        self.updated_at = time.time()
+
+    def add_result(self, output: str) -> None:
+        self.results.append(_pack(output))
+        del self.results[:-MAX_RESULTS]
+
+    def add_answer(self, question: Optional[str], answer: str) -> None:
+        self.answers.append({"question": question, "answer": _clip(answer)})
+        del self.answers[:-MAX_ANSWERS]
+
+    def set_question(self, question: Optional[str], context: Optional[str] = None) -> None:
+        self.current_question = _clip(question)
+        self.question_context = _clip(context)
+
+    def set_error(self, message: str) -> None:
+        self.error_message = _clip(message)
+
+    def result_outputs(self) -> list[str]:
+        return [_unpack(r) for r in self.results]
+
+    def last_output(self) -> Optional[str]:
+        return _unpack(self.results[-1]) if self.results else None
+
+
+def context_to_dict(ctx: ExecutionContext) -> dict:
+    return {
+        "session_id": ctx.session_id,
+        "state": ctx.state.value,
+        "transcript": ctx.transcript,
+        "commands": ctx.commands,
+        "results": [{"output": output} for output in ctx.result_outputs()],
+        "current_question": ctx.current_question,
+        "question_context": ctx.question_context,
+        "answers": ctx.answers,
+        "topics": ctx.topics,
+        "error_message": ctx.error_message,
+        "partial_output": ctx.partial_output,
+        "created_at": _iso(ctx.created_at),
+        "updated_at": _iso(ctx.updated_at),
+    }
+
+
+def context_from_dict(data: dict) -> ExecutionContext:
+    ctx = ExecutionContext(
+        **{
+            **data,
+            "state": ExecutionState(data["state"]),
+            "results": [],
+            "created_at": datetime.fromisoformat(data["created_at"]).timestamp(),
+            "updated_at": datetime.fromisoformat(data["updated_at"]).timestamp(),
+        }
+    )
+    for result in data["results"]:
+        ctx.add_result(result["output"])
+    return ctx
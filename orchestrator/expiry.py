@@ -0,0 +1,96 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Callable
+
+
+class ExpiryHeap:
+    """Fires a callback for each key when its wall-clock deadline passes.
+
+    Deadlines sit in a min-heap and a single loop timer is armed for the
+    earliest one, so scheduling is O(log n) and nothing is ever scanned.
+    Rescheduling or discarding a key leaves its old heap entry behind; stale
+    entries are skipped when they reach the top.
+    """
+
+    def __init__(self, on_expire: Callable[[str], None]):
+        self._on_expire = on_expire
+        self._heap: list[tuple[float, int, str]] = []
+        self._live: dict[str, int] = {}
+        self._tokens = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_loop: asyncio.AbstractEventLoop | None = None
+        self._timer_at = math.inf
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._live
+
+    def schedule(self, key: str, expires: float) -> None:
+        """Expire `key` at `expires` (a time.time() value), replacing any earlier deadline."""
+        token = next(self._tokens)
+        self._live[key] = token
+        heapq.heappush(self._heap, (expires, token, key))
+        # Don't let superseded entries pile up between expiries
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._compact()
+        self._arm()
+
+    def discard(self, key: str) -> None:
+        self._live.pop(key, None)
+
+    def clear(self) -> None:
+        self._live.clear()
+        self._heap.clear()
+        self._cancel_timer()
+
+    def stats(self) -> dict:
+        return {"scheduled": len(self._live), "heap_size": len(self._heap), "expired": self.expired}
+
+    def _compact(self) -> None:
+        self._heap = [e for e in self._heap if self._live.get(e[2]) == e[1]]
+        heapq.heapify(self._heap)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._timer_loop = None
+        self._timer_at = math.inf
+
+    def _arm(self) -> None:
+        """Point the timer at the earliest deadline if it isn't already."""
+        if not self._heap:
+            self._cancel_timer()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Armed by the next schedule() made from the event loop
+            return
+        deadline = self._heap[0][0]
+        if self._timer_loop is loop and self._timer_at <= deadline:
+            return
+        self._cancel_timer()
+        self._timer = loop.call_later(max(0.0, deadline - time.time()), self._fire)
+        self._timer_loop = loop
+        self._timer_at = deadline
+
+    def _fire(self) -> None:
+        self._timer = None
+        self._timer_loop = None
+        self._timer_at = math.inf
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, token, key = heapq.heappop(self._heap)
+            if self._live.get(key) != token:
+                continue
+            del self._live[key]
+            self.expired += 1
+            self._on_expire(key)
+        self._arm()
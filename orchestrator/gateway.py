@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from typing import Any
+import httpx
+from .config import (
+    MOLTBOT_GATEWAY_URL,
+    MOLTBOT_GATEWAY_TOKEN,
+    GATEWAY_MAX_CONNECTIONS,
+    GATEWAY_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Model name the gateway's OpenAI-compatible endpoint maps to the main agent
+AGENT_MODEL = "moltbot:main"
+
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=2.0)
+RETRY_BACKOFF_SECONDS = 0.1
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+class GatewayError(Exception):
+    """The gateway answered, but with an error."""
+
+
+class GatewayUnavailable(GatewayError):
+    """The gateway could not be reached at all."""
+
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        headers = {}
+        if MOLTBOT_GATEWAY_TOKEN:
+            headers["Authorization"] = f"Bearer {MOLTBOT_GATEWAY_TOKEN}"
+        _client = httpx.AsyncClient(
+            base_url=MOLTBOT_GATEWAY_URL,
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=GATEWAY_MAX_CONNECTIONS,
+                max_keepalive_connections=GATEWAY_MAX_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+        )
+    return _client
+
+
+async def close() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _request(
+    method: str,
+    path: str,
+    *,
+    json: Any = None,
+    timeout: float | None = None,
+    idempotent: bool = True,
+) -> httpx.Response:
+    """Send a request, retrying connection failures with exponential backoff.
+
+    Non-idempotent calls (agent runs) are only retried when the request never
+    reached the gateway, so a slow agent is never started twice.
+    """
+    client = get_client()
+    kwargs = {"json": json}
+    if timeout is not None:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=DEFAULT_TIMEOUT.connect)
+
+    for attempt in range(GATEWAY_MAX_RETRIES + 1):
+        last_attempt = attempt == GATEWAY_MAX_RETRIES
+        try:
+            resp = await client.request(method, path, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            if last_attempt:
+                raise GatewayUnavailable(f"Gateway unreachable: {type(e).__name__}") from e
+        except httpx.TimeoutException:
+            if not idempotent or last_attempt:
+                raise
+        except httpx.TransportError as e:
+            if not idempotent or last_attempt:
+                raise GatewayError(f"Gateway transport error: {type(e).__name__}") from e
+        else:
+            if resp.status_code in RETRYABLE_STATUS and idempotent and not last_attempt:
+                logger.debug("Gateway %s %s returned %d, retrying", method, path, resp.status_code)
+            elif resp.status_code >= 400:
+                raise GatewayError(f"Gateway HTTP {resp.status_code}: {resp.text[:500]}")
+            else:
+                return resp
+        await asyncio.sleep(RETRY_BACKOFF_SECONDS * (2 ** attempt))
+    raise GatewayUnavailable("Gateway retries exhausted")
+
+
+async def invoke_tool(tool: str, args: dict, *, timeout: float | None = None) -> Any:
+    """Invoke a gateway tool via POST /tools/invoke and return its result."""
+    resp = await _request("POST", "/tools/invoke", json={"tool": tool, "args": args}, timeout=timeout)
+    body = resp.json()
+    if not body.get("ok", False):
+        error = body.get("error")
+        if isinstance(error, dict):
+            error = error.get("message")
+        raise GatewayError(f"Tool {tool} failed: {error or 'unknown error'}")
+    return body.get("result")
+
+
+async def agent(message: str, *, session_key: str | None = None, timeout: float = 30.0) -> str:
+    """Run one agent turn and return the assistant's reply text."""
+    payload = {
+        "model": AGENT_MODEL,
+        "messages": [{"role": "user", "content": message}],
+    }
+    if session_key:
+        payload["user"] = session_key
+    resp = await _request(
+        "POST", "/v1/chat/completions", json=payload, timeout=timeout, idempotent=False
+    )
+    try:
+        return resp.json()["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise GatewayError(f"Unexpected agent response: {e}") from e
+
+
+async def sessions_list() -> list:
+    result = await invoke_tool("sessions_list", {})
+    if isinstance(result, dict):
+        result = result.get("sessions", [])
+    return result or []
+
+
+async def sessions_history(session_key: str, limit: int = 50) -> list:
+    result = await invoke_tool("sessions_history", {"sessionKey": session_key, "limit": limit})
+    if isinstance(result, dict):
+        result = result.get("messages", [])
+    return result or []
+
+
+async def send_message(channel: str, to: str, message: str) -> None:
+    await invoke_tool(
+        "message",
+        {"action": "send", "channel": channel, "to": to, "message": message},
+        timeout=30.0,
+    )
+
+
+async def health() -> bool:
+    resp = await _request("GET", "/health")
+    return resp.status_code == 200
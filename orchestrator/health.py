@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+import httpx
+from .config import (
+    MOSHI_URL,
+    MOLTBOT_GATEWAY_URL,
+    HEALTH_PROBE_INTERVAL_SECONDS,
+    HEALTH_PROBE_MAX_BACKOFF_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = httpx.Timeout(5.0, connect=2.0)
+
+# Last known state per backend: {"status": str, "checked_at": float | None, "failures": int}
+_state: dict[str, dict] = {
+    "moshi": {"status": "unknown", "checked_at": None, "failures": 0},
+    "moltbot": {"status": "unknown", "checked_at": None, "failures": 0},
+}
+
+_client: httpx.AsyncClient | None = None
+_tasks: list[asyncio.Task] = []
+
+
+def _describe_error(e: Exception) -> str:
+    if isinstance(e, httpx.ConnectError):
+        return "error: connection refused"
+    if isinstance(e, httpx.TimeoutException):
+        return "error: timeout"
+    return f"error: {type(e).__name__}"
+
+
+async def probe_moshi(client: httpx.AsyncClient) -> str:
+    """HEAD Moshi's index over a kept-alive connection; no page body, no new TLS handshake."""
+    try:
+        resp = await client.head(MOSHI_URL)
+    except Exception as e:
+        return _describe_error(e)
+    # Moshi serves its page once the model is loaded, 502/connection error before
+    if resp.status_code < 500:
+        return "ok"
+    return f"error: HTTP {resp.status_code}"
+
+
+async def probe_moltbot(client: httpx.AsyncClient) -> str:
+    try:
+        resp = await client.get(f"{MOLTBOT_GATEWAY_URL}/health")
+    except Exception as e:
+        return _describe_error(e)
+    if resp.status_code == 200:
+        return "ok"
+    return f"error: HTTP {resp.status_code}"
+
+
+PROBES = {"moshi": probe_moshi, "moltbot": probe_moltbot}
+
+
+def next_delay(failures: int) -> float:
+    """Probe interval: steady while healthy, doubling per failure up to the cap."""
+    if failures == 0:
+        return HEALTH_PROBE_INTERVAL_SECONDS
+    return min(HEALTH_PROBE_INTERVAL_SECONDS * 2 ** failures, HEALTH_PROBE_MAX_BACKOFF_SECONDS)
+
+
+def record(name: str, status: str) -> None:
+    entry = _state[name]
+    if status != entry["status"]:
+        logger.info("Backend %s: %s -> %s", name, entry["status"], status)
+    entry["status"] = status
+    entry["checked_at"] = time.monotonic()
+    entry["failures"] = 0 if status == "ok" else entry["failures"] + 1
+
+
+async def _probe_loop(name: str) -> None:
+    probe = PROBES[name]
+    while True:
+        try:
+            record(name, await probe(_client))
+        except Exception:
+            logger.exception("Health probe for %s crashed", name)
+            record(name, "error: probe crashed")
+        await asyncio.sleep(next_delay(_state[name]["failures"]))
+
+
+async def start() -> None:
+    """Start one background probe loop per backend, sharing a pooled client."""
+    global _client
+    # Moshi uses a self-signed certificate on the internal port
+    _client = httpx.AsyncClient(
+        verify=False,
+        timeout=PROBE_TIMEOUT,
+        limits=httpx.Limits(max_connections=len(PROBES), max_keepalive_connections=len(PROBES)),
+    )
+    _tasks.extend(asyncio.create_task(_probe_loop(name)) for name in PROBES)
+
+
+async def stop() -> None:
+    global _client
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def snapshot() -> tuple[dict[str, str], dict[str, float | None]]:
+    """Return cached (status, age in seconds) for each backend."""
+    now = time.monotonic()
+    checks = {name: entry["status"] for name, entry in _state.items()}
+    ages = {
+        name: None if entry["checked_at"] is None else round(now - entry["checked_at"], 1)
+        for name, entry in _state.items()
+    }
+    return checks, ages
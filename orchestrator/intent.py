@@ -0,0 +1,83 @@
+import re
+
+# Courtesy words that wrap a request without changing it
+_LEAD = r"(?:(?:hey|ok|okay|so|please|can you|could you|would you|will you|go ahead and|i want to|i'd like to|let me|let's) )*"
+_TRAIL = r"(?: (?:please|for me|now|right now|real quick|thanks))*"
+_VERB = (
+    r"(?:(?:show|check|list|display|get|give|tell|see|view|print|what's|what is|what are|how's|how is)"
+    r"(?: me)?(?: the| my| all| all the| our)? )?"
+)
+
+
+def _slot(n: int) -> str:
+    # re won't reuse a group name across alternatives, so number each slot
+    return rf"(?P<name{n}>[a-z0-9][a-z0-9._-]*)"
+
+
+# Slot values that are really part of a generic request, not a unit name
+_NOT_A_NAME = {
+    "the", "a", "my", "all", "it", "this", "that", "everything", "server", "system",
+    "docker", "container", "containers", "service", "services", "disk", "memory", "logs",
+}
+
+# (pattern, command template); a pattern must match the whole normalized
+# utterance, so anything with extra words falls through to the LLM.
+_RULES = [
+    (rf"{_VERB}(?:files|directory|directory contents|folder|folder contents)(?: here| in (?:the|this) (?:directory|folder))?|ls",
+     "ls -la"),
+    (rf"{_VERB}(?:disk|disk space|disk usage|free disk space|storage|storage usage)"
+     r"|how much (?:disk space|disk|storage)(?: is left| is free| is used| do i have| do we have)?|df",
+     "df -h"),
+    (rf"{_VERB}(?:memory|ram|free memory|memory usage|ram usage)"
+     r"|how much (?:memory|ram)(?: is left| is free| is used| do i have| do we have)?|free",
+     "free -h"),
+    (rf"{_VERB}(?:running )?(?:processes|process list)|what's running|what is running|ps",
+     "ps aux"),
+    (rf"{_VERB}(?:cpu|cpu usage|load|system load|top)|top",
+     "top -b -n 1"),
+    (rf"{_VERB}(?:(?:running |docker )*containers|docker ps)"
+     r"|what containers are running|which containers are running",
+     "docker ps"),
+    (rf"{_VERB}(?:docker images|images|docker image list)",
+     "docker images"),
+    (rf"{_VERB}(?:docker stats|container stats|container resource usage|docker resource usage)",
+     "docker stats --no-stream"),
+    (rf"{_VERB}(?:logs (?:for|of|from) (?:the )?{_slot(1)} container|{_slot(2)} container logs|docker logs {_slot(3)})",
+     "docker logs {name}"),
+    (rf"{_VERB}(?:status of (?:the )?{_slot(1)}(?: service)?|{_slot(2)} service status|systemctl status {_slot(3)})"
+     rf"|is (?:the )?{_slot(4)} service (?:running|up)",
+     "systemctl status {name}"),
+]
+
+# Matched case-insensitively against text that keeps its case, so slots
+# carry names (containers, units) exactly as they were said
+_COMPILED = [
+    (re.compile(rf"{_LEAD}(?:{pattern}){_TRAIL}", re.IGNORECASE), template) for pattern, template in _RULES
+]
+_STRIP = re.compile(r"[^A-Za-z0-9'._ -]+")
+
+
+def _normalize(transcript: str) -> str:
+    text = _STRIP.sub(" ", transcript)
+    return " ".join(text.split()).strip(".")
+
+
+def match_command(transcript: str) -> str | None:
+    """Map a common voice phrasing straight to a command, or None to ask the LLM.
+
+    Only whole-utterance matches count, and slots that look like filler words
+    are rejected, so a hit is unambiguous. Callers still run the result
+    through safety.validate_command.
+    """
+    text = _normalize(transcript)
+    for pattern, template in _COMPILED:
+        m = pattern.fullmatch(text)
+        if m is None:
+            continue
+        if "{name}" not in template:
+            return template
+        name = next(v for v in m.groupdict().values() if v is not None)
+        if name.lower() in _NOT_A_NAME:
+            return None
+        return template.format(name=name)
+    return None
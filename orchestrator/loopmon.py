@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from . import metrics
+from .config import (
+    LOOP_MONITOR_ENABLED,
+    LOOP_MONITOR_INTERVAL_SECONDS,
+    LOOP_BLOCK_THRESHOLD_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+LAG_SECONDS = metrics.histogram(
+    "orchestrator_event_loop_lag_seconds",
+    "How late the event loop woke a sleeping probe task.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+BLOCKED = metrics.counter(
+    "orchestrator_event_loop_blocked_total",
+    "Stalls where one callback held the event loop past the threshold.",
+)
+
+_task: asyncio.Task | None = None
+_watchdog: threading.Thread | None = None
+_stop_watchdog = threading.Event()
+# Monotonic time the probe task last ran; the watchdog compares against it
+_heartbeat = 0.0
+_stats = {"max_lag_seconds": 0.0, "blocked": 0, "last_blocked_stack": None}
+
+
+async def _probe(interval: float) -> None:
+    """Sleep for `interval` and record how late the loop was in waking us."""
+    global _heartbeat
+    loop = asyncio.get_running_loop()
+    while True:
+        _heartbeat = time.monotonic()
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        LAG_SECONDS.observe(lag)
+        _stats["max_lag_seconds"] = max(_stats["max_lag_seconds"], lag)
+
+
+def _watch(loop_thread_id: int, interval: float, threshold: float) -> None:
+    """Thread: when the heartbeat goes stale, log what the loop thread is running."""
+    reported = None
+    while not _stop_watchdog.wait(threshold / 2):
+        beat = _heartbeat
+        stalled = time.monotonic() - beat - interval
+        if stalled <= threshold or beat == reported:
+            continue
+        # One report per stall; the heartbeat moves once the loop is free again
+        reported = beat
+        frame = sys._current_frames().get(loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>"
+        BLOCKED.inc()
+        _stats["blocked"] += 1
+        _stats["last_blocked_stack"] = stack
+        logger.warning("Event loop blocked for %.3fs, currently in:\n%s", stalled, stack)
+
+
+async def start(
+    enabled: bool = LOOP_MONITOR_ENABLED,
+    interval: float = LOOP_MONITOR_INTERVAL_SECONDS,
+    threshold: float = LOOP_BLOCK_THRESHOLD_SECONDS,
+) -> None:
+    """Start the lag probe on the running loop and the stall watchdog thread."""
+    global _task, _watchdog, _heartbeat
+    if not enabled or _task is not None:
+        return
+    _heartbeat = time.monotonic()
+    _task = asyncio.create_task(_probe(interval))
+    _stop_watchdog.clear()
+    _watchdog = threading.Thread(
+        target=_watch,
+        args=(threading.get_ident(), interval, threshold),
+        name="loop-watchdog",
+        daemon=True,
+    )
+    _watchdog.start()
+
+
+async def stop() -> None:
+    global _task, _watchdog
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
+    _stop_watchdog.set()
+    _watchdog.join()
+    _watchdog = None
+
+
+def stats() -> dict:
+    return dict(_stats)
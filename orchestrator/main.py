@@ -1,14 +1,20 @@
 import asyncio
+import codecs
 import json
 import logging
 import time
 import ssl
-import re
+from collections import Counter
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from typing import Awaitable, Callable
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 import httpx
-from . import safety, llm, notify
+from . import safety, llm, intent, endpointing, expiry, loopmon, metrics, notify, pool, gateway, events, store, prompts, scheduler, tracing
+from . import results as result_cache
+from . import health as backend_health
+from .capture import BoundedCapture, read_into
 from .config import (
     PENDING_COMMAND_TTL_SECONDS,
     WHATSAPP_PHONE,
@@ -17,19 +23,114 @@ from .config import (
     NOTIFY_ON_COMPLETE,
     NOTIFY_ON_QUESTION,
     EXECUTION_TIMEOUT_MINUTES,
+    EXECUTE_CONCURRENCY,
 )
-from .execution import ExecutionState, ExecutionContext, _utcnow
+from .execution import ExecutionState, ExecutionContext, context_to_dict, context_from_dict
 
 logger = logging.getLogger(__name__)
 
+COMMANDS = metrics.counter(
+    "orchestrator_commands_total",
+    "Commands by outcome: blocked, pending (awaiting confirmation) or executed.",
+    ("outcome",),
+)
+MOLTBOT_SECONDS = metrics.histogram(
+    "orchestrator_moltbot_run_seconds",
+    "Moltbot run time: gateway agent call, or CLI subprocess spawn to exit.",
+    ("mode",),
+    buckets=(*metrics.LATENCY_BUCKETS, 120.0, 300.0, 900.0, 1800.0, 3600.0),
+)
+metrics.gauge(
+    "orchestrator_live_executions",
+    "Background executions running in this process.",
+    lambda: len(_executions),
+)
+metrics.gauge(
+    "orchestrator_pending_confirmations",
+    "Destructive commands awaiting a spoken confirmation.",
+    lambda: len(_pending),
+)
+metrics.gauge(
+    "orchestrator_llm_cache_entries",
+    "Extraction results held in the LLM cache.",
+    lambda: llm.cache_stats()["size"],
+)
+metrics.gauge(
+    "orchestrator_llm_cache_hits",
+    "Extractions answered from the LLM cache since startup.",
+    lambda: llm.cache_stats()["hits"],
+)
+metrics.gauge(
+    "orchestrator_llm_cache_misses",
+    "Extractions that had to call the LLM since startup.",
+    lambda: llm.cache_stats()["misses"],
+)
+PENDING_EXPIRED = metrics.counter(
+    "orchestrator_pending_expired_total",
+    "Destructive commands dropped unconfirmed at the end of their TTL.",
+)
+metrics.gauge(
+    "orchestrator_pending_expiry_heap_size",
+    "Entries in the pending-expiry heap, including superseded ones not yet compacted.",
+    lambda: _pending_expiry.stats()["heap_size"],
+)
+metrics.gauge(
+    "orchestrator_background_running",
+    "Background agent passes holding a scheduler slot.",
+    lambda: scheduler.stats()["running"],
+)
+metrics.gauge(
+    "orchestrator_background_queued",
+    "Background agent passes waiting for a scheduler slot.",
+    lambda: scheduler.stats()["queued"],
+)
+metrics.gauge(
+    "orchestrator_waiting_for_input_sessions",
+    "Executions paused on a question for the user.",
+    lambda: len(store.session_ids(ExecutionState.WAITING_FOR_INPUT.value)),
+)
+
 # Track service startup time for grace period
 _startup_time = time.time()
 STARTUP_GRACE_PERIOD_SECONDS = 300  # 5 minutes grace period for health checks
 
-# In-memory pending confirmations: {session_id: {"command": str, "expires": float}}
+# Pending confirmations: {session_id: {"command": str, "expires": float}}.
+# Mirrored to the execution store so they survive a restart.
 _pending: dict[str, dict] = {}
 _pending_lock = asyncio.Lock()
 
+
+def _expire_pending(session_id: str) -> None:
+    # Runs as a loop callback, so no coroutine is mid-update under the lock
+    _pending.pop(session_id, None)
+    store.delete_pending(session_id)
+    PENDING_EXPIRED.inc()
+    logger.info("Pending command for %s expired", session_id)
+
+
+# Drops each pending confirmation at its deadline; process_voice_input still
+# re-checks expiry in case the timer hasn't fired yet.
+_pending_expiry = expiry.ExpiryHeap(_expire_pending)
+
+
+def _set_pending(session_id: str, command: str) -> None:
+    """Record a command awaiting confirmation; call with _pending_lock held."""
+    _restore_pending(session_id, {"command": command, "expires": time.time() + PENDING_COMMAND_TTL_SECONDS})
+    store.save_pending(session_id, _pending[session_id])
+
+
+def _restore_pending(session_id: str, entry: dict) -> None:
+    _pending[session_id] = entry
+    _pending_expiry.schedule(session_id, entry["expires"])
+
+
+def _pop_pending(session_id: str) -> dict:
+    """Remove and return a pending entry; call with _pending_lock held."""
+    _pending_expiry.discard(session_id)
+    store.delete_pending(session_id)
+    return _pending.pop(session_id)
+
+
 CONFIRMATION_KEYWORDS = {"confirm", "yes", "go", "execute", "proceed", "ok", "yep"}
 
 MAX_RESULT_SIZE = 100_000
@@ -51,19 +152,6 @@ class ExecutePayload(BaseModel):
     session_id: str | None = None
 
 
-async def cleanup_expired_pending():
-    """Periodically clean up expired pending commands."""
-    while True:
-        await asyncio.sleep(60)
-        now = time.time()
-        async with _pending_lock:
-            expired = [k for k, v in _pending.items() if now > v["expires"]]
-            for k in expired:
-                del _pending[k]
-            if expired:
-                logger.info("Cleaned %d expired pending commands", len(expired))
-
-
 async def setup_error_monitor_cron():
     """Configure Moltbot cron job for terminal error monitoring."""
     try:
@@ -95,18 +183,29 @@ Only report NEW issues not already in today's memory log."""
 async def lifespan(app: FastAPI):
     """Manage app startup and shutdown."""
     # Startup
-    cleanup_task = asyncio.create_task(cleanup_expired_pending())
+    await store.start()
+    _recover_executions()
+    for session_id, entry in store.load_pending().items():
+        _restore_pending(session_id, entry)
+    await loopmon.start()
+    tracing.start()
+    await backend_health.start()
+    await notify.start()
+    await pool.start()
     await setup_error_monitor_cron()
     yield
     # Shutdown
-    cleanup_task.cancel()
-    try:
-        await cleanup_task
-    except asyncio.CancelledError:
-        pass
+    await backend_health.stop()
+    await notify.stop()
+    await pool.stop()
+    await gateway.close()
+    await store.stop()
+    await loopmon.stop()
+    tracing.stop()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(tracing.TraceMiddleware)
 
 
 @app.get("/health")
@@ -114,47 +213,27 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics; nginx keeps this off the public port."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/health/deep")
 async def health_deep():
-    """Deep health check - verifies all backend services are responding.
-    
+    """Deep health check - reports backend state from the background prober.
+
+    Answers from cache without touching the backends; check_age_seconds shows
+    how old each result is.
+
     During startup grace period (first 5 min), returns 200 even if services
     are still loading, to avoid premature container termination.
     """
-    checks = {"orchestrator": "ok", "moshi": "unknown", "moltbot": "unknown"}
+    backend_checks, ages = backend_health.snapshot()
+    checks = {"orchestrator": "ok", **backend_checks}
     uptime = time.time() - _startup_time
     in_grace_period = uptime < STARTUP_GRACE_PERIOD_SECONDS
 
-    async with httpx.AsyncClient(verify=False, timeout=10.0) as client:
-        # Check moshi server on internal port 8999 (self-signed SSL)
-        try:
-            resp = await client.get("https://127.0.0.1:8999/")
-            # Moshi returns HTML page when ready, 502/connection error when not
-            if resp.status_code < 500:
-                checks["moshi"] = "ok"
-            else:
-                checks["moshi"] = f"error: HTTP {resp.status_code}"
-        except httpx.ConnectError:
-            checks["moshi"] = "error: connection refused"
-        except httpx.TimeoutException:
-            checks["moshi"] = "error: timeout"
-        except Exception as e:
-            checks["moshi"] = f"error: {type(e).__name__}"
-
-        # Check Moltbot gateway on internal port 18789
-        try:
-            resp = await client.get("http://127.0.0.1:18789/health")
-            if resp.status_code == 200:
-                checks["moltbot"] = "ok"
-            else:
-                checks["moltbot"] = f"error: HTTP {resp.status_code}"
-        except httpx.ConnectError:
-            checks["moltbot"] = "error: connection refused"
-        except httpx.TimeoutException:
-            checks["moltbot"] = "error: timeout"
-        except Exception as e:
-            checks["moltbot"] = f"error: {type(e).__name__}"
-
     all_ok = all(v == "ok" for v in checks.values())
     # Moshi is critical; moltbot is optional for basic functionality
     moshi_ok = checks["moshi"] == "ok"
@@ -188,6 +267,7 @@ async def health_deep():
         content={
             "status": status,
             "checks": checks,
+            "check_age_seconds": ages,
             "uptime_seconds": int(uptime),
             "grace_period": in_grace_period,
         },
@@ -202,77 +282,96 @@ async def process_voice_input(payload: VoicePayload):
 
     # Check for pending confirmation
     if session_id:
-        async with _pending_lock:
-            if session_id in _pending:
-                entry = _pending[session_id]
-                if time.time() > entry["expires"]:
-                    del _pending[session_id]
-                elif is_confirmation(transcript):
-                    cmd = _pending.pop(session_id)["command"]
-                    result = await run_moltbot(cmd)
-                    logger.info("Confirmed and executed: %s", cmd)
-                    return {"response": result}
-
-    # Extract command (Moltbot manages its own memory/context)
-    intent = await llm.extract_command(transcript, [])
-    if not intent.get("command"):
+        confirmed = None
+        with tracing.span("confirmation_lookup"):
+            async with _pending_lock:
+                if session_id in _pending:
+                    entry = _pending[session_id]
+                    if time.time() > entry["expires"]:
+                        _pop_pending(session_id)
+                    elif is_confirmation(transcript):
+                        confirmed = _pop_pending(session_id)["command"]
+        if confirmed:
+            COMMANDS.inc(outcome="executed")
+            with tracing.span("run_moltbot", command=confirmed, confirmed=True):
+                result = await run_moltbot(confirmed)
+            logger.info("Confirmed and executed: %s", confirmed)
+            return {"response": result}
+
+    # Known phrasings resolve locally; anything else goes to the LLM
+    # (Moltbot manages its own memory/context)
+    with tracing.span("intent.match_command"):
+        command = intent.match_command(transcript)
+    if command is None:
+        with tracing.span("llm.extract_command"):
+            command = (await llm.extract_command(transcript, [])).get("command")
+    if not command:
         return {"response": "I didn't detect a server command in that request."}
 
-    check = safety.validate_command(intent["command"])
+    with tracing.span("safety.validate_command"):
+        check = safety.validate_command(command)
     if not check["allowed"]:
+        COMMANDS.inc(outcome="blocked")
         return {"response": f"Blocked: {check['reason']}"}
     if check["needs_confirmation"]:
+        COMMANDS.inc(outcome="pending")
         if session_id:
             async with _pending_lock:
-                _pending[session_id] = {
-                    "command": intent["command"],
-                    "expires": time.time() + PENDING_COMMAND_TTL_SECONDS,
-                }
+                _set_pending(session_id, command)
         return {
-            "response": f"This will run: {intent['command']}. Say 'confirm' to proceed.",
-            "pending_command": intent["command"],
+            "response": f"This will run: {command}. Say 'confirm' to proceed.",
+            "pending_command": command,
         }
 
-    logger.info("Executing: %s", intent["command"])
-    result = await run_moltbot(intent["command"])
+    logger.info("Executing: %s", command)
+    COMMANDS.inc(outcome="executed")
+    with tracing.span("run_moltbot", command=command):
+        result = await run_read_only(command)
     return {"response": result}
 
 
 @app.post("/execute")
 async def execute_conversation(payload: ExecutePayload):
-    """Extract and execute multiple commands from conversation transcript."""
+    """Extract and execute multiple commands from conversation transcript.
+
+    Extraction is streamed: each command is validated as soon as the model
+    has written it, and read-only ones start running while the rest of the
+    reply is still arriving.
+    """
     transcript_list = payload.transcript
     session_id = payload.session_id
 
-    # Extract commands from conversation (Moltbot has its own memory)
-    commands_response = await llm.extract_commands_from_conversation(transcript_list, [])
-    commands = commands_response.get("commands", [])
+    results: list[dict] = []
+    running: list[asyncio.Task] = []
+    pending: list[str] = []
 
-    if not commands:
-        return {"results": []}
+    # Allowed commands without confirmation are read-only, so they can run
+    # concurrently; results stay in extraction order.
+    limit = asyncio.Semaphore(EXECUTE_CONCURRENCY)
 
-    results = []
+    async def execute(result: dict, cmd: str) -> None:
+        async with limit:
+            logger.info("Executing: %s", cmd)
+            with tracing.span("run_moltbot", command=cmd):
+                result["output"] = await run_read_only(cmd)
 
-    # Process each command
-    for cmd in commands:
-        # Validate command
-        check = safety.validate_command(cmd)
+    def accept(cmd: str) -> None:
+        with tracing.span("safety.validate_command", command=cmd):
+            check = safety.validate_command(cmd)
         if not check["allowed"]:
+            COMMANDS.inc(outcome="blocked")
             results.append({
                 "command": cmd,
                 "status": "blocked",
                 "reason": check["reason"]
             })
-            continue
+            return
 
         # Handle destructive commands that need confirmation
         if check["needs_confirmation"]:
+            COMMANDS.inc(outcome="pending")
             if session_id:
-                async with _pending_lock:
-                    _pending[session_id] = {
-                        "command": cmd,
-                        "expires": time.time() + PENDING_COMMAND_TTL_SECONDS,
-                    }
+                pending.append(cmd)
                 results.append({
                     "command": cmd,
                     "status": "pending_confirmation",
@@ -284,16 +383,45 @@ async def execute_conversation(payload: ExecutePayload):
                     "status": "needs_confirmation",
                     "reason": check["reason"]
                 })
-            continue
+            return
+
+        COMMANDS.inc(outcome="executed")
+        result = {"command": cmd, "status": "executed"}
+        results.append(result)
+        running.append(asyncio.create_task(execute(result, cmd)))
+
+    streamed_commands: list[str] = []
+
+    def stream_command(cmd: str) -> None:
+        streamed_commands.append(cmd)
+        accept(cmd)
+
+    # Extract commands from conversation (Moltbot has its own memory)
+    try:
+        with tracing.span("llm.extract_commands"):
+            commands_response = await llm.extract_commands_from_conversation(
+                transcript_list, [], on_command=stream_command
+            )
+        # Anything the stream didn't surface (an unstreamed result, or an
+        # element the incremental parser skipped), matched by value so a
+        # skipped element can't shift later ones
+        streamed = Counter(streamed_commands)
+        for cmd in commands_response.get("commands", []):
+            if streamed[cmd]:
+                streamed[cmd] -= 1
+            else:
+                accept(cmd)
+    except BaseException:
+        for task in running:
+            task.cancel()
+        raise
 
-        # Execute safe command
-        logger.info("Executing: %s", cmd)
-        result = await run_moltbot(cmd)
-        results.append({
-            "command": cmd,
-            "status": "executed",
-            "output": result
-        })
+    if pending:
+        async with _pending_lock:
+            for cmd in pending:
+                _set_pending(session_id, cmd)
+
+    await asyncio.gather(*running)
 
     return {"results": results}
 
@@ -305,13 +433,7 @@ async def get_moltbot_sessions():
     Uses moltbot sessions_list tool.
     """
     try:
-        proc = await asyncio.create_subprocess_exec(
-            "moltbot", "sessions", "list", "--json",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10.0)
-        sessions = json.loads(stdout.decode())
+        sessions = await gateway.sessions_list()
         return {"sessions": sessions}
     except Exception as e:
         logger.exception("Failed to get Moltbot sessions")
@@ -325,14 +447,7 @@ async def get_session_history(session_key: str, limit: int = 50):
     PersonaPlex frontend can use this for context building.
     """
     try:
-        proc = await asyncio.create_subprocess_exec(
-            "moltbot", "sessions", "history", session_key,
-            "--limit", str(limit), "--json",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10.0)
-        history = json.loads(stdout.decode())
+        history = await gateway.sessions_history(session_key, limit)
         return {"session_key": session_key, "history": history}
     except Exception as e:
         logger.exception("Failed to get session history for %s", session_key)
@@ -346,43 +461,29 @@ async def get_personaplex_prompt(session_id: str | None = None):
     The PersonaPlex frontend calls this before starting a conversation.
 
     Returns prompt formatted for PersonaPlex's casual conversation style.
+    Prompts are kept up to date as executions change, so this normally
+    answers from memory; a miss rebuilds from the execution or Moltbot history.
     """
-    base_prompt = "You enjoy having a good conversation."
-
     if not session_id:
         # No active session - general VPS admin context
-        return {
-            "text_prompt": f"{base_prompt} You are Kent's VPS admin assistant. Help with server tasks via natural voice conversation.",
-            "voice_prompt": PERSONAPLEX_VOICE,
-        }
+        return prompts.default_prompt()
 
-    # Fetch session context from Moltbot
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            "moltbot", "sessions", "history", session_id,
-            "--limit", "10", "--json",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10.0)
-        history = json.loads(stdout.decode())
+    cached = prompts.get(session_id)
+    if cached is not None:
+        return cached
 
-        # Build context summary from recent history
-        if history:
-            recent_context = history[-1].get("content", "")[:500]  # Last message
-            task_summary = f"The current task context: {recent_context}"
-        else:
-            task_summary = "No specific task in progress."
+    entry = _executions.get(session_id) or _stored_entry(session_id)
+    if entry:
+        return prompts.update(entry["ctx"])
 
-        return {
-            "text_prompt": f"{base_prompt} You are Kent's VPS admin assistant. {task_summary}",
-            "voice_prompt": PERSONAPLEX_VOICE,
-            "session_id": session_id,
-        }
+    # Fetch session context from Moltbot
+    try:
+        history = await gateway.sessions_history(session_id, 10)
+        return prompts.update_from_history(session_id, history)
     except Exception as e:
         logger.exception("Failed to build PersonaPlex prompt for session %s", session_id)
         return {
-            "text_prompt": f"{base_prompt} You are Kent's VPS admin assistant.",
+            "text_prompt": prompts.BASE_PROMPT,
             "voice_prompt": PERSONAPLEX_VOICE,
             "error": str(e),
         }
@@ -413,188 +514,419 @@ Listen for Kent's answer, then confirm you understood. Keep the conversation foc
     }
 
 
+def _truncate(text: str) -> str:
+    if len(text) > MAX_RESULT_SIZE:
+        return text[:MAX_RESULT_SIZE] + f"\n... (truncated, total {len(text)} bytes)"
+    return text
+
+
 async def run_moltbot(cmd: str) -> str:
+    """Run a single command through the Moltbot gateway, falling back to the CLI."""
     try:
-        proc = await asyncio.create_subprocess_exec(
-            "moltbot", "agent", "--message", cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30.0)
+        with MOLTBOT_SECONDS.time(mode="gateway"), tracing.span("gateway.agent"):
+            reply = await gateway.agent(cmd, timeout=30.0)
+        return _truncate(reply)
+    except gateway.GatewayUnavailable:
+        logger.warning("Moltbot gateway unreachable, falling back to CLI")
+    except gateway.GatewayError as e:
+        return _truncate(f"Command failed: {e}")
+    except httpx.TimeoutException:
+        return "Command execution timed out after 30s."
+    return await _run_moltbot_cli(cmd)
+
+
+# Prefixes of the messages run_moltbot returns instead of command output
+_FAILURE_PREFIXES = (
+    "Command failed:",
+    "Command execution timed out",
+    "Moltbot service is unavailable",
+    "Moltbot is busy",
+    "Execution error:",
+)
+
+
+def run_read_only(cmd: str) -> Awaitable[str]:
+    """run_moltbot for a command validate_command allowed without confirmation.
+
+    Identical concurrent requests share one run, and successful output is
+    reused for the command's cache_ttl. Confirmed destructive commands must
+    call run_moltbot directly.
+    """
+    key = " ".join(cmd.split())
+    return result_cache.run(
+        key,
+        safety.cache_ttl(key),
+        lambda: run_moltbot(cmd),
+        cacheable=lambda output: not output.startswith(_FAILURE_PREFIXES),
+    )
+
+
+async def _run_moltbot_cli(cmd: str) -> str:
+    try:
+        async with pool.acquire() as worker:
+            tracing.event("pool.acquired")
+            with MOLTBOT_SECONDS.time(mode="cli"), tracing.span("moltbot.cli"):
+                with tracing.span("moltbot.spawn"):
+                    proc = await worker.spawn(
+                        "agent", "--message", cmd,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                    )
+                # Reap the process group before the worker goes back to the pool
+                try:
+                    stdout, stderr = await asyncio.wait_for(_capture_output(proc), timeout=30.0)
+                except asyncio.TimeoutError:
+                    await pool.terminate(proc)
+                    return "Command execution timed out after 30s."
+                except asyncio.CancelledError:
+                    if proc.returncode is None:
+                        await pool.terminate(proc)
+                    raise
         if proc.returncode != 0:
-            error_msg = stderr.decode(errors='replace')
-            if len(error_msg) > MAX_RESULT_SIZE:
-                error_msg = error_msg[:MAX_RESULT_SIZE] + f"\n... (truncated, total {len(error_msg)} bytes)"
-            return f"Command failed: {error_msg}"
-        result = stdout.decode(errors="replace")
-        if len(result) > MAX_RESULT_SIZE:
-            result = result[:MAX_RESULT_SIZE] + f"\n... (truncated, total {len(result)} bytes)"
-        return result
+            return f"Command failed: {stderr.text()}"
+        return stdout.text()
     except FileNotFoundError:
         return "Moltbot service is unavailable."
-    except asyncio.TimeoutError:
-        proc.kill()
-        return "Command execution timed out after 30s."
+    except pool.PoolExhausted:
+        return "Moltbot is busy with other commands. Please try again shortly."
     except Exception as e:
         logger.exception("Moltbot execution error")
         return f"Execution error: {e}"
 
 
+async def _capture_output(proc: asyncio.subprocess.Process) -> tuple[BoundedCapture, BoundedCapture]:
+    """Read stdout and stderr under the MAX_RESULT_SIZE cap, then wait for exit."""
+    stdout = BoundedCapture(MAX_RESULT_SIZE)
+    stderr = BoundedCapture(MAX_RESULT_SIZE)
+    await asyncio.gather(
+        read_into(proc.stdout, stdout, on_first=lambda: tracing.event("moltbot.first_byte")),
+        read_into(proc.stderr, stderr),
+    )
+    await proc.wait()
+    tracing.event("moltbot.exit", returncode=proc.returncode)
+    return stdout, stderr
+
+
 # --- Two-Way Communication: Background execution support ---
 
 
 class BackgroundExecutePayload(BaseModel):
     transcript: str
     commands: list[str] | None = None  # Make optional
+    priority: int = Field(0, ge=0, le=9)  # higher leaves the queue first
 
 
 class ResumePayload(BaseModel):
     answer: str
 
 
-# In-memory execution registry: session_id -> {"ctx": ExecutionContext, "event": asyncio.Event}
+# Executions running in this process:
+# session_id -> {"ctx": ExecutionContext, "event": asyncio.Event, "events": events.EventLog, "task": asyncio.Task}
+# Every change is also written to the execution store, which serves finished
+# runs and runs from before a restart.
 _executions: dict[str, dict] = {}
 
+TERMINAL_STATES = {ExecutionState.COMPLETED, ExecutionState.FAILED, ExecutionState.CANCELLED}
+
+
+def _publish(ctx: ExecutionContext, kind: str, **data) -> None:
+    """Stamp ctx as updated, persist it, refresh its PersonaPlex prompt and
+    push the change to event stream subscribers."""
+    ctx.touch()
+    snapshot = context_to_dict(ctx)
+    store.save(snapshot)
+    prompts.update(ctx)
+    entry = _executions.get(ctx.session_id)
+    if not entry:
+        return
+    log = entry["events"]
+    log.publish(kind, {"state": snapshot["state"], "updated_at": snapshot["updated_at"], **data})
+    if ctx.state in TERMINAL_STATES:
+        log.close()
+
 
-async def run_moltbot_long(instruction: str, session_id: str) -> str:
-    """Run Moltbot with a multi-command instruction. Longer timeout than single commands."""
+# Tail of the running agent's stdout kept on the context for /context
+PARTIAL_OUTPUT_LIMIT = 4_000
+STREAM_CHUNK_SIZE = 4096
+
+
+async def run_moltbot_long(
+    instruction: str,
+    session_id: str,
+    on_output: Callable[[str], None] | None = None,
+    on_question: Callable[[dict], Awaitable[None]] | None = None,
+) -> str:
+    """Run Moltbot with a multi-command instruction. Longer timeout than single commands.
+
+    stdout is read as it is produced. Each decoded chunk goes to `on_output`,
+    and `on_question` fires as soon as a complete NEED_INPUT block has
+    streamed past, without waiting for the agent to exit.
+    """
     try:
-        proc = await asyncio.create_subprocess_exec(
-            "moltbot", "agent", "--message", instruction,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await asyncio.wait_for(
-            proc.communicate(),
-            timeout=EXECUTION_TIMEOUT_MINUTES * 60,
-        )
+        async with pool.acquire_background() as worker:
+            tracing.event("pool.acquired")
+            with MOLTBOT_SECONDS.time(mode="background"), tracing.span("moltbot.run"):
+                with tracing.span("moltbot.spawn"):
+                    proc = await worker.spawn(
+                        "agent", "--message", instruction,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                    )
+                # Reap the process group before the worker goes back to the pool
+                try:
+                    stdout, stderr = await asyncio.wait_for(
+                        _stream_output(proc, on_output, on_question),
+                        timeout=EXECUTION_TIMEOUT_MINUTES * 60,
+                    )
+                except asyncio.TimeoutError:
+                    await pool.terminate(proc)
+                    raise RuntimeError(f"Moltbot timed out after {EXECUTION_TIMEOUT_MINUTES}min")
+                except asyncio.CancelledError:
+                    # DELETE /execute/{session_id}; take the agent's children down too
+                    if proc.returncode is None:
+                        await pool.terminate(proc)
+                    raise
         if proc.returncode != 0:
-            raise RuntimeError(f"Moltbot exited {proc.returncode}: {stderr.decode(errors='replace')}")
-        return stdout.decode(errors="replace")
+            raise RuntimeError(f"Moltbot exited {proc.returncode}: {stderr}")
+        return stdout
     except FileNotFoundError:
         raise RuntimeError("Moltbot service is unavailable")
-    except asyncio.TimeoutError:
-        proc.kill()
-        raise RuntimeError(f"Moltbot timed out after {EXECUTION_TIMEOUT_MINUTES}min")
 
 
-async def _run_execution(ctx: ExecutionContext) -> None:
-    """Background task: run Moltbot, detect NEED_INPUT, handle pause/resume."""
+async def _stream_output(
+    proc: asyncio.subprocess.Process,
+    on_output: Callable[[str], None] | None,
+    on_question: Callable[[dict], Awaitable[None]] | None,
+) -> tuple[str, str]:
+    """Read stdout incrementally until exit; returns capped (stdout, stderr) text."""
+    stdout = BoundedCapture(MAX_RESULT_SIZE)
+    stderr = BoundedCapture(MAX_RESULT_SIZE)
+    # Drain stderr concurrently so a chatty agent can't block on a full pipe
+    stderr_task = asyncio.create_task(read_into(proc.stderr, stderr))
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    scanner = llm.NeedInputScanner()
+    asked = False
     try:
-        ctx.state = ExecutionState.RUNNING
-        ctx.updated_at = _utcnow()
+        while True:
+            data = await proc.stdout.read(STREAM_CHUNK_SIZE)
+            if data and not stdout.total:
+                tracing.event("moltbot.first_byte")
+            stdout.feed(data)
+            text = decoder.decode(data, final=not data)
+            if text:
+                if on_output:
+                    on_output(text)
+                if on_question and not asked:
+                    parsed = scanner.feed(text)
+                    if parsed:
+                        asked = True
+                        await on_question(parsed)
+            if not data:
+                break
+        await stderr_task
+        await proc.wait()
+        tracing.event("moltbot.exit", returncode=proc.returncode)
+        return stdout.text(), stderr.text()
+    finally:
+        stderr_task.cancel()
+
+
+def _append_partial_output(ctx: ExecutionContext, text: str) -> None:
+    ctx.partial_output = (ctx.partial_output + text)[-PARTIAL_OUTPUT_LIMIT:]
 
-        # Moltbot has its own memory system - no need to inject context
-        instruction = llm.generate_moltbot_instruction(
-            ctx.commands, ctx.answers, ctx.session_id, injected_context=""
+
+async def _ask_user(ctx: ExecutionContext, parsed: dict) -> None:
+    """Pause: store question, notify user."""
+    ctx.state = ExecutionState.WAITING_FOR_INPUT
+    ctx.set_question(parsed["question"], parsed.get("context"))
+    tracing.event("question")
+    _publish(ctx, "question", question=ctx.current_question, context=ctx.question_context)
+
+    if NOTIFY_ON_QUESTION and WHATSAPP_PHONE and parsed["question"].strip():
+        await notify.send_question_notification(
+            WHATSAPP_PHONE, parsed["question"],
+            parsed.get("context", ""), PERSONAPLEX_URL, ctx.session_id
         )
-        output = await run_moltbot_long(instruction, ctx.session_id)
-        parsed = llm.parse_moltbot_output(output)
+
+
+async def _run_agent(ctx: ExecutionContext) -> dict:
+    """Run one Moltbot pass for ctx, surfacing any question while it streams."""
+    ctx.partial_output = ""
+    asked = {}
+
+    async def on_question(parsed: dict) -> None:
+        asked.update(parsed)
+        await _ask_user(ctx, parsed)
+
+    # Moltbot has its own memory system - no need to inject context
+    instruction = llm.generate_moltbot_instruction(
+        ctx.commands, ctx.answers, ctx.session_id, injected_context=""
+    )
+    output = await run_moltbot_long(
+        instruction,
+        ctx.session_id,
+        on_output=lambda text: _append_partial_output(ctx, text),
+        on_question=on_question,
+    )
+    # The captured output is capped, so a question in a very long run may
+    # sit in the dropped middle; the streaming scan saw it regardless
+    return asked or llm.parse_moltbot_output(output)
+
+
+# Answered executions skip ahead of new ones; the user is already waiting
+RESUME_PRIORITY = 10
+
+
+async def _agent_pass(ctx: ExecutionContext, ticket: asyncio.Future) -> dict:
+    """Run one agent pass once the scheduler grants `ticket` a slot."""
+    if not ticket.done():
+        ctx.state = ExecutionState.QUEUED
+        _publish(ctx, "state")
+    async with scheduler.run(ticket):
+        ctx.state = ExecutionState.RUNNING
+        _publish(ctx, "state")
+        return await _run_agent(ctx)
+
+
+async def _run_execution(ctx: ExecutionContext, ticket: asyncio.Future | None = None) -> None:
+    """Background task: run Moltbot, detect NEED_INPUT, handle pause/resume.
+
+    `ticket` is the scheduler reservation made when the run was accepted.
+    """
+    try:
+        parsed = await _agent_pass(ctx, ticket or scheduler.reserve())
 
         while parsed["status"] == "needs_input":
-            # Pause: store question, notify user, wait for resume
-            ctx.state = ExecutionState.WAITING_FOR_INPUT
-            ctx.current_question = parsed["question"]
-            ctx.question_context = parsed.get("context")
-            ctx.updated_at = _utcnow()
-
-            if NOTIFY_ON_QUESTION and WHATSAPP_PHONE and parsed["question"].strip():
-                notify.send_question_notification(
-                    WHATSAPP_PHONE, parsed["question"],
-                    parsed.get("context", ""), PERSONAPLEX_URL, ctx.session_id
-                )
+            # Usually already surfaced mid-stream; otherwise pause now
+            if ctx.state != ExecutionState.WAITING_FOR_INPUT:
+                await _ask_user(ctx, parsed)
 
             # Block until POST /resume sets the event
             # Note: clear() AFTER wait() to avoid race condition where resume
             # happens between clear() and wait(), causing indefinite blocking
             event = _executions[ctx.session_id]["event"]
-            await asyncio.wait_for(event.wait(), timeout=EXECUTION_TIMEOUT_MINUTES * 60)
+            with tracing.span("wait_for_answer"):
+                await asyncio.wait_for(event.wait(), timeout=EXECUTION_TIMEOUT_MINUTES * 60)
             event.clear()  # Clear after consuming signal, ready for next cycle
 
             # Resume with the answer
-            ctx.state = ExecutionState.RUNNING
-            ctx.current_question = None
-            ctx.updated_at = _utcnow()
-
-            instruction = llm.generate_moltbot_instruction(
-                ctx.commands, ctx.answers, ctx.session_id, injected_context=""
-            )
-            output = await run_moltbot_long(instruction, ctx.session_id)
-            parsed = llm.parse_moltbot_output(output)
+            ctx.set_question(None)
+            parsed = await _agent_pass(ctx, scheduler.reserve(RESUME_PRIORITY))
 
         # Completed
         ctx.state = ExecutionState.COMPLETED
-        ctx.results.append({"output": parsed["output"]})
-        ctx.updated_at = _utcnow()
+        ctx.add_result(parsed["output"])
+        _publish(ctx, "result", output=parsed["output"])
 
         if NOTIFY_ON_COMPLETE and WHATSAPP_PHONE:
-            notify.send_completion_notification(
+            await notify.send_completion_notification(
                 WHATSAPP_PHONE, parsed["output"],
                 PERSONAPLEX_URL, ctx.session_id
             )
 
     except asyncio.TimeoutError:
         ctx.state = ExecutionState.FAILED
-        ctx.error_message = f"Timed out waiting for user input ({EXECUTION_TIMEOUT_MINUTES}min)"
-        ctx.updated_at = _utcnow()
+        ctx.set_error(f"Timed out waiting for user input ({EXECUTION_TIMEOUT_MINUTES}min)")
+        _publish(ctx, "error", error_message=ctx.error_message)
     except Exception as e:
         ctx.state = ExecutionState.FAILED
-        ctx.error_message = str(e)
-        ctx.updated_at = _utcnow()
+        ctx.set_error(str(e))
+        _publish(ctx, "error", error_message=ctx.error_message)
         logger.exception("Execution %s failed", ctx.session_id)
+    except asyncio.CancelledError:
+        ctx.state = ExecutionState.CANCELLED
+        ctx.set_error("Cancelled by request")
+        _publish(ctx, "error", error_message=ctx.error_message)
+        raise
     finally:
-        # Keep in registry for 5min after completion for polling
-        await asyncio.sleep(300)
+        # The store keeps serving /context for EXECUTION_RETENTION_SECONDS
         _executions.pop(ctx.session_id, None)
 
 
-# Command safety validation patterns
-DANGEROUS_PATTERNS = [
-    r'rm\s+-rf',
-    r'dd\s+if=',
-    r'mkfs\.',
-    r'chmod\s+777',
-    r'>\s*/dev/sda',
-]
+async def _run_traced_execution(ctx: ExecutionContext, ticket: asyncio.Future, trace_id: str | None) -> None:
+    """_run_execution under its own trace, sharing the starting request's trace ID."""
+    _executions[ctx.session_id]["started"] = True
+    with tracing.traced("execution", trace_id, session_id=ctx.session_id) as trace:
+        try:
+            await _run_execution(ctx, ticket)
+        finally:
+            if trace:
+                trace.attrs["state"] = ctx.state.value
 
 
-def validate_command_safety(command: str) -> tuple[bool, str | None]:
-    """Returns (is_safe, reason_if_unsafe)"""
-    for pattern in DANGEROUS_PATTERNS:
-        if re.search(pattern, command, re.IGNORECASE):
-            return False, f"Command matches dangerous pattern: {pattern}"
-    return True, None
+def _start_execution(ctx: ExecutionContext, ticket: asyncio.Future) -> None:
+    entry = {"ctx": ctx, "event": asyncio.Event(), "events": events.EventLog(), "started": False}
+    _executions[ctx.session_id] = entry
+    task = asyncio.create_task(_run_traced_execution(ctx, ticket, tracing.current_id()))
+    task.add_done_callback(lambda _: _execution_done(entry, ticket))
+    entry["task"] = task
 
 
-@app.post("/execute/background")
-async def start_background_execution(payload: BackgroundExecutePayload):
-    """Start a background execution with human-in-the-loop support."""
-    # Extract commands if not provided
-    if not payload.commands:
-        try:
-            response = await asyncio.wait_for(
-                llm.extract_commands_from_conversation(
-                    [payload.transcript], []
-                ),
-                timeout=10.0  # 10 second timeout for LLM
-            )
-            commands = response.get("commands", [])
-
-            # Fail fast if no commands extracted
-            if not commands:
-                raise HTTPException(
-                    status_code=422,
-                    detail="No commands extracted from transcript. "
-                           "Please provide explicit commands or clarify your request."
-                )
-        except asyncio.TimeoutError:
-            raise HTTPException(
-                status_code=504,
-                detail="Command extraction timed out. Please try again."
-            )
-    else:
-        commands = payload.commands
+def _execution_done(entry: dict, ticket: asyncio.Future) -> None:
+    """Clean up after a task cancelled before _run_execution got to run.
+
+    Its try/finally never ran, so the scheduler reservation, the registry
+    entry and the state are all still as they were at accept time.
+    """
+    if entry["started"]:
+        return
+    ctx = entry["ctx"]
+    scheduler.discard(ticket)
+    if ctx.state not in TERMINAL_STATES:
+        ctx.state = ExecutionState.CANCELLED
+        ctx.set_error("Cancelled by request")
+        _publish(ctx, "error", error_message=ctx.error_message)
+    _executions.pop(ctx.session_id, None)
+
+
+def _recover_executions() -> None:
+    """Fail runs whose agent died with the previous process.
+
+    Runs waiting for input need no agent, so they stay resumable.
+    """
+    unfinished = (ExecutionState.PENDING, ExecutionState.QUEUED, ExecutionState.RUNNING)
+    for session_id in store.session_ids(*(state.value for state in unfinished)):
+        ctx = context_from_dict(store.load(session_id))
+        ctx.state = ExecutionState.FAILED
+        ctx.set_error("Interrupted by an orchestrator restart")
+        ctx.touch()
+        store.save(context_to_dict(ctx))
+        logger.warning("Marked execution %s failed after restart", session_id)
+
 
+def _stored_entry(session_id: str) -> dict | None:
+    """Registry-shaped entry for a run that isn't live in this process."""
+    data = store.load(session_id)
+    if data is None:
+        return None
+    log = events.EventLog()
+    log.close()
+    return {"ctx": context_from_dict(data), "event": None, "events": log}
+
+
+async def _extract_background_commands(extraction: Awaitable[dict]) -> list[str]:
+    """Await command extraction for a background run; no commands is a 422."""
+    try:
+        response = await asyncio.wait_for(extraction, timeout=10.0)  # 10 second timeout for LLM
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="Command extraction timed out. Please try again."
+        )
+    commands = response.get("commands", [])
+
+    # Fail fast if no commands extracted
+    if not commands:
+        raise HTTPException(
+            status_code=422,
+            detail="No commands extracted from transcript. "
+                   "Please provide explicit commands or clarify your request."
+        )
+    return commands
+
+
+def _accept_background(transcript: str, commands: list[str], priority: int) -> ExecutionContext:
+    """Validate `commands` and start them as a background execution."""
     # Validate commands are non-empty strings
     if not all(cmd.strip() for cmd in commands):
         raise HTTPException(
@@ -603,62 +935,216 @@ async def start_background_execution(payload: BackgroundExecutePayload):
         )
 
     # Safety validation (optional but recommended)
-    for cmd in commands:
-        is_safe, reason = validate_command_safety(cmd)
-        if not is_safe:
+    for check in safety.validate_many(commands):
+        if not check["allowed"]:
+            COMMANDS.inc(outcome="blocked")
             raise HTTPException(
                 status_code=403,
-                detail=f"Command rejected for safety: {reason}"
+                detail=f"Command rejected for safety: {check['reason']}"
             )
 
+    if scheduler.full():
+        raise HTTPException(
+            status_code=429,
+            detail="Too many background executions queued. Please retry later.",
+            headers={"Retry-After": str(scheduler.retry_after())},
+        )
+
     ctx = ExecutionContext(
-        transcript=[payload.transcript],
+        transcript=[transcript],
         commands=commands,
     )
-    event = asyncio.Event()
-    _executions[ctx.session_id] = {"ctx": ctx, "event": event}
-    asyncio.create_task(_run_execution(ctx))
+    store.save(context_to_dict(ctx))
+    COMMANDS.inc(len(commands), outcome="executed")
+    _start_execution(ctx, scheduler.reserve(priority))
+    return ctx
+
+
+@app.post("/execute/background")
+async def start_background_execution(payload: BackgroundExecutePayload):
+    """Start a background execution with human-in-the-loop support."""
+    # Extract commands if not provided
+    commands = payload.commands or await _extract_background_commands(
+        llm.extract_commands_from_conversation([payload.transcript], [])
+    )
+    ctx = _accept_background(payload.transcript, commands, payload.priority)
     return {"session_id": ctx.session_id, "state": ctx.state.value}
 
 
+async def _read_transcript(ws: WebSocket, messages: asyncio.Queue) -> None:
+    """Move client messages onto `messages`; None marks the disconnect."""
+    try:
+        while True:
+            try:
+                message = json.loads(await ws.receive_text())
+            except ValueError:
+                continue
+            # Other JSON values ("hi", [1]) aren't messages; skip them like bad JSON
+            if isinstance(message, dict):
+                messages.put_nowait(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        messages.put_nowait(None)
+
+
+async def _finish_utterance(ws: WebSocket, text: str, speculator: endpointing.Speculator) -> None:
+    with tracing.traced("transcript.utterance", words=len(text.split())):
+        await ws.send_json({"type": "endpoint", "transcript": text})
+        try:
+            with tracing.span("llm.extract_commands"):
+                commands = await _extract_background_commands(speculator.result(text))
+            ctx = _accept_background(text, commands, 0)
+        except HTTPException as e:
+            await ws.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+            return
+        await ws.send_json({"type": "execution", "session_id": ctx.session_id, "state": ctx.state.value})
+
+
+@app.websocket("/transcript/stream")
+async def stream_transcript(ws: WebSocket):
+    """Take transcript words as they are recognized and start executions per utterance.
+
+    The client sends {"type": "word", "text": ...} for each recognized token
+    and {"type": "end"} to close the utterance now (e.g. recording stopped).
+    The server decides where utterances end, extracting commands
+    speculatively while the speaker pauses, and replies with `endpoint`,
+    then `execution` (session_id and state) or `error` (status and detail).
+    A disconnect drops an unfinished utterance.
+    """
+    await ws.accept()
+    messages: asyncio.Queue = asyncio.Queue()
+    reader = asyncio.create_task(_read_transcript(ws, messages))
+    utterance = endpointing.Utterance()
+    speculator = endpointing.Speculator(
+        lambda text: llm.extract_commands_from_conversation([text], [])
+    )
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(messages.get(), timeout=utterance.wait())
+            except asyncio.TimeoutError:
+                message = {}
+            if message is None:
+                return
+            kind = message.get("type")
+            if kind == "word":
+                utterance.add(str(message.get("text", "")))
+            elif kind == "end" and utterance.words:
+                await _finish_utterance(ws, utterance.take(), speculator)
+                continue
+            action = utterance.poll()
+            if action == endpointing.SPECULATE:
+                speculator.start(utterance.text)
+            elif action == endpointing.ENDPOINT:
+                await _finish_utterance(ws, utterance.take(), speculator)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        speculator.cancel()
+        reader.cancel()
+
+
 @app.get("/context/{session_id}")
 async def get_context(session_id: str):
     """Get current execution context (state, results, current question if any)."""
-    # Try in-memory first
+    # Live runs first (they carry partial output), then the store
     entry = _executions.get(session_id)
     if entry:
-        ctx = entry["ctx"]
-        return {
-            "session_id": ctx.session_id,
-            "state": ctx.state.value,
-            "transcript": ctx.transcript,
-            "commands": ctx.commands,
-            "results": ctx.results,
-            "current_question": ctx.current_question,
-            "question_context": ctx.question_context,
-            "answers": ctx.answers,
-            "topics": ctx.topics,
-            "error_message": ctx.error_message,
-            "created_at": ctx.created_at.isoformat(),
-            "updated_at": ctx.updated_at.isoformat(),
-        }
+        return context_to_dict(entry["ctx"])
+    data = store.load(session_id)
+    if data:
+        return data
     return {"error": "Session not found"}
 
 
+@app.delete("/execute/{session_id}")
+async def cancel_execution(session_id: str):
+    """Cancel a background execution and terminate its Moltbot process group."""
+    entry = _executions.get(session_id)
+    if entry:
+        task = entry["task"]
+        task.cancel()
+        # Returns once the agent's process group is gone and the state is saved
+        with tracing.span("cancel_execution"):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        ctx = entry["ctx"]
+    else:
+        data = store.load(session_id)
+        if data is None:
+            return {"error": "Session not found"}
+        ctx = context_from_dict(data)
+        if ctx.state in TERMINAL_STATES:
+            return {"error": f"Session is {ctx.state.value}, nothing to cancel"}
+        # Waiting since before a restart: no task or agent to stop
+        ctx.state = ExecutionState.CANCELLED
+        ctx.set_error("Cancelled by request")
+        _publish(ctx, "error", error_message=ctx.error_message)
+    return {"session_id": session_id, "state": ctx.state.value}
+
+
+def _sse(seq: int, kind: str, data: dict) -> str:
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_events(entry: dict, after: int | None):
+    ctx, log = entry["ctx"], entry["events"]
+    if after is None:
+        after = log.seq
+        yield _sse(after, "snapshot", context_to_dict(ctx))
+    async for seq, kind, data in log.subscribe(after):
+        if kind == events.KEEPALIVE:
+            yield ": keepalive\n\n"
+        elif kind == events.RESYNC:
+            yield _sse(seq, "snapshot", context_to_dict(ctx))
+        else:
+            yield _sse(seq, kind, data)
+
+
+@app.get("/context/{session_id}/events")
+async def stream_context(session_id: str, request: Request, after: int | None = None):
+    """Server-Sent Events stream of execution updates.
+
+    Starts with a full `snapshot` event, then pushes `state`, `question`,
+    `answer`, `result` and `error` events as they happen. Reconnecting clients
+    resume from `Last-Event-ID` (or `?after=`); if that point has already
+    left the buffer they get a fresh snapshot instead.
+    """
+    entry = _executions.get(session_id) or _stored_entry(session_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Session not found")
+    last_event_id = request.headers.get("last-event-id", "")
+    if after is None and last_event_id.isdigit():
+        after = int(last_event_id)
+    return StreamingResponse(
+        _stream_events(entry, after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/resume/{session_id}")
 async def resume_execution(session_id: str, payload: ResumePayload):
     """Resume a paused execution with the user's answer."""
-    entry = _executions.get(session_id)
+    entry = _executions.get(session_id) or _stored_entry(session_id)
     if not entry:
         return {"error": "Session not found"}
     ctx = entry["ctx"]
     if ctx.state != ExecutionState.WAITING_FOR_INPUT:
         return {"error": f"Session is {ctx.state.value}, not waiting for input"}
 
-    ctx.answers.append({
-        "question": ctx.current_question,
-        "answer": payload.answer,
-    })
+    ctx.add_answer(ctx.current_question, payload.answer)
+    if entry["event"] is None:
+        # Asked before a restart: nothing is waiting, so start a fresh agent
+        # pass that carries the answers so far
+        _start_execution(ctx, scheduler.reserve(RESUME_PRIORITY))
+        _publish(ctx, "answer", question=ctx.current_question, answer=payload.answer)
+        ctx.set_question(None)
+        return {"session_id": session_id, "state": "resuming"}
+    _publish(ctx, "answer", question=ctx.current_question, answer=payload.answer)
     # Signal the background task to continue
     entry["event"].set()
     return {"session_id": session_id, "state": "resuming"}
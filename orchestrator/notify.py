@@ -1,44 +1,159 @@
+import asyncio
+import json
 import logging
-import subprocess
+import os
+import time
+import httpx
+from . import gateway, metrics
+from .config import (
+    NOTIFY_QUEUE_SIZE,
+    NOTIFY_MAX_ATTEMPTS,
+    NOTIFY_RETRY_BASE_SECONDS,
+    NOTIFY_DIGEST_WINDOW_SECONDS,
+    NOTIFY_DEAD_LETTER_PATH,
+)
 
 logger = logging.getLogger(__name__)
 
-def send_question_notification(
+# Queued notifications: (phone, message). The worker task delivers them in
+# the background so callers on the event loop never wait on WhatsApp.
+_queue: asyncio.Queue | None = None
+_worker: asyncio.Task | None = None
+
+_stats = {"queued": 0, "sent": 0, "retries": 0, "digests": 0, "dead_lettered": 0}
+
+SEND_SECONDS = metrics.histogram(
+    "orchestrator_notification_send_seconds",
+    "Time per WhatsApp send attempt through the Moltbot gateway.",
+    ("result",),
+)
+
+async def send_question_notification(
     phone: str,
     question: str,
     context: str,
     personaplex_url: str,
     session_id: str
 ) -> bool:
-    """Send WhatsApp notification when Moltbot needs input."""
+    """Queue WhatsApp notification when Moltbot needs input."""
     message = f"I need your input:\n\n{question}\n\nContext: {context}\n\nAnswer here: {personaplex_url}?session={session_id}&mode=answer"
-    return _send_whatsapp(phone, message)
+    return _enqueue(phone, message)
 
-def send_completion_notification(
+async def send_completion_notification(
     phone: str,
     summary: str,
     personaplex_url: str,
     session_id: str
 ) -> bool:
-    """Send WhatsApp notification when execution completes."""
+    """Queue WhatsApp notification when execution completes."""
     message = f"Task completed:\n\n{summary}\n\nReview here: {personaplex_url}?session={session_id}"
-    return _send_whatsapp(phone, message)
+    return _enqueue(phone, message)
+
+def _ensure_worker() -> asyncio.Queue:
+    global _queue, _worker
+    if _worker is None or _worker.done():
+        _queue = asyncio.Queue(maxsize=NOTIFY_QUEUE_SIZE)
+        _worker = asyncio.create_task(_run_worker(_queue))
+    return _queue
+
+def _enqueue(phone: str, message: str) -> bool:
+    """Hand a message to the dispatcher; False if the queue is full."""
+    try:
+        _ensure_worker().put_nowait((phone, message))
+    except asyncio.QueueFull:
+        _dead_letter(phone, message, "queue full")
+        return False
+    _stats["queued"] += 1
+    return True
+
+async def start() -> None:
+    _ensure_worker()
+
+async def stop() -> None:
+    """Stop the dispatcher, dead-lettering anything still queued."""
+    global _worker
+    if _worker is None:
+        return
+    _worker.cancel()
+    try:
+        await _worker
+    except asyncio.CancelledError:
+        pass
+    _worker = None
+    while _queue is not None and not _queue.empty():
+        phone, message = _queue.get_nowait()
+        _dead_letter(phone, message, "shutdown")
+
+def stats() -> dict:
+    return {**_stats, "pending": _queue.qsize() if _queue is not None else 0}
+
+async def _run_worker(queue: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        # Collect anything else that arrives within the digest window
+        deadline = loop.time() + NOTIFY_DIGEST_WINDOW_SECONDS
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        by_phone: dict[str, list[str]] = {}
+        for phone, message in batch:
+            by_phone.setdefault(phone, []).append(message)
+        for phone, messages in by_phone.items():
+            try:
+                await _deliver(phone, _digest(messages))
+            except Exception:
+                logger.exception("Notification delivery crashed")
+
+def _digest(messages: list[str]) -> str:
+    """Merge several notifications into one message."""
+    if len(messages) == 1:
+        return messages[0]
+    _stats["digests"] += 1
+    parts = [f"{i}) {message}" for i, message in enumerate(messages, 1)]
+    return f"You have {len(messages)} updates:\n\n" + "\n\n---\n\n".join(parts)
 
-def _send_whatsapp(phone: str, message: str) -> bool:
-    """Send a WhatsApp message via Moltbot's deliver channel."""
+async def _deliver(phone: str, message: str) -> bool:
+    """Send with exponential-backoff retries; dead-letter once attempts run out."""
+    for attempt in range(NOTIFY_MAX_ATTEMPTS):
+        if attempt:
+            _stats["retries"] += 1
+            await asyncio.sleep(NOTIFY_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+        start = time.perf_counter()
+        sent = await _send_whatsapp(phone, message)
+        SEND_SECONDS.observe(time.perf_counter() - start, result="ok" if sent else "failed")
+        if sent:
+            _stats["sent"] += 1
+            return True
+    _dead_letter(phone, message, f"failed after {NOTIFY_MAX_ATTEMPTS} attempts")
+    return False
+
+def _dead_letter(phone: str, message: str, reason: str) -> None:
+    """Record an undeliverable notification so it isn't silently lost."""
+    _stats["dead_lettered"] += 1
+    logger.error("Dropping WhatsApp notification to %s (%s)", phone, reason)
+    record = {"ts": time.time(), "phone": phone, "reason": reason, "message": message}
+    try:
+        path = os.path.expanduser(NOTIFY_DEAD_LETTER_PATH)
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        logger.warning("Could not write notification dead-letter log: %s", e)
+
+async def _send_whatsapp(phone: str, message: str) -> bool:
+    """Send a WhatsApp message via the Moltbot gateway's message tool."""
     try:
-        result = subprocess.run(
-            ["moltbot", "agent", "--message", message, "--deliver", "--channel", "whatsapp", "--to", phone],
-            capture_output=True,
-            timeout=30,
-        )
-        if result.returncode != 0:
-            logger.warning("WhatsApp send failed: %s", result.stderr.decode(errors="replace"))
-            return False
+        await gateway.send_message("whatsapp", phone, message)
         return True
-    except FileNotFoundError:
-        logger.warning("Moltbot not available for WhatsApp delivery")
+    except gateway.GatewayUnavailable:
+        logger.warning("Moltbot gateway not available for WhatsApp delivery")
+        return False
+    except gateway.GatewayError as e:
+        logger.warning("WhatsApp send failed: %s", e)
         return False
-    except subprocess.TimeoutExpired:
+    except httpx.TimeoutException:
         logger.warning("WhatsApp send timed out")
         return False
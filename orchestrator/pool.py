@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+from contextlib import asynccontextmanager
+from .config import (
+    BACKGROUND_CONCURRENCY,
+    MOLTBOT_POOL_SIZE,
+    MOLTBOT_ACQUIRE_TIMEOUT_SECONDS,
+    MOLTBOT_WORKER_MAX_USES,
+    MOLTBOT_WORKER_CHECK_INTERVAL_SECONDS,
+    MOLTBOT_COMPILE_CACHE_DIR,
+    PROCESS_KILL_GRACE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TIMEOUT_SECONDS = 30.0
+# How long a worker that failed its check waits before the next attempt
+UNHEALTHY_RETRY_SECONDS = 30.0
+
+
+class PoolExhausted(Exception):
+    """No worker became free before the acquire deadline."""
+
+
+def _worker_env() -> dict[str, str]:
+    """Environment for Moltbot processes, sharing one V8 compile cache across runs."""
+    env = dict(os.environ)
+    if MOLTBOT_COMPILE_CACHE_DIR:
+        env.setdefault("NODE_COMPILE_CACHE", os.path.expanduser(MOLTBOT_COMPILE_CACHE_DIR))
+    return env
+
+
+class MoltbotWorker:
+    """A reusable slot for running `moltbot` CLI processes.
+
+    `moltbot agent` takes its message on argv and exits when done, so a worker
+    can't keep one Node process alive between requests. It keeps the startup
+    path warm instead: a warm-up run primes Node's on-disk compile cache and the
+    page cache, and doubles as the health check.
+    """
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.uses = 0
+        self.healthy = False
+        # -inf rather than 0.0: the monotonic clock may be younger than the interval
+        self.last_check = float("-inf")
+
+    def needs_check(self) -> bool:
+        return time.monotonic() - self.last_check > MOLTBOT_WORKER_CHECK_INTERVAL_SECONDS
+
+    async def warm(self) -> bool:
+        """Run a cheap CLI invocation to load Node and verify Moltbot is usable."""
+        proc = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "moltbot", "--version",
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+                env=_worker_env(),
+            )
+            await asyncio.wait_for(proc.wait(), timeout=WARMUP_TIMEOUT_SECONDS)
+            self.healthy = proc.returncode == 0
+        except FileNotFoundError:
+            self.healthy = False
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            self.healthy = False
+        self.uses = 0
+        self.last_check = time.monotonic()
+        if not self.healthy:
+            logger.warning("Moltbot worker %d failed health check", self.worker_id)
+        return self.healthy
+
+    def due(self) -> bool:
+        """True when the worker should be re-warmed before its next use."""
+        return not self.healthy or self.uses >= MOLTBOT_WORKER_MAX_USES or self.needs_check()
+
+    async def spawn(self, *args: str, **kwargs) -> asyncio.subprocess.Process:
+        """Start `moltbot <args>` in this worker's environment.
+
+        The agent leads a new process group, so terminate() can also reach
+        anything it starts.
+        """
+        self.uses += 1
+        return await asyncio.create_subprocess_exec(
+            "moltbot", *args, env=_worker_env(), start_new_session=True, **kwargs
+        )
+
+
+class MoltbotPool:
+    """Fixed-size pool of Moltbot workers; callers queue FIFO when all are busy.
+
+    Health checks and re-warms never run on a caller's path. A worker that
+    is due for one comes back from its caller (or out of the idle queue,
+    on the periodic sweep) into a background task. It rejoins the queue
+    once the check is done. Failed workers stay out while another worker is
+    healthy. If none is, they go back in so callers get the real error
+    instead of waiting.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._workers = [MoltbotWorker(i) for i in range(self.size)]
+        self._idle: asyncio.Queue[MoltbotWorker] | None = None
+        self._waiting = 0
+        self._checker: asyncio.Task | None = None
+        self._rewarming: set[asyncio.Task] = set()
+
+    def _queue(self) -> asyncio.Queue:
+        # Created lazily so the queue binds to the running event loop
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for worker in self._workers:
+                self._idle.put_nowait(worker)
+        return self._idle
+
+    async def start(self) -> None:
+        """Warm every worker up front so the first voice command doesn't pay for it."""
+        idle = self._queue()
+        results = await asyncio.gather(*(w.warm() for w in self._workers))
+        logger.info("Moltbot pool ready: %d/%d workers healthy", sum(results), self.size)
+        self._checker = asyncio.create_task(self._sweep())
+        # Pull out workers that failed the first check
+        for _ in range(idle.qsize()):
+            self._release(idle.get_nowait())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._checker, *self._rewarming) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._checker = None
+
+    async def _sweep(self) -> None:
+        """Periodically send idle workers whose last check has aged out to re-warm."""
+        while True:
+            await asyncio.sleep(MOLTBOT_WORKER_CHECK_INTERVAL_SECONDS)
+            idle = self._queue()
+            for _ in range(idle.qsize()):
+                self._release(idle.get_nowait())
+
+    def _release(self, worker: MoltbotWorker) -> None:
+        # Before start() there are no background checks; hand workers straight back
+        if self._checker is None or not worker.due():
+            self._queue().put_nowait(worker)
+            return
+        task = asyncio.create_task(self._rewarm(worker))
+        self._rewarming.add(task)
+        task.add_done_callback(self._rewarming.discard)
+
+    async def _rewarm(self, worker: MoltbotWorker) -> None:
+        while not await worker.warm() and any(w.healthy for w in self._workers):
+            await asyncio.sleep(UNHEALTHY_RETRY_SECONDS)
+        self._queue().put_nowait(worker)
+
+    @asynccontextmanager
+    async def acquire(self, timeout: float | None = None):
+        """Borrow a worker, waiting in FIFO order if the pool is exhausted.
+
+        Raises PoolExhausted if none is free within `timeout` seconds.
+        """
+        idle = self._queue()
+        self._waiting += 1
+        try:
+            worker = await asyncio.wait_for(idle.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise PoolExhausted(f"No Moltbot worker free after {timeout}s") from None
+        finally:
+            self._waiting -= 1
+        try:
+            yield worker
+        finally:
+            self._release(worker)
+
+    def stats(self) -> dict:
+        idle = self._idle.qsize() if self._idle is not None else self.size
+        return {
+            "size": self.size,
+            "idle": idle,
+            "busy": self.size - idle,
+            "waiting": self._waiting,
+            "healthy": sum(w.healthy for w in self._workers),
+        }
+
+
+# Interactive commands and background agent passes draw from separate pools:
+# a background pass holds its worker for the whole run, and must not leave
+# voice commands waiting behind it. The scheduler already caps background runs.
+_pool = MoltbotPool(MOLTBOT_POOL_SIZE)
+_background_pool = MoltbotPool(BACKGROUND_CONCURRENCY)
+
+
+async def start() -> None:
+    await asyncio.gather(_pool.start(), _background_pool.start())
+
+
+async def stop() -> None:
+    await asyncio.gather(_pool.stop(), _background_pool.stop())
+
+
+def acquire(timeout: float | None = MOLTBOT_ACQUIRE_TIMEOUT_SECONDS):
+    return _pool.acquire(timeout)
+
+
+def acquire_background():
+    return _background_pool.acquire()
+
+
+def stats() -> dict:
+    return {**_pool.stats(), "background": _background_pool.stats()}
+
+
+def _signal_group(pgid: int, sig: int) -> bool:
+    """Send `sig` to a process group; False once the group is gone."""
+    try:
+        os.killpg(pgid, sig)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+async def terminate(proc: asyncio.subprocess.Process, grace: float = PROCESS_KILL_GRACE_SECONDS) -> None:
+    """SIGTERM the process group led by `proc`, SIGKILL whatever is left after `grace`.
+
+    Waits for the children as well as the agent itself, since those are what
+    keep running after a plain proc.kill().
+    """
+    pgid = proc.pid
+    if not _signal_group(pgid, signal.SIGTERM):
+        await proc.wait()
+        return
+    deadline = time.monotonic() + grace
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=grace)
+        # Leader reaped; give its children the rest of the grace period
+        while time.monotonic() < deadline and _signal_group(pgid, 0):
+            await asyncio.sleep(0.05)
+    except asyncio.TimeoutError:
+        pass
+    if _signal_group(pgid, signal.SIGKILL):
+        logger.warning("Moltbot process group %d outlived SIGTERM; sent SIGKILL", pgid)
+    await proc.wait()
@@ -0,0 +1,87 @@
+import time
+from collections import OrderedDict
+from .config import PERSONAPLEX_VOICE
+from .execution import ExecutionContext, ExecutionState
+
+BASE_PROMPT = "You enjoy having a good conversation. You are Kent's VPS admin assistant."
+IDLE_PROMPT = f"{BASE_PROMPT} Help with server tasks via natural voice conversation."
+CONTEXT_CHARS = 500
+MAX_SESSIONS = 1_000
+# Prompts rebuilt from Moltbot history get no events when that history changes
+HISTORY_PROMPT_TTL_SECONDS = 60.0
+
+# session_id -> (expires monotonic time or None, prompt response)
+_prompts: OrderedDict[str, tuple[float | None, dict]] = OrderedDict()
+_hits = 0
+_misses = 0
+
+
+def _response(session_id: str, task_summary: str) -> dict:
+    return {
+        "text_prompt": f"{BASE_PROMPT} {task_summary}",
+        "voice_prompt": PERSONAPLEX_VOICE,
+        "session_id": session_id,
+    }
+
+
+def _put(session_id: str, prompt: dict, expires: float | None) -> dict:
+    _prompts[session_id] = (expires, prompt)
+    _prompts.move_to_end(session_id)
+    while len(_prompts) > MAX_SESSIONS:
+        _prompts.popitem(last=False)
+    return prompt
+
+
+def _task_context(ctx: ExecutionContext) -> str:
+    if ctx.state == ExecutionState.WAITING_FOR_INPUT and ctx.current_question:
+        return f"Waiting on Kent's answer to: {ctx.current_question}"
+    if ctx.state == ExecutionState.FAILED and ctx.error_message:
+        return f"The task failed: {ctx.error_message}"
+    if ctx.results:
+        return ctx.last_output()
+    if ctx.answers:
+        return f"Kent answered: {ctx.answers[-1]['answer']}"
+    return "Running: " + "; ".join(ctx.commands)
+
+
+def default_prompt() -> dict:
+    return {"text_prompt": IDLE_PROMPT, "voice_prompt": PERSONAPLEX_VOICE}
+
+
+def update(ctx: ExecutionContext) -> dict:
+    """Rebuild the session's prompt from its execution; called on every change."""
+    context = _task_context(ctx)[:CONTEXT_CHARS]
+    return _put(ctx.session_id, _response(ctx.session_id, f"The current task context: {context}"), None)
+
+
+def update_from_history(session_id: str, history: list) -> dict:
+    """Build and cache a prompt from Moltbot session history (last message first)."""
+    if history:
+        recent_context = history[-1].get("content", "")[:CONTEXT_CHARS]
+        task_summary = f"The current task context: {recent_context}"
+    else:
+        task_summary = "No specific task in progress."
+    return _put(session_id, _response(session_id, task_summary), time.monotonic() + HISTORY_PROMPT_TTL_SECONDS)
+
+
+def get(session_id: str) -> dict | None:
+    global _hits, _misses
+    entry = _prompts.get(session_id)
+    if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+        _prompts.move_to_end(session_id)
+        _hits += 1
+        return entry[1]
+    _prompts.pop(session_id, None)
+    _misses += 1
+    return None
+
+
+def clear() -> None:
+    global _hits, _misses
+    _prompts.clear()
+    _hits = 0
+    _misses = 0
+
+
+def stats() -> dict:
+    return {"sessions": len(_prompts), "hits": _hits, "misses": _misses}
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from .config import RESULT_CACHE_SIZE
+
+
+class ResultCache:
+    """Short-TTL cache of command output with single-flight execution.
+
+    A miss starts the run as its own task; identical requests arriving while
+    it's in flight await the same task instead of starting another. Waiters
+    are shielded, so one caller going away doesn't cancel the run for the rest.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def run(
+        self,
+        key: str,
+        ttl: float,
+        fn: Callable[[], Awaitable[str]],
+        cacheable: Callable[[str], bool] = lambda result: True,
+    ) -> str:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, ttl, cacheable, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, ttl: float, cacheable: Callable[[str], bool], task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if ttl <= 0 or self.maxsize <= 0 or not cacheable(result):
+            return
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+_cache = ResultCache(RESULT_CACHE_SIZE)
+
+
+def run(
+    key: str,
+    ttl: float,
+    fn: Callable[[], Awaitable[str]],
+    cacheable: Callable[[str], bool] = lambda result: True,
+) -> Awaitable[str]:
+    return _cache.run(key, ttl, fn, cacheable)
+
+
+def stats() -> dict:
+    return _cache.stats()
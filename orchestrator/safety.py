@@ -1,45 +1,109 @@
-import shlex
+import re
 from .config import ALLOWED_CHARS, COMMAND_SCHEMAS
 
+# Command safety validation patterns for free-form background instructions
+DANGEROUS_PATTERNS = [
+    r'rm\s+-rf',
+    r'dd\s+if=',
+    r'mkfs\.',
+    r'chmod\s+777',
+    r'>\s*/dev/sda',
+]
+
+# Everything below is built once at import so a check is a regex scan plus
+# a few set lookups.
+_BLOCKED_CHAR = re.compile("[^" + "".join(re.escape(c) for c in sorted(ALLOWED_CHARS)) + "]")
+_DANGEROUS = re.compile(
+    "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(DANGEROUS_PATTERNS)),
+    re.IGNORECASE,
+)
+
+
+def _freeze(values) -> frozenset[str] | None:
+    return None if values is None else frozenset(values)
+
+
+_SCHEMAS = {
+    name: {
+        "allowed_flags": _freeze(schema.get("allowed_flags")),
+        "allowed_subcommands": _freeze(schema.get("allowed_subcommands")),
+        "destructive_subcommands": frozenset(schema.get("destructive_subcommands", ())),
+        "cache_ttl": float(schema.get("cache_ttl", 0)),
+    }
+    for name, schema in COMMAND_SCHEMAS.items()
+}
+
 
 def validate_command(cmd: str) -> dict:
     """Parse and validate command against schemas."""
-    for char in cmd:
-        if char not in ALLOWED_CHARS:
-            return {"allowed": False, "needs_confirmation": False, "reason": f"Blocked character: {char!r}"}
-
-    try:
-        tokens = shlex.split(cmd)
-    except ValueError as e:
-        return {"allowed": False, "needs_confirmation": False, "reason": f"Parse error: {e}"}
+    blocked = _BLOCKED_CHAR.search(cmd)
+    if blocked:
+        return {"allowed": False, "needs_confirmation": False, "reason": f"Blocked character: {blocked.group()!r}"}
 
+    # ALLOWED_CHARS has no quotes or escapes, so shlex.split is a plain split
+    tokens = cmd.split()
     if not tokens:
         return {"allowed": False, "needs_confirmation": False, "reason": "Empty command"}
 
     base_cmd = tokens[0]
-    if base_cmd not in COMMAND_SCHEMAS:
+    schema = _SCHEMAS.get(base_cmd)
+    if schema is None:
         return {"allowed": False, "needs_confirmation": False, "reason": f"Unknown command: {base_cmd}"}
 
-    schema = COMMAND_SCHEMAS[base_cmd]
     args = tokens[1:]
 
     # Check for destructive subcommands
-    destructive = schema.get("destructive_subcommands", [])
-    for arg in args:
-        if arg in destructive:
-            return {"allowed": True, "needs_confirmation": True, "reason": f"Destructive subcommand: {arg}"}
+    destructive = schema["destructive_subcommands"]
+    if not destructive.isdisjoint(args):
+        arg = next(a for a in args if a in destructive)
+        return {"allowed": True, "needs_confirmation": True, "reason": f"Destructive subcommand: {arg}"}
 
     # Validate subcommands if schema defines them
-    allowed_subs = schema.get("allowed_subcommands")
-    if allowed_subs is not None and args:
-        if args[0] not in allowed_subs and args[0] not in destructive:
-            return {"allowed": False, "needs_confirmation": False, "reason": f"Subcommand not allowed: {args[0]}"}
+    allowed_subs = schema["allowed_subcommands"]
+    if allowed_subs is not None and args and args[0] not in allowed_subs:
+        return {"allowed": False, "needs_confirmation": False, "reason": f"Subcommand not allowed: {args[0]}"}
 
     # Validate flags if schema defines them
-    allowed_flags = schema.get("allowed_flags")
+    allowed_flags = schema["allowed_flags"]
     if allowed_flags is not None:
         for arg in args:
             if arg.startswith("-") and arg not in allowed_flags:
                 return {"allowed": False, "needs_confirmation": False, "reason": f"Flag not allowed: {arg}"}
 
     return {"allowed": True, "needs_confirmation": False, "reason": "OK"}
+
+
+def cache_ttl(cmd: str) -> float:
+    """Seconds a result for `cmd` may be reused; only meaningful for commands
+    validate_command allowed without confirmation."""
+    tokens = cmd.split()
+    schema = _SCHEMAS.get(tokens[0]) if tokens else None
+    if schema is None or not schema["destructive_subcommands"].isdisjoint(tokens[1:]):
+        return 0.0
+    return schema["cache_ttl"]
+
+
+def validate_command_safety(command: str) -> tuple[bool, str | None]:
+    """Returns (is_safe, reason_if_unsafe)"""
+    match = _DANGEROUS.search(command)
+    if match:
+        pattern = DANGEROUS_PATTERNS[int(match.lastgroup[1:])]
+        return False, f"Command matches dangerous pattern: {pattern}"
+    return True, None
+
+
+def validate_many(commands: list[str]) -> list[dict]:
+    """Screen free-form background instructions for dangerous patterns.
+
+    Returns one result per command, in order, shaped like validate_command's.
+    Repeated commands are checked once.
+    """
+    seen: dict[str, dict] = {}
+    results = []
+    for cmd in commands:
+        check = seen.get(cmd)
+        if check is None:
+            is_safe, reason = validate_command_safety(cmd)
+            check = seen[cmd] = {"allowed": is_safe, "needs_confirmation": False, "reason": reason or "OK"}
+        results.append(dict(check))
+    return results
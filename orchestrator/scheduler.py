@@ -0,0 +1,124 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from .config import BACKGROUND_CONCURRENCY, BACKGROUND_QUEUE_SIZE
+
+# Assumed agent pass length until real runs have been timed
+INITIAL_RUN_ESTIMATE_SECONDS = 60.0
+# Weight of the newest run in the moving average
+RUN_ESTIMATE_ALPHA = 0.2
+
+
+class Scheduler:
+    """Concurrency cap for background agent passes, with a bounded priority queue.
+
+    reserve() takes a place synchronously, so a burst of requests sees the
+    queue fill up before any of their tasks have run. Each reservation is a
+    future resolved when a slot is handed to it; run() waits for it and
+    frees the slot afterwards. Higher priority goes first, FIFO within a
+    priority.
+    """
+
+    def __init__(self, concurrency: int, max_queued: int):
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max(0, max_queued)
+        self._running = 0
+        self._queued = 0
+        self._heap: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._avg_run = INITIAL_RUN_ESTIMATE_SECONDS
+
+    def full(self) -> bool:
+        return self._running >= self.concurrency and self._queued >= self.max_queued
+
+    def reserve(self, priority: int = 0) -> asyncio.Future:
+        """Claim a slot or a place in line; callers check full() first when it matters."""
+        ticket = asyncio.get_running_loop().create_future()
+        if self._running < self.concurrency and not self._queued:
+            self._running += 1
+            ticket.set_result(None)
+        else:
+            heapq.heappush(self._heap, (-priority, next(self._seq), ticket))
+            self._queued += 1
+        return ticket
+
+    @asynccontextmanager
+    async def run(self, ticket: asyncio.Future):
+        """Wait for `ticket`'s slot, hold it for the block, then pass it on."""
+        try:
+            await ticket
+        except asyncio.CancelledError:
+            if ticket.cancelled():
+                self._queued -= 1  # left in the heap; _release skips it
+            else:
+                self._release()  # granted just as we were cancelled
+            raise
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self._avg_run += RUN_ESTIMATE_ALPHA * (elapsed - self._avg_run)
+            self._release()
+
+    def discard(self, ticket: asyncio.Future) -> None:
+        """Give back a reservation that will never be passed to run()."""
+        if not ticket.done():
+            ticket.cancel()  # left in the heap; _release skips it
+            self._queued -= 1
+        elif not ticket.cancelled():
+            self._release()
+
+    def _release(self) -> None:
+        while self._heap:
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.cancelled():
+                continue
+            # Hand the slot straight over; _running is unchanged
+            self._queued -= 1
+            ticket.set_result(None)
+            return
+        self._running -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until a queue place is likely to free up."""
+        return max(1, math.ceil(self._avg_run / self.concurrency))
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "running": self._running,
+            "queued": self._queued,
+            "max_queued": self.max_queued,
+            "avg_run_seconds": round(self._avg_run, 1),
+        }
+
+
+_scheduler = Scheduler(BACKGROUND_CONCURRENCY, BACKGROUND_QUEUE_SIZE)
+
+
+def full() -> bool:
+    return _scheduler.full()
+
+
+def reserve(priority: int = 0) -> asyncio.Future:
+    return _scheduler.reserve(priority)
+
+
+def run(ticket: asyncio.Future):
+    return _scheduler.run(ticket)
+
+
+def discard(ticket: asyncio.Future) -> None:
+    _scheduler.discard(ticket)
+
+
+def retry_after() -> int:
+    return _scheduler.retry_after()
+
+
+def stats() -> dict:
+    return _scheduler.stats()
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from .config import (
+    EXECUTION_STORE_PATH,
+    EXECUTION_STORE_FLUSH_SECONDS,
+    EXECUTION_RETENTION_SECONDS,
+    EXECUTION_TIMEOUT_MINUTES,
+)
+
+logger = logging.getLogger(__name__)
+
+EVICT_INTERVAL_SECONDS = 60.0
+# Executions kept in memory when the database can't be opened
+MEMORY_MAX_EXECUTIONS = 1000
+
+TERMINAL_STATES = {"completed", "failed", "cancelled"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS executions (
+    session_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS executions_state ON executions (state);
+CREATE INDEX IF NOT EXISTS executions_expires_at ON executions (expires_at);
+CREATE TABLE IF NOT EXISTS pending (
+    session_id TEXT PRIMARY KEY,
+    command TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+# Writes are write-behind: callers on the event loop only record the latest
+# row per session here, and the flusher task commits batches from a worker
+# thread. A None value marks a delete. Reads check these maps before SQLite
+# so callers always see their own writes.
+_dirty: dict[str, tuple | None] = {}
+_dirty_pending: dict[str, tuple | None] = {}
+_inflight: dict[str, tuple | None] = {}
+_inflight_pending: dict[str, tuple | None] = {}
+
+# WAL lets the loop-side reader run while the flusher thread writes
+_reader: sqlite3.Connection | None = None
+_writer: sqlite3.Connection | None = None
+_flusher: asyncio.Task | None = None
+_flush_lock = asyncio.Lock()
+
+# Without a database, snapshots live here instead (same row layout as _dirty),
+# so /context still answers for runs that have left main._executions
+_memory: OrderedDict[str, tuple] = OrderedDict()
+
+_stats = {"flushes": 0, "rows_written": 0, "evicted": 0}
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+async def start(path: str = EXECUTION_STORE_PATH) -> None:
+    """Open the database and start the flusher.
+
+    If it can't be opened, executions are kept in memory only (bounded, same TTL).
+    """
+    global _reader, _writer, _flusher
+    path = os.path.expanduser(path)
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _writer = _connect(path)
+        _writer.executescript(_SCHEMA)
+        _reader = _connect(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Execution store unavailable at %s, not persisting: %s", path, e)
+        _reader = _writer = None
+        return
+    _flusher = asyncio.create_task(_run_flusher())
+
+
+async def stop() -> None:
+    """Flush outstanding writes and close the database."""
+    global _reader, _writer, _flusher
+    if _flusher is not None:
+        # Cancelling doesn't stop a write already running in its thread, so
+        # wait for the flusher to be between batches before cancelling it
+        async with _flush_lock:
+            _flusher.cancel()
+            try:
+                await _flusher
+            except asyncio.CancelledError:
+                pass
+        _flusher = None
+    if _writer is not None:
+        await flush()
+        _writer.close()
+        _reader.close()
+    _reader = _writer = None
+    _memory.clear()
+
+
+def stats() -> dict:
+    return {**_stats, "dirty": len(_dirty) + len(_dirty_pending)}
+
+
+def _expires_at(data: dict) -> float:
+    if data["state"] in TERMINAL_STATES:
+        return time.time() + EXECUTION_RETENTION_SECONDS
+    # Unfinished runs are only worth keeping while they can still be resumed
+    return time.time() + EXECUTION_TIMEOUT_MINUTES * 60 + EXECUTION_RETENTION_SECONDS
+
+
+def save(data: dict) -> None:
+    """Queue an execution snapshot (from context_to_dict) for writing."""
+    row = (data["state"], json.dumps(data), _expires_at(data))
+    if _writer is None:
+        _memory[data["session_id"]] = row
+        _memory.move_to_end(data["session_id"])
+        while len(_memory) > MEMORY_MAX_EXECUTIONS:
+            _memory.popitem(last=False)
+        return
+    _dirty[data["session_id"]] = row
+
+
+def delete(session_id: str) -> None:
+    if _writer is None:
+        _memory.pop(session_id, None)
+        return
+    _dirty[session_id] = None
+
+
+def load(session_id: str) -> dict | None:
+    """Latest snapshot for a session, or None if unknown or evicted."""
+    if _reader is None:
+        row = _memory.get(session_id)
+        return json.loads(row[1]) if row and row[2] > time.time() else None
+    for layer in (_dirty, _inflight):
+        if session_id in layer:
+            row = layer[session_id]
+            return None if row is None else json.loads(row[1])
+    row = _reader.execute(
+        "SELECT data FROM executions WHERE session_id = ? AND expires_at > ?",
+        (session_id, time.time()),
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def session_ids(*states: str) -> list[str]:
+    """Sessions currently in any of `states`, via the state index."""
+    if _reader is None:
+        now = time.time()
+        return sorted(sid for sid, row in _memory.items() if row[0] in states and row[2] > now)
+    found = {
+        sid for (sid,) in _reader.execute(
+            f"SELECT session_id FROM executions WHERE state IN ({','.join('?' * len(states))})",
+            states,
+        )
+    }
+    for layer in (_inflight, _dirty):
+        for sid, row in layer.items():
+            if row is not None and row[0] in states:
+                found.add(sid)
+            else:
+                found.discard(sid)
+    return sorted(found)
+
+
+def save_pending(session_id: str, entry: dict) -> None:
+    if _writer is None:
+        return
+    _dirty_pending[session_id] = (entry["command"], entry["expires"])
+
+
+def delete_pending(session_id: str) -> None:
+    if _writer is None:
+        return
+    _dirty_pending[session_id] = None
+
+
+def load_pending() -> dict[str, dict]:
+    """All unexpired pending confirmations, for restoring after a restart."""
+    if _reader is None:
+        return {}
+    rows = _reader.execute(
+        "SELECT session_id, command, expires FROM pending WHERE expires > ?", (time.time(),)
+    ).fetchall()
+    pending = {sid: {"command": command, "expires": expires} for sid, command, expires in rows}
+    for layer in (_inflight_pending, _dirty_pending):
+        for sid, row in layer.items():
+            if row is None:
+                pending.pop(sid, None)
+            else:
+                pending[sid] = {"command": row[0], "expires": row[1]}
+    return pending
+
+
+async def flush() -> None:
+    """Commit everything queued so far."""
+    async with _flush_lock:
+        await _flush()
+
+
+async def _flush() -> None:
+    global _dirty, _dirty_pending, _inflight, _inflight_pending
+    if _writer is None or not (_dirty or _dirty_pending):
+        return
+    _inflight, _dirty = _dirty, {}
+    _inflight_pending, _dirty_pending = _dirty_pending, {}
+    try:
+        await asyncio.to_thread(_write, _inflight, _inflight_pending)
+        _stats["flushes"] += 1
+        _stats["rows_written"] += len(_inflight) + len(_inflight_pending)
+    except sqlite3.Error:
+        logger.exception("Execution store flush failed; will retry")
+        # Put the batch back unless a newer write superseded it
+        _dirty = {**_inflight, **_dirty}
+        _dirty_pending = {**_inflight_pending, **_dirty_pending}
+    finally:
+        _inflight, _inflight_pending = {}, {}
+
+
+def _write(executions: dict, pending: dict) -> None:
+    with _writer:
+        _writer.execute("BEGIN")
+        for sid, row in executions.items():
+            if row is None:
+                _writer.execute("DELETE FROM executions WHERE session_id = ?", (sid,))
+            else:
+                _writer.execute(
+                    "INSERT OR REPLACE INTO executions (session_id, state, data, expires_at) VALUES (?, ?, ?, ?)",
+                    (sid, *row),
+                )
+        for sid, row in pending.items():
+            if row is None:
+                _writer.execute("DELETE FROM pending WHERE session_id = ?", (sid,))
+            else:
+                _writer.execute(
+                    "INSERT OR REPLACE INTO pending (session_id, command, expires) VALUES (?, ?, ?)",
+                    (sid, *row),
+                )
+
+
+async def evict_expired() -> int:
+    """Delete executions and pending confirmations past their TTL."""
+    if _writer is None:
+        return 0
+
+    def _evict() -> int:
+        now = time.time()
+        with _writer:
+            _writer.execute("BEGIN")
+            removed = _writer.execute("DELETE FROM executions WHERE expires_at <= ?", (now,)).rowcount
+            _writer.execute("DELETE FROM pending WHERE expires <= ?", (now,))
+        return removed
+
+    async with _flush_lock:
+        removed = await asyncio.to_thread(_evict)
+    _stats["evicted"] += removed
+    return removed
+
+
+async def _run_flusher() -> None:
+    loop = asyncio.get_running_loop()
+    next_evict = loop.time() + EVICT_INTERVAL_SECONDS
+    while True:
+        # Updates landing within one interval coalesce into a single write
+        await asyncio.sleep(EXECUTION_STORE_FLUSH_SECONDS)
+        await flush()
+        if loop.time() >= next_evict:
+            next_evict = loop.time() + EVICT_INTERVAL_SECONDS
+            try:
+                await evict_expired()
+            except sqlite3.Error:
+                logger.exception("Execution store eviction failed")
@@ -0,0 +1,204 @@
+"""Lightweight request tracing to a rotating JSONL file.
+
+A trace covers one HTTP request (or one background execution) and holds
+timed spans for each pipeline stage plus point events such as a subprocess's
+first output byte. The current trace lives in a ContextVar, so stages deep in
+the call stack add spans without it being passed around; with no active trace
+span() and event() do nothing.
+
+Finished traces go through a QueueHandler, so the file write and rotation
+happen on a listener thread rather than the event loop.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .config import TRACE_ENABLED, TRACE_PATH, TRACE_MAX_BYTES, TRACE_BACKUP_COUNT
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Trace-Id"
+_VALID_ID = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+
+_trace_log = logging.getLogger("orchestrator.traces")
+_trace_log.propagate = False
+_listener: logging.handlers.QueueListener | None = None
+
+_current: ContextVar["Trace | None"] = ContextVar("trace", default=None)
+_current_span: ContextVar[int | None] = ContextVar("trace_span", default=None)
+
+
+class Trace:
+    __slots__ = ("trace_id", "name", "attrs", "started", "_t0", "spans", "closed")
+
+    def __init__(self, name: str, trace_id: str, **attrs):
+        self.trace_id = trace_id
+        self.name = name
+        self.attrs = attrs
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: list[dict] = []
+        self.closed = False
+
+    def offset_ms(self) -> float:
+        return round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "ts": self.started,
+            "duration_ms": self.offset_ms(),
+            **self.attrs,
+            "spans": self.spans,
+        }
+
+
+def new_trace_id(candidate: str | None = None) -> str:
+    """Use the client's trace ID when it looks sane, otherwise mint one."""
+    if candidate and _VALID_ID.fullmatch(candidate):
+        return candidate
+    return uuid.uuid4().hex
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+def current_id() -> str | None:
+    trace = _current.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def traced(name: str, trace_id: str | None = None, **attrs):
+    """Run the block under a new trace, then queue it for the trace file.
+
+    Yields the Trace (None when tracing is off). Attributes set on
+    trace.attrs inside the block are written with it.
+    """
+    if not TRACE_ENABLED:
+        yield None
+        return
+    trace = Trace(name, new_trace_id(trace_id), **attrs)
+    token = _current.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current.reset(token)
+        _finish(trace)
+
+
+def _finish(trace: Trace) -> None:
+    # Spans still open elsewhere (e.g. a shared result-cache run) are dropped
+    trace.closed = True
+    _trace_log.info(json.dumps(trace.to_dict(), default=str))
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a stage of the current trace; exceptions are recorded and re-raised."""
+    trace = _current.get()
+    if trace is None or trace.closed:
+        yield
+        return
+    record = {"name": name, "id": len(trace.spans), "parent": _current_span.get(), "start_ms": trace.offset_ms()}
+    if attrs:
+        record["attrs"] = attrs
+    trace.spans.append(record)
+    token = _current_span.set(record["id"])
+    try:
+        yield
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        record["duration_ms"] = round(trace.offset_ms() - record["start_ms"], 3)
+
+
+def event(name: str, **attrs) -> None:
+    """Record a point-in-time marker (zero-length span) in the current trace."""
+    trace = _current.get()
+    if trace is None or trace.closed:
+        return
+    record = {"name": name, "id": len(trace.spans), "parent": _current_span.get(), "start_ms": trace.offset_ms()}
+    if attrs:
+        record["attrs"] = attrs
+    trace.spans.append(record)
+
+
+def start(path: str = TRACE_PATH) -> None:
+    """Attach the rotating trace file; a bad path disables the file, not tracing."""
+    global _listener
+    if not TRACE_ENABLED or _listener is not None:
+        return
+    try:
+        path = os.path.expanduser(path)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT
+        )
+    except OSError as e:
+        logger.warning("Could not open trace file %s: %s", path, e)
+        return
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _trace_log.addHandler(logging.handlers.QueueHandler(records))
+    _trace_log.setLevel(logging.INFO)
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+
+
+def stop() -> None:
+    """Flush queued traces and close the file."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    for handler in list(_trace_log.handlers):
+        _trace_log.removeHandler(handler)
+    _listener = None
+
+
+class TraceMiddleware:
+    """ASGI middleware: one trace per HTTP request, ID echoed in X-Trace-Id.
+
+    A client-supplied X-Trace-Id is reused so one command can be followed
+    from the client through background executions.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        supplied = next(
+            (value.decode("latin-1") for key, value in scope["headers"] if key == b"x-trace-id"), None
+        )
+        status = 500
+
+        async def send_with_trace_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        with traced(f"{scope['method']} {scope['path']}", supplied) as trace:
+            header = (b"x-trace-id", trace.trace_id.encode())
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                trace.attrs["status"] = status
@@ -47,7 +47,9 @@ restore_workspace() {
 
     # Sync from Supabase (won't fail if bucket is empty)
     if rclone lsd "supabase:${BUCKET}" 2>/dev/null; then
-        rclone sync "supabase:${BUCKET}/" "$WORKSPACE/" --verbose
+        rclone sync "supabase:${BUCKET}/" "$WORKSPACE/" \
+            --exclude ".orchestrator/**" \
+            --verbose
         echo "Workspace restored from Supabase"
     else
         echo "No existing backup found, starting fresh"
@@ -57,9 +59,11 @@ restore_workspace() {
 # Upload workspace to Supabase
 backup_workspace() {
     echo "Backing up workspace to Supabase..."
+    # .orchestrator holds the orchestrator's live SQLite store, not workspace files
     rclone sync "$WORKSPACE/" "supabase:${BUCKET}/" \
         --exclude "*.tmp" \
         --exclude "__pycache__/**" \
+        --exclude ".orchestrator/**" \
         --verbose
     echo "Workspace backed up at $(date)"
 }
@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from orchestrator.capture import BoundedCapture, read_into
+
+
+class TestBoundedCapture:
+    def test_small_output_kept_verbatim(self):
+        """Test that output under the cap is returned unchanged."""
+        capture = BoundedCapture(100)
+        capture.feed(b"hello ")
+        capture.feed(b"world")
+        assert not capture.truncated
+        assert capture.text() == "hello world"
+
+    def test_keeps_head_and_tail(self):
+        """Test that the middle is dropped and both ends survive."""
+        capture = BoundedCapture(10, tail_fraction=0.4)
+        for i in range(100):
+            capture.feed(str(i % 10).encode())
+        assert capture.truncated
+        assert capture.total == 100
+        assert bytes(capture.head) == b"012345"
+        assert bytes(capture.tail) == b"6789"
+        assert "truncated 90 bytes, total 100 bytes" in capture.text()
+        assert capture.text().endswith("6789")
+
+    def test_memory_constant_for_huge_output(self):
+        """Test that buffers never exceed the cap however much is fed."""
+        capture = BoundedCapture(1000)
+        chunk = b"z" * 4096
+        for _ in range(2500):  # ~10 MB
+            capture.feed(chunk)
+            assert len(capture.head) + len(capture.tail) <= 1000
+        assert capture.total == 4096 * 2500
+
+    @pytest.mark.asyncio
+    async def test_read_into_drains_stream(self):
+        """Test reading a stream to EOF through the capture."""
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"a" * 10_000)
+        stream.feed_eof()
+        capture = BoundedCapture(100)
+        await read_into(stream, capture)
+        assert capture.total == 10_000
+        assert capture.truncated
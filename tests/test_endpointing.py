@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from orchestrator.endpointing import Utterance, Speculator, SPECULATE, ENDPOINT
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _utterance(clock: FakeClock) -> Utterance:
+    return Utterance(silence=0.8, punctuated_silence=0.3, stable=0.25, min_words=3, clock=clock)
+
+
+class TestUtterance:
+    def test_speculates_then_endpoints(self):
+        """Test that a pause first triggers one speculation, then the endpoint."""
+        clock = FakeClock()
+        u = _utterance(clock)
+        for word in ("restart", "the", "nginx", "service"):
+            u.add(word)
+
+        assert u.poll() is None
+        assert u.wait() == pytest.approx(0.25)
+        clock.now = 0.3
+        assert u.poll() == SPECULATE
+        assert u.poll() is None
+        assert u.wait() == pytest.approx(0.5)
+        clock.now = 0.8
+        assert u.poll() == ENDPOINT
+        assert u.take() == "restart the nginx service"
+        assert u.wait() is None
+
+    def test_punctuation_shortens_endpoint(self):
+        clock = FakeClock()
+        u = _utterance(clock)
+        for word in ("check", "disk", "space."):
+            u.add(word)
+
+        clock.now = 0.3
+        assert u.poll() == ENDPOINT
+
+    def test_new_words_reset_speculation(self):
+        """Test that a word after a speculation makes the longer prefix speculate again."""
+        clock = FakeClock()
+        u = _utterance(clock)
+        for word in ("show", "me", "the"):
+            u.add(word)
+        clock.now = 0.3
+        assert u.poll() == SPECULATE
+
+        u.add("logs")
+        clock.now = 0.6
+        assert u.poll() == SPECULATE
+
+    def test_too_short_never_endpoints(self):
+        clock = FakeClock()
+        u = _utterance(clock)
+        u.add("um")
+        u.add("  ")
+        clock.now = 10.0
+        assert u.poll() is None
+        assert u.wait() is None
+
+
+class TestSpeculator:
+    @pytest.mark.asyncio
+    async def test_matching_text_reuses_speculation(self):
+        calls = []
+
+        async def extract(text):
+            calls.append(text)
+            return {"commands": [text]}
+
+        s = Speculator(extract)
+        s.start("ls -la")
+        s.start("ls -la")
+        assert await s.result("ls -la") == {"commands": ["ls -la"]}
+        assert calls == ["ls -la"]
+
+    @pytest.mark.asyncio
+    async def test_stale_speculation_is_cancelled(self):
+        """Test that a speculation on an older prefix is dropped for a fresh extraction."""
+        started = asyncio.Event()
+
+        async def extract(text):
+            if text == "show me":
+                started.set()
+                await asyncio.Event().wait()
+            return {"commands": [text]}
+
+        s = Speculator(extract)
+        s.start("show me")
+        await started.wait()
+        stale = s._task
+
+        assert await s.result("show me the logs") == {"commands": ["show me the logs"]}
+        await asyncio.sleep(0)
+        assert stale.cancelled()
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from orchestrator.events import EventLog, RESYNC, KEEPALIVE
+
+
+class TestEventLog:
+    def test_sequence_numbers_increase(self):
+        """Test that each published event gets the next sequence number."""
+        log = EventLog()
+        assert log.publish("state", {}) == 1
+        assert log.publish("state", {}) == 2
+        assert [seq for seq, _, _ in log.since(0)] == [1, 2]
+        assert log.since(2) == []
+
+    def test_evicted_events_require_resync(self):
+        """Test that resuming from before the buffer asks for a snapshot."""
+        log = EventLog(maxlen=2)
+        for _ in range(5):
+            log.publish("state", {})
+        assert log.since(3) == [(4, "state", {}), (5, "state", {})]
+        assert log.since(1) is None
+
+    def test_unknown_future_sequence_requires_resync(self):
+        """Test that a sequence number from a previous server run triggers resync."""
+        log = EventLog()
+        log.publish("state", {})
+        assert log.since(42) is None
+
+    @pytest.mark.asyncio
+    async def test_subscribe_receives_live_events(self):
+        """Test that subscribers wake up for events published after they start."""
+        log = EventLog()
+        received = []
+
+        async def consume():
+            async for event in log.subscribe(0):
+                received.append(event)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        log.publish("state", {"state": "running"})
+        log.publish("result", {"state": "completed"})
+        log.close()
+        await asyncio.wait_for(task, timeout=1)
+
+        assert [kind for _, kind, _ in received] == ["state", "result"]
+
+    @pytest.mark.asyncio
+    async def test_subscribe_resync_and_keepalive(self):
+        """Test the RESYNC and KEEPALIVE pseudo-events."""
+        log = EventLog(maxlen=1)
+        log.publish("state", {})
+        log.publish("state", {})
+
+        stream = log.subscribe(0, keepalive=0.01)
+        assert await stream.__anext__() == (2, RESYNC, None)
+        assert await stream.__anext__() == (2, KEEPALIVE, None)
+        await stream.aclose()
@@ -0,0 +1,85 @@
+from orchestrator import execution
+from orchestrator.execution import (
+    ExecutionContext,
+    ExecutionState,
+    context_from_dict,
+    context_to_dict,
+)
+
+
+class TestExecutionContext:
+    def test_slotted(self):
+        """Test that contexts carry no per-instance __dict__."""
+        assert not hasattr(ExecutionContext(), "__dict__")
+
+    def test_large_result_compressed_and_restored(self):
+        """Test that big outputs are stored compressed but serialize unchanged."""
+        ctx = ExecutionContext()
+        big = "line of output\n" * 1_000
+        ctx.add_result("short")
+        ctx.add_result(big)
+
+        assert ctx.results[0] == "short"
+        assert isinstance(ctx.results[1], bytes)
+        assert len(ctx.results[1]) < len(big) // 10
+        assert context_to_dict(ctx)["results"] == [{"output": "short"}, {"output": big}]
+
+    def test_lists_and_text_capped(self):
+        """Test that long-running sessions keep only their most recent entries."""
+        ctx = ExecutionContext(
+            transcript=[f"t{i}" for i in range(execution.MAX_TRANSCRIPT_ITEMS + 10)],
+            error_message="x" * (execution.MAX_TEXT_CHARS + 100),
+        )
+        for i in range(execution.MAX_RESULTS + 5):
+            ctx.add_result(f"r{i}")
+        for i in range(execution.MAX_ANSWERS + 5):
+            ctx.add_answer("q", f"a{i}")
+
+        assert len(ctx.transcript) == execution.MAX_TRANSCRIPT_ITEMS
+        assert ctx.transcript[-1] == f"t{execution.MAX_TRANSCRIPT_ITEMS + 9}"
+        assert len(ctx.error_message) == execution.MAX_TEXT_CHARS
+        assert ctx.result_outputs()[-1] == f"r{execution.MAX_RESULTS + 4}"
+        assert len(ctx.results) == execution.MAX_RESULTS
+        assert len(ctx.answers) == execution.MAX_ANSWERS
+
+    def test_assigned_text_and_commands_capped(self):
+        """Test that questions, errors and commands set after creation are capped too."""
+        long = "x" * (execution.MAX_TEXT_CHARS + 100)
+        ctx = ExecutionContext(commands=[long] * (execution.MAX_COMMANDS + 5))
+        ctx.set_question(long, long)
+        ctx.set_error(long)
+
+        assert len(ctx.commands) == execution.MAX_COMMANDS
+        assert len(ctx.commands[0]) == execution.MAX_TEXT_CHARS
+        assert len(ctx.current_question) == execution.MAX_TEXT_CHARS
+        assert len(ctx.question_context) == execution.MAX_TEXT_CHARS
+        assert len(ctx.error_message) == execution.MAX_TEXT_CHARS
+
+    def test_repeated_serialization_decompresses_once(self):
+        """Test that publishing the same context again reuses the decoded output."""
+        ctx = ExecutionContext()
+        big = f"output of {ctx.session_id}\n" * 1_000
+        ctx.add_result(big)
+        misses = execution._decompress.cache_info().misses
+        for _ in range(3):
+            context_to_dict(ctx)
+
+        assert ctx.last_output() == big
+        assert execution._decompress.cache_info().misses == misses + 1
+
+    def test_dict_round_trip(self):
+        """Test that the /context shape converts back to an equal context."""
+        ctx = ExecutionContext(
+            state=ExecutionState.WAITING_FOR_INPUT,
+            commands=["df -h"],
+            current_question="Which disk?",
+        )
+        ctx.add_answer("Which host?", "web1")
+        ctx.add_result("x" * 10_000)
+
+        data = context_to_dict(ctx)
+        restored = context_from_dict(data)
+
+        assert context_to_dict(restored) == data
+        assert restored.state is ExecutionState.WAITING_FOR_INPUT
+        assert abs(restored.updated_at - ctx.updated_at) < 1e-3
@@ -0,0 +1,71 @@
+import asyncio
+import time
+import pytest
+from orchestrator.expiry import ExpiryHeap
+
+
+class TestExpiryHeap:
+    @pytest.mark.asyncio
+    async def test_expires_in_deadline_order(self):
+        """Test that keys fire at their own deadlines, earliest first."""
+        fired = []
+        heap = ExpiryHeap(fired.append)
+        now = time.time()
+        heap.schedule("late", now + 0.08)
+        heap.schedule("early", now + 0.02)
+
+        await asyncio.sleep(0.05)
+        assert fired == ["early"]
+        await asyncio.sleep(0.06)
+        assert fired == ["early", "late"]
+        assert heap.stats() == {"scheduled": 0, "heap_size": 0, "expired": 2}
+
+    @pytest.mark.asyncio
+    async def test_discard_prevents_expiry(self):
+        """Test that a confirmed (discarded) key never fires."""
+        fired = []
+        heap = ExpiryHeap(fired.append)
+        heap.schedule("s1", time.time() + 0.02)
+        heap.discard("s1")
+
+        await asyncio.sleep(0.05)
+        assert fired == []
+        assert len(heap) == 0
+
+    @pytest.mark.asyncio
+    async def test_reschedule_uses_latest_deadline(self):
+        """Test that replacing a key's deadline ignores the old one."""
+        fired = []
+        heap = ExpiryHeap(fired.append)
+        heap.schedule("s1", time.time() + 0.02)
+        heap.schedule("s1", time.time() + 0.08)
+
+        await asyncio.sleep(0.05)
+        assert fired == []
+        assert "s1" in heap
+        await asyncio.sleep(0.06)
+        assert fired == ["s1"]
+
+    @pytest.mark.asyncio
+    async def test_past_deadline_fires_immediately(self):
+        """Test that an already-expired entry (e.g. restored after restart) goes at once."""
+        fired = []
+        heap = ExpiryHeap(fired.append)
+        heap.schedule("old", time.time() - 10)
+
+        await asyncio.sleep(0.01)
+        assert fired == ["old"]
+
+    @pytest.mark.asyncio
+    async def test_stale_entries_compacted(self):
+        """Test that churn on one key doesn't grow the heap without bound."""
+        heap = ExpiryHeap(lambda key: None)
+        deadline = time.time() + 60
+        for _ in range(1000):
+            heap.schedule("s1", deadline)
+            heap.discard("s1")
+        heap.schedule("s1", deadline)
+
+        assert len(heap) == 1
+        assert heap.stats()["heap_size"] <= 2 * len(heap) + 65
+        heap.clear()
@@ -0,0 +1,140 @@
+import pytest
+import pytest_asyncio
+import httpx
+from unittest.mock import patch
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from orchestrator import gateway, notify
+
+
+def make_stub_gateway() -> FastAPI:
+    """Minimal stand-in for the Moltbot gateway HTTP API."""
+    stub = FastAPI()
+    stub.state.calls = []
+    stub.state.fail_next = 0
+
+    @stub.get("/health")
+    async def health():
+        return {"ok": True}
+
+    @stub.post("/v1/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        stub.state.calls.append(("agent", body, request.headers.get("authorization")))
+        reply = f"ran: {body['messages'][-1]['content']}"
+        return {"choices": [{"message": {"role": "assistant", "content": reply}}]}
+
+    @stub.post("/tools/invoke")
+    async def invoke(request: Request):
+        body = await request.json()
+        stub.state.calls.append((body["tool"], body["args"], None))
+        if stub.state.fail_next:
+            stub.state.fail_next -= 1
+            return JSONResponse({"error": "warming up"}, status_code=503)
+        if body["tool"] == "sessions_list":
+            return {"ok": True, "result": {"sessions": [{"key": "main"}]}}
+        if body["tool"] == "sessions_history":
+            limit = body["args"]["limit"]
+            messages = [{"role": "assistant", "content": f"msg {i}"} for i in range(limit)]
+            return {"ok": True, "result": {"messages": messages}}
+        if body["tool"] == "message":
+            return {"ok": True, "result": {"delivered": True}}
+        return {"ok": False, "error": {"message": f"unknown tool {body['tool']}"}}
+
+    return stub
+
+
+@pytest.fixture
+def stub():
+    return make_stub_gateway()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def stub_client(stub):
+    """Point the shared gateway client at the in-process stub."""
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=stub),
+        base_url="http://gateway",
+        headers={"Authorization": "Bearer test-token"},
+    )
+    with patch.object(gateway, "_client", client), \
+         patch.object(gateway, "RETRY_BACKOFF_SECONDS", 0):
+        yield client
+    await client.aclose()
+
+
+class TestGatewayClient:
+    @pytest.mark.asyncio
+    async def test_agent_returns_reply(self, stub):
+        """Test that an agent turn returns the assistant content."""
+        result = await gateway.agent("df -h", session_key="s1")
+
+        assert result == "ran: df -h"
+        _, body, auth = stub.state.calls[0]
+        assert body["model"] == gateway.AGENT_MODEL
+        assert body["user"] == "s1"
+        assert auth == "Bearer test-token"
+
+    @pytest.mark.asyncio
+    async def test_sessions_list_unwraps_result(self):
+        """Test that sessions_list returns the sessions array."""
+        assert await gateway.sessions_list() == [{"key": "main"}]
+
+    @pytest.mark.asyncio
+    async def test_sessions_history_passes_limit(self):
+        """Test that history requests honour the limit."""
+        history = await gateway.sessions_history("main", 3)
+        assert [m["content"] for m in history] == ["msg 0", "msg 1", "msg 2"]
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self, stub):
+        """Test that 503s from the gateway are retried for idempotent calls."""
+        stub.state.fail_next = 2
+        assert await gateway.sessions_list() == [{"key": "main"}]
+        assert len(stub.state.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, stub):
+        """Test that persistent errors raise GatewayError."""
+        stub.state.fail_next = 10
+        with pytest.raises(gateway.GatewayError):
+            await gateway.sessions_list()
+        assert len(stub.state.calls) == gateway.GATEWAY_MAX_RETRIES + 1
+
+    @pytest.mark.asyncio
+    async def test_tool_error_raises(self):
+        """Test that an ok=false tool response raises GatewayError."""
+        with pytest.raises(gateway.GatewayError, match="unknown tool"):
+            await gateway.invoke_tool("nope", {})
+
+    @pytest.mark.asyncio
+    async def test_unreachable_gateway(self):
+        """Test that connection failures raise GatewayUnavailable."""
+        def refuse(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(refuse), base_url="http://gateway")
+        with patch.object(gateway, "_client", client):
+            with pytest.raises(gateway.GatewayUnavailable):
+                await gateway.agent("ls")
+        await client.aclose()
+
+
+class TestWhatsAppDelivery:
+    @pytest.mark.asyncio
+    async def test_send_uses_message_tool(self, stub):
+        """Test that WhatsApp notifications go through the gateway message tool."""
+        ok = await notify._send_whatsapp("+15550001", "Task completed:\n\ndone")
+
+        assert ok
+        tool, args, _ = stub.state.calls[0]
+        assert tool == "message"
+        assert args["channel"] == "whatsapp"
+        assert args["to"] == "+15550001"
+        assert "Task completed" in args["message"]
+
+    @pytest.mark.asyncio
+    async def test_send_failure_returns_false(self, stub):
+        """Test that delivery errors are reported as False, not raised."""
+        stub.state.fail_next = 10
+        assert not await notify._send_whatsapp("+15550001", "q?")
@@ -0,0 +1,55 @@
+import pytest
+import httpx
+from unittest.mock import patch
+from orchestrator import health
+
+
+class TestBackoff:
+    def test_steady_interval_when_healthy(self):
+        """Test that healthy backends are probed at the base interval."""
+        assert health.next_delay(0) == health.HEALTH_PROBE_INTERVAL_SECONDS
+
+    def test_doubles_per_failure_up_to_cap(self):
+        """Test exponential backoff while a backend is down."""
+        with patch("orchestrator.health.HEALTH_PROBE_INTERVAL_SECONDS", 1), \
+             patch("orchestrator.health.HEALTH_PROBE_MAX_BACKOFF_SECONDS", 10):
+            assert [health.next_delay(n) for n in range(1, 6)] == [2, 4, 8, 10, 10]
+
+    def test_record_tracks_failures(self):
+        """Test that consecutive failures are counted and reset on success."""
+        with patch.dict(health._state["moltbot"], {"status": "unknown", "checked_at": None, "failures": 0}):
+            health.record("moltbot", "error: timeout")
+            health.record("moltbot", "error: timeout")
+            assert health._state["moltbot"]["failures"] == 2
+            health.record("moltbot", "ok")
+            assert health._state["moltbot"]["failures"] == 0
+
+
+class TestProbes:
+    @pytest.mark.asyncio
+    async def test_moshi_probe_uses_head(self):
+        """Test that the Moshi probe is a body-less HEAD request."""
+        seen = []
+
+        def handler(request):
+            seen.append(request.method)
+            return httpx.Response(200)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await health.probe_moshi(client) == "ok"
+        assert seen == ["HEAD"]
+
+    @pytest.mark.asyncio
+    async def test_moshi_probe_server_error(self):
+        """Test that a 5xx from Moshi is reported as an error."""
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(502))) as client:
+            assert await health.probe_moshi(client) == "error: HTTP 502"
+
+    @pytest.mark.asyncio
+    async def test_moltbot_probe_connection_refused(self):
+        """Test that connection failures are described like the old inline checks."""
+        def refuse(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(refuse)) as client:
+            assert await health.probe_moltbot(client) == "error: connection refused"
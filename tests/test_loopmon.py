@@ -0,0 +1,46 @@
+import asyncio
+import time
+import pytest
+from orchestrator import loopmon
+
+
+def _hog_the_loop():
+    time.sleep(0.3)
+
+
+class TestLoopMonitor:
+    @pytest.mark.asyncio
+    async def test_blocking_call_reported_with_stack(self):
+        """Test that a blocking callback is counted, timed and its stack captured."""
+        blocked_before = loopmon.stats()["blocked"]
+        lag_before = loopmon.LAG_SECONDS.count()
+        await loopmon.start(enabled=True, interval=0.02, threshold=0.05)
+        try:
+            await asyncio.sleep(0.05)
+            _hog_the_loop()
+            await asyncio.sleep(0.1)
+        finally:
+            await loopmon.stop()
+
+        stats = loopmon.stats()
+        assert stats["blocked"] == blocked_before + 1
+        assert "_hog_the_loop" in stats["last_blocked_stack"]
+        assert stats["max_lag_seconds"] >= 0.2
+        assert loopmon.LAG_SECONDS.count() > lag_before
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_not_reported(self):
+        blocked_before = loopmon.stats()["blocked"]
+        await loopmon.start(enabled=True, interval=0.02, threshold=0.1)
+        try:
+            await asyncio.sleep(0.2)
+        finally:
+            await loopmon.stop()
+
+        assert loopmon.stats()["blocked"] == blocked_before
+
+    @pytest.mark.asyncio
+    async def test_disabled_is_a_no_op(self):
+        await loopmon.start(enabled=False)
+        assert loopmon._task is None
+        await loopmon.stop()
@@ -1,24 +1,50 @@
 import pytest
 import pytest_asyncio
 import asyncio
+import json
 import time
 from unittest.mock import AsyncMock, MagicMock, patch, call
 from httpx import AsyncClient, ASGITransport
+from orchestrator import endpointing, gateway, llm, prompts, store, tracing
+from orchestrator import results as result_cache
+from orchestrator import health as backend_health
 from orchestrator.main import (
     app,
+    lifespan,
     is_confirmation,
     _pending,
     _pending_lock,
+    _pending_expiry,
     CONFIRMATION_KEYWORDS,
+    _executions,
+    _recover_executions,
+    run_moltbot_long,
 )
+from orchestrator.events import EventLog
+from orchestrator.execution import ExecutionContext, ExecutionState, context_to_dict
 
 
 @pytest.fixture(autouse=True)
 def clear_pending():
     """Clear pending commands before each test."""
     _pending.clear()
+    _pending_expiry.clear()
+    result_cache._cache.clear()
+    prompts.clear()
     yield
     _pending.clear()
+    _pending_expiry.clear()
+    result_cache._cache.clear()
+    prompts.clear()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def execution_store(tmp_path):
+    """Give each test its own on-disk execution store, as the app lifespan would."""
+    path = str(tmp_path / "executions.db")
+    await store.start(path)
+    yield path
+    await store.stop()
 
 
 @pytest_asyncio.fixture
@@ -37,6 +63,123 @@ class TestHealth:
         assert response.status_code == 200
         assert response.json() == {"status": "ok"}
 
+    @pytest.mark.asyncio
+    async def test_health_deep_answers_from_cache(self, async_client):
+        """Test /health/deep reports cached probe results without probing."""
+        with patch.dict(backend_health._state["moshi"], {"status": "unknown", "checked_at": None, "failures": 0}), \
+             patch.dict(backend_health._state["moltbot"], {"status": "unknown", "checked_at": None, "failures": 0}), \
+             patch("orchestrator.health.probe_moshi", new_callable=AsyncMock) as mock_probe:
+            backend_health.record("moshi", "ok")
+            backend_health.record("moltbot", "ok")
+
+            response = await async_client.get("/health/deep")
+
+            mock_probe.assert_not_called()
+            assert response.status_code == 200
+            body = response.json()
+            assert body["status"] == "ok"
+            assert body["checks"] == {"orchestrator": "ok", "moshi": "ok", "moltbot": "ok"}
+            assert body["check_age_seconds"]["moshi"] < 1
+
+    @pytest.mark.asyncio
+    async def test_health_deep_unhealthy_after_grace(self, async_client):
+        """Test /health/deep returns 503 when moshi is down after the grace period."""
+        with patch.dict(backend_health._state["moshi"], {"status": "unknown", "checked_at": None, "failures": 0}), \
+             patch.dict(backend_health._state["moltbot"], {"status": "unknown", "checked_at": None, "failures": 0}), \
+             patch("orchestrator.main._startup_time", time.time() - 3600):
+            backend_health.record("moshi", "error: connection refused")
+            backend_health.record("moltbot", "ok")
+
+            response = await async_client.get("/health/deep")
+
+            assert response.status_code == 503
+            assert response.json()["status"] == "unhealthy"
+
+
+class TestLifespan:
+    @pytest.mark.asyncio
+    async def test_startup_and_shutdown(self, execution_store):
+        """Test that the lifespan runs end to end, including the cron setup."""
+        with patch("orchestrator.main.store.start", new_callable=AsyncMock), \
+             patch("orchestrator.main.backend_health.start", new_callable=AsyncMock), \
+             patch("orchestrator.main.backend_health.stop", new_callable=AsyncMock), \
+             patch("orchestrator.main.notify.start", new_callable=AsyncMock), \
+             patch("orchestrator.main.notify.stop", new_callable=AsyncMock), \
+             patch("orchestrator.main.pool.start", new_callable=AsyncMock), \
+             patch("orchestrator.main.tracing.start"), \
+             patch("orchestrator.main.asyncio.create_subprocess_exec", side_effect=FileNotFoundError) as mock_exec:
+            async with lifespan(app):
+                pass
+
+        assert mock_exec.call_args[0][:3] == ("moltbot", "cron", "add")
+        await store.start(execution_store)
+
+
+class TestMetrics:
+    @pytest.mark.asyncio
+    async def test_metrics_count_command_outcomes(self, async_client):
+        """Test that /metrics exposes command counters and live gauges."""
+        from orchestrator.main import COMMANDS, MOLTBOT_SECONDS
+        before = {o: COMMANDS.value(outcome=o) for o in ("blocked", "pending", "executed")}
+        gateway_runs = MOLTBOT_SECONDS.count(mode="gateway")
+
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", new_callable=AsyncMock) as mock_extract, \
+             patch("orchestrator.main.gateway.agent", new_callable=AsyncMock) as mock_agent:
+            mock_extract.return_value = {"commands": ["df -h", "rm -rf /", "docker stop web"]}
+            mock_agent.return_value = "ok"
+            await async_client.post("/execute", json={"transcript": ["go"], "session_id": "s1"})
+
+            response = await async_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        for outcome in ("blocked", "pending", "executed"):
+            assert COMMANDS.value(outcome=outcome) == before[outcome] + 1
+            assert f'orchestrator_commands_total{{outcome="{outcome}"}}' in body
+        assert MOLTBOT_SECONDS.count(mode="gateway") == gateway_runs + 1
+        assert "orchestrator_pending_confirmations 1" in body
+        assert "orchestrator_live_executions 0" in body
+        assert "# TYPE orchestrator_llm_extraction_seconds histogram" in body
+        cache = llm.cache_stats()
+        assert f"orchestrator_llm_cache_entries {cache['size']}" in body
+        assert f"orchestrator_llm_cache_hits {cache['hits']}" in body
+        assert f"orchestrator_llm_cache_misses {cache['misses']}" in body
+
+
+class TestTracing:
+    @pytest.mark.asyncio
+    async def test_process_trace_follows_client_id(self, async_client, tmp_path):
+        """Test that /process echoes the client's trace ID and records each stage."""
+        path = tmp_path / "traces.jsonl"
+        tracing.start(str(path))
+        try:
+            with patch("orchestrator.main.llm.extract_command", new_callable=AsyncMock) as mock_extract, \
+                 patch("orchestrator.main.gateway.agent", new_callable=AsyncMock) as mock_agent:
+                mock_extract.return_value = {"command": "df -h"}
+                mock_agent.return_value = "ok"
+                response = await async_client.post(
+                    "/process",
+                    json={"transcript": "how full is my storage", "session_id": "s1"},
+                    headers={"X-Trace-Id": "client-trace-1"},
+                )
+        finally:
+            tracing.stop()
+
+        assert response.headers["x-trace-id"] == "client-trace-1"
+        (trace,) = [json.loads(line) for line in path.read_text().splitlines()]
+        assert trace["trace_id"] == "client-trace-1"
+        assert trace["name"] == "POST /process"
+        assert trace["status"] == 200
+        assert [s["name"] for s in trace["spans"]] == [
+            "confirmation_lookup",
+            "intent.match_command",
+            "llm.extract_command",
+            "safety.validate_command",
+            "run_moltbot",
+            "gateway.agent",
+        ]
+
 
 class TestConfirmationDetection:
     def test_confirm_keyword_matches(self):
@@ -121,7 +264,7 @@ class TestProcessEndpoint:
             mock_run.return_value = "file1\nfile2"
 
             response = await async_client.post("/process", json={
-                "transcript": "list the files",
+                "transcript": "what did I put in the workspace",
                 "session_id": "session1"
             })
 
@@ -130,6 +273,22 @@ class TestProcessEndpoint:
             mock_extract.assert_called_once()
             mock_run.assert_called_once_with("ls -la")
 
+    @pytest.mark.asyncio
+    async def test_process_known_phrase_skips_llm(self, async_client):
+        """Test that a known phrasing is resolved locally without the LLM."""
+        with patch("orchestrator.main.llm.extract_command") as mock_extract, \
+             patch("orchestrator.main.run_moltbot", new_callable=AsyncMock) as mock_run:
+
+            mock_run.return_value = "Filesystem ..."
+
+            response = await async_client.post("/process", json={
+                "transcript": "Check disk space, please."
+            })
+
+            assert response.json() == {"response": "Filesystem ..."}
+            mock_extract.assert_not_called()
+            mock_run.assert_called_once_with("df -h")
+
     @pytest.mark.asyncio
     async def test_process_blocks_unsafe_command(self, async_client):
         """Test /process endpoint blocks unsafe commands."""
@@ -217,6 +376,29 @@ class TestProcessEndpoint:
             # Should have processed as new request, not confirmed
             assert "session1" not in _pending
 
+    @pytest.mark.asyncio
+    async def test_pending_dropped_at_deadline(self, async_client):
+        """Test that an unconfirmed command expires on time without another request."""
+        with patch("orchestrator.main.llm.extract_command") as mock_extract, \
+             patch("orchestrator.main.PENDING_COMMAND_TTL_SECONDS", 0.05):
+            mock_extract.return_value = {"command": "docker stop abc"}
+            await async_client.post("/process", json={
+                "transcript": "stop the docker container",
+                "session_id": "session1"
+            })
+        from orchestrator.main import PENDING_EXPIRED
+        assert "session1" in _pending
+        expired_before = PENDING_EXPIRED.value()
+
+        await asyncio.sleep(0.1)
+
+        assert "session1" not in _pending
+        assert "session1" not in store.load_pending()
+        assert PENDING_EXPIRED.value() == expired_before + 1
+        metrics_text = (await async_client.get("/metrics")).text
+        assert f"orchestrator_pending_expired_total {expired_before + 1}" in metrics_text
+        assert "orchestrator_pending_expiry_heap_size 0" in metrics_text
+
     @pytest.mark.asyncio
     async def test_concurrent_confirmation_no_keyerror(self, async_client):
         """Test that concurrent confirmations don't cause KeyError with lock."""
@@ -253,14 +435,38 @@ class TestProcessEndpoint:
 
             mock_extract.return_value = {"command": "ls"}
 
+            with patch("orchestrator.main.gateway.agent", new_callable=AsyncMock) as mock_agent:
+                mock_agent.return_value = large_output
+                response = await async_client.post("/process", json={
+                    "transcript": "list files"
+                })
+
+            result = response.json()["response"]
+            assert len(result) < 150_000
+            assert "truncated" in result
+            assert "150000" in result  # Should show original size
+
+    @pytest.mark.asyncio
+    async def test_large_cli_output_truncated(self, async_client):
+        """Test that large output is truncated when falling back to the CLI."""
+        large_output = "x" * (150_000)  # 150KB output
+
+        with patch("orchestrator.main.llm.extract_command") as mock_extract, \
+             patch("orchestrator.main.gateway.agent", new_callable=AsyncMock) as mock_agent:
+
+            mock_extract.return_value = {"command": "ls"}
+            mock_agent.side_effect = gateway.GatewayUnavailable("down")
+
             # Create a custom mock for subprocess that returns large output
             async def mock_create_subprocess(*args, **kwargs):
-                mock_proc = AsyncMock()
-                mock_proc.communicate.return_value = (large_output.encode(), b"")
-                mock_proc.returncode = 0
+                mock_proc = _streaming_proc()
+                mock_proc.stdout.feed_data(large_output.encode())
+                mock_proc.stdout.feed_eof()
+                mock_proc.stderr.feed_eof()
+                mock_proc.exit()
                 return mock_proc
 
-            with patch("asyncio.create_subprocess_exec", side_effect=mock_create_subprocess):
+            with patch("asyncio.create_subprocess_exec", side_effect=mock_create_subprocess) as mock_exec:
                 response = await async_client.post("/process", json={
                     "transcript": "list files"
                 })
@@ -269,6 +475,24 @@ class TestProcessEndpoint:
             assert len(result) < 150_000
             assert "truncated" in result
             assert "150000" in result  # Should show original size
+            assert mock_exec.call_args.args[:3] == ("moltbot", "agent", "--message")
+
+    @pytest.mark.asyncio
+    async def test_gateway_error_reported(self, async_client):
+        """Test that a gateway error is surfaced without falling back to the CLI."""
+        with patch("orchestrator.main.llm.extract_command") as mock_extract, \
+             patch("orchestrator.main.gateway.agent", new_callable=AsyncMock) as mock_agent, \
+             patch("asyncio.create_subprocess_exec") as mock_exec:
+
+            mock_extract.return_value = {"command": "ls"}
+            mock_agent.side_effect = gateway.GatewayError("Gateway HTTP 500: boom")
+
+            response = await async_client.post("/process", json={
+                "transcript": "list files"
+            })
+
+            assert response.json()["response"].startswith("Command failed: Gateway HTTP 500")
+            mock_exec.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_normal_output_not_truncated(self, async_client):
@@ -369,3 +593,767 @@ class TestExecuteEndpoint:
             assert response.status_code == 200
             result = response.json()
             assert result["results"][0]["status"] == "needs_confirmation"
+
+    @pytest.mark.asyncio
+    async def test_execute_runs_safe_commands_concurrently(self, async_client):
+        """Test that read-only commands overlap and results keep their order."""
+        order = ["df -h", "free -h", "docker ps"]
+        started: set[str] = set()
+        all_started = asyncio.Event()
+        finished = {cmd: asyncio.Event() for cmd in order}
+
+        async def slow_run(cmd):
+            started.add(cmd)
+            if started == set(order):
+                all_started.set()
+            # Run one at a time and this never fires
+            await asyncio.wait_for(all_started.wait(), timeout=2)
+            # Finish last-to-first, so completion order differs from request order
+            for later in order[order.index(cmd) + 1:]:
+                await finished[later].wait()
+            finished[cmd].set()
+            return f"out:{cmd}"
+
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", new_callable=AsyncMock) as mock_extract, \
+             patch("orchestrator.main.run_moltbot", side_effect=slow_run):
+            mock_extract.return_value = {"commands": ["df -h", "rm -rf /", "free -h", "docker stop abc", "docker ps"]}
+
+            response = await async_client.post("/execute", json={"transcript": ["check everything"]})
+
+        results = response.json()["results"]
+        assert all_started.is_set()
+        assert [r["command"] for r in results] == ["df -h", "rm -rf /", "free -h", "docker stop abc", "docker ps"]
+        assert [r["status"] for r in results] == [
+            "executed", "blocked", "executed", "needs_confirmation", "executed",
+        ]
+        assert results[0]["output"] == "out:df -h"
+        assert results[2]["output"] == "out:free -h"
+        assert results[4]["output"] == "out:docker ps"
+
+    @pytest.mark.asyncio
+    async def test_execute_starts_commands_while_extraction_streams(self, async_client):
+        """Test that the first command runs before the model has finished the list."""
+        first_started = asyncio.Event()
+
+        async def streaming_extract(transcript, context, on_command=None):
+            on_command("df -h")
+            await asyncio.wait_for(first_started.wait(), timeout=1)
+            on_command("rm -rf /")
+            on_command("free -h")
+            return {"commands": ["df -h", "rm -rf /", "free -h"]}
+
+        async def run(cmd):
+            first_started.set()
+            return f"out:{cmd}"
+
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", side_effect=streaming_extract), \
+             patch("orchestrator.main.run_moltbot", side_effect=run):
+            response = await async_client.post("/execute", json={"transcript": ["check everything"]})
+
+        results = response.json()["results"]
+        assert [(r["command"], r["status"]) for r in results] == [
+            ("df -h", "executed"), ("rm -rf /", "blocked"), ("free -h", "executed"),
+        ]
+        assert results[2]["output"] == "out:free -h"
+
+    @pytest.mark.asyncio
+    async def test_execute_reconciles_commands_the_stream_skipped(self, async_client):
+        """Test that a command missing from the stream runs once and streamed ones aren't repeated."""
+        async def streaming_extract(transcript, context, on_command=None):
+            # The incremental parser skipped the first element
+            on_command("df -h")
+            on_command("docker ps")
+            return {"commands": ["free -h", "df -h", "docker ps"]}
+
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", side_effect=streaming_extract), \
+             patch("orchestrator.main.run_moltbot", new_callable=AsyncMock) as mock_run:
+            mock_run.return_value = "ok"
+            response = await async_client.post("/execute", json={"transcript": ["check everything"]})
+
+        results = response.json()["results"]
+        assert sorted(r["command"] for r in results) == ["df -h", "docker ps", "free -h"]
+        assert sorted(call.args[0] for call in mock_run.await_args_list) == ["df -h", "docker ps", "free -h"]
+
+    @pytest.mark.asyncio
+    async def test_execute_respects_concurrency_limit(self, async_client):
+        """Test that no more than EXECUTE_CONCURRENCY commands run at once."""
+        running = 0
+        peak = 0
+
+        async def tracked_run(cmd):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "ok"
+
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", new_callable=AsyncMock) as mock_extract, \
+             patch("orchestrator.main.run_moltbot", side_effect=tracked_run), \
+             patch("orchestrator.main.EXECUTE_CONCURRENCY", 2):
+            mock_extract.return_value = {"commands": ["ls", "df -h", "free -h", "ps aux", "docker ps"]}
+
+            response = await async_client.post("/execute", json={"transcript": ["check everything"]})
+
+        assert len(response.json()["results"]) == 5
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_identical_read_only_commands_share_one_run(self, async_client):
+        """Test that concurrent and repeated read-only requests reuse one execution."""
+        calls = []
+
+        async def slow_run(cmd):
+            calls.append(cmd)
+            await asyncio.sleep(0.05)
+            return f"out:{cmd}"
+
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", new_callable=AsyncMock) as mock_extract, \
+             patch("orchestrator.main.run_moltbot", side_effect=slow_run):
+            mock_extract.return_value = {"commands": ["df -h", "df -h"]}
+
+            first, second = await asyncio.gather(
+                async_client.post("/execute", json={"transcript": ["disk?"]}),
+                async_client.post("/process", json={"transcript": "show disk usage"}),
+            )
+            third = await async_client.post("/process", json={"transcript": "show disk usage"})
+
+        assert calls == ["df -h"]
+        assert [r["output"] for r in first.json()["results"]] == ["out:df -h", "out:df -h"]
+        assert second.json()["response"] == third.json()["response"] == "out:df -h"
+        assert result_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_output_not_cached(self, async_client):
+        """Test that an error message is not served to the next request."""
+        with patch("orchestrator.main.run_moltbot", new_callable=AsyncMock) as mock_run:
+            mock_run.side_effect = ["Command execution timed out after 30s.", "fine"]
+
+            await async_client.post("/process", json={"transcript": "show disk usage"})
+            response = await async_client.post("/process", json={"transcript": "show disk usage"})
+
+        assert response.json()["response"] == "fine"
+        assert mock_run.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_confirmed_destructive_command_never_cached(self, async_client):
+        """Test that confirmed commands always run and leave nothing in the cache."""
+        with patch("orchestrator.main.run_moltbot", new_callable=AsyncMock) as mock_run:
+            mock_run.return_value = "stopped"
+            for _ in range(2):
+                async with _pending_lock:
+                    _pending["s1"] = {"command": "docker stop web", "expires": time.time() + 60}
+                await async_client.post("/process", json={"transcript": "confirm", "session_id": "s1"})
+
+        assert mock_run.call_count == 2
+        assert result_cache.stats()["size"] == 0
+
+
+def _parse_sse(body: str) -> list[tuple[int, str, dict]]:
+    """Parse an SSE body into (id, event, data) tuples, skipping comments."""
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if not line.startswith(":")
+        )
+        if fields:
+            parsed.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+class TestContextEvents:
+    @pytest.mark.asyncio
+    async def test_stream_pushes_question_and_result(self, async_client):
+        """Test that the event stream carries state, question, answer and result events."""
+        need_input = "<<<NEED_INPUT>>>\nWhich container?\n<<<CONTEXT>>>\nRestarting\n<<<END_INPUT>>>"
+
+        with patch("orchestrator.main.run_moltbot_long", new_callable=AsyncMock) as mock_long, \
+             patch("orchestrator.main.NOTIFY_ON_QUESTION", False), \
+             patch("orchestrator.main.NOTIFY_ON_COMPLETE", False):
+            mock_long.side_effect = [need_input, "All done"]
+
+            response = await async_client.post("/execute/background", json={
+                "transcript": "check containers",
+                "commands": ["docker ps"],
+            })
+            session_id = response.json()["session_id"]
+
+            async def answer_when_asked():
+                ctx = _executions[session_id]["ctx"]
+                while ctx.state != ExecutionState.WAITING_FOR_INPUT:
+                    await asyncio.sleep(0.01)
+                await async_client.post(f"/resume/{session_id}", json={"answer": "web"})
+
+            stream, _ = await asyncio.gather(
+                async_client.get(f"/context/{session_id}/events", params={"after": 0}),
+                answer_when_asked(),
+            )
+
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(stream.text)
+        kinds = [kind for _, kind, _ in events]
+        assert kinds == ["state", "question", "answer", "state", "result"]
+        assert [seq for seq, _, _ in events] == [1, 2, 3, 4, 5]
+        assert events[1][2]["question"] == "Which container?"
+        assert events[2][2]["answer"] == "web"
+        assert events[4][2] == {**events[4][2], "state": "completed", "output": "All done"}
+
+    @pytest.mark.asyncio
+    async def test_stream_resumes_from_last_event_id(self, async_client):
+        """Test that reconnecting with Last-Event-ID only replays newer events."""
+        ctx = ExecutionContext(commands=["df -h"])
+        log = EventLog()
+        _executions[ctx.session_id] = {"ctx": ctx, "event": asyncio.Event(), "events": log}
+        try:
+            log.publish("state", {"state": "running"})
+            log.publish("question", {"question": "q?"})
+            log.publish("result", {"state": "completed", "output": "ok"})
+            log.close()
+
+            response = await async_client.get(
+                f"/context/{ctx.session_id}/events", headers={"Last-Event-ID": "2"}
+            )
+        finally:
+            _executions.pop(ctx.session_id, None)
+
+        assert _parse_sse(response.text) == [(3, "result", {"state": "completed", "output": "ok"})]
+
+    @pytest.mark.asyncio
+    async def test_stream_starts_with_snapshot(self, async_client):
+        """Test that a fresh subscriber gets the full context first."""
+        ctx = ExecutionContext(commands=["df -h"], state=ExecutionState.COMPLETED)
+        log = EventLog()
+        _executions[ctx.session_id] = {"ctx": ctx, "event": asyncio.Event(), "events": log}
+        try:
+            log.publish("result", {"state": "completed", "output": "ok"})
+            log.close()
+
+            response = await async_client.get(f"/context/{ctx.session_id}/events")
+        finally:
+            _executions.pop(ctx.session_id, None)
+
+        events = _parse_sse(response.text)
+        assert len(events) == 1
+        seq, kind, data = events[0]
+        assert (seq, kind) == (1, "snapshot")
+        assert data["commands"] == ["df -h"]
+        assert data["state"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_stream_unknown_session(self, async_client):
+        """Test that streaming an unknown session returns 404."""
+        response = await async_client.get("/context/nope/events")
+        assert response.status_code == 404
+
+
+class TestPersonaPlexPrompt:
+    @pytest.mark.asyncio
+    async def test_no_session_returns_general_prompt(self, async_client):
+        """Test that the idle prompt needs no session lookup."""
+        response = await async_client.get("/personaplex/prompt")
+        assert "VPS admin assistant" in response.json()["text_prompt"]
+
+    @pytest.mark.asyncio
+    async def test_prompt_follows_execution_without_gateway(self, async_client):
+        """Test that execution changes refresh the prompt and reads skip Moltbot."""
+        need_input = "<<<NEED_INPUT>>>\nWhich container?\n<<<CONTEXT>>>\nRestarting\n<<<END_INPUT>>>"
+
+        with patch("orchestrator.main.run_moltbot_long", new_callable=AsyncMock) as mock_long, \
+             patch("orchestrator.main.gateway.sessions_history", new_callable=AsyncMock) as mock_history, \
+             patch("orchestrator.main.NOTIFY_ON_QUESTION", False), \
+             patch("orchestrator.main.NOTIFY_ON_COMPLETE", False):
+            mock_long.side_effect = [need_input, "All containers healthy"]
+
+            response = await async_client.post("/execute/background", json={
+                "transcript": "check containers",
+                "commands": ["docker ps"],
+            })
+            session_id = response.json()["session_id"]
+            ctx = _executions[session_id]["ctx"]
+            while ctx.state != ExecutionState.WAITING_FOR_INPUT:
+                await asyncio.sleep(0.01)
+
+            asking = await async_client.get("/personaplex/prompt", params={"session_id": session_id})
+
+            await async_client.post(f"/resume/{session_id}", json={"answer": "web"})
+            while ctx.state != ExecutionState.COMPLETED:
+                await asyncio.sleep(0.01)
+            done = await async_client.get("/personaplex/prompt", params={"session_id": session_id})
+
+        mock_history.assert_not_called()
+        assert "Which container?" in asking.json()["text_prompt"]
+        assert "All containers healthy" in done.json()["text_prompt"]
+        assert done.json()["session_id"] == session_id
+        assert prompts.stats()["misses"] == 0
+
+    @pytest.mark.asyncio
+    async def test_miss_rebuilds_from_history_once(self, async_client):
+        """Test that an unknown session is built from Moltbot history, then served from memory."""
+        with patch("orchestrator.main.gateway.sessions_history", new_callable=AsyncMock) as mock_history:
+            mock_history.return_value = [{"role": "assistant", "content": "Disk is 80% full"}]
+
+            first = await async_client.get("/personaplex/prompt", params={"session_id": "main"})
+            second = await async_client.get("/personaplex/prompt", params={"session_id": "main"})
+
+        mock_history.assert_awaited_once_with("main", 10)
+        assert first.json() == second.json()
+        assert "Disk is 80% full" in first.json()["text_prompt"]
+
+    @pytest.mark.asyncio
+    async def test_history_failure_not_cached(self, async_client):
+        """Test that a failed rebuild reports the error and retries next time."""
+        with patch("orchestrator.main.gateway.sessions_history", new_callable=AsyncMock) as mock_history:
+            mock_history.side_effect = [gateway.GatewayError("down"), []]
+
+            failed = await async_client.get("/personaplex/prompt", params={"session_id": "main"})
+            retried = await async_client.get("/personaplex/prompt", params={"session_id": "main"})
+
+        assert "error" in failed.json()
+        assert "No specific task in progress." in retried.json()["text_prompt"]
+        assert mock_history.await_count == 2
+
+
+class TestBackgroundScheduling:
+    @pytest.mark.asyncio
+    async def test_queue_visible_and_full_queue_rejected(self, async_client):
+        """Test that excess runs show as queued and a full queue answers 429."""
+        from orchestrator.scheduler import Scheduler
+        release = asyncio.Event()
+
+        async def slow_agent(*args, **kwargs):
+            await release.wait()
+            return "done"
+
+        with patch("orchestrator.main.scheduler._scheduler", Scheduler(1, 1)), \
+             patch("orchestrator.main.run_moltbot_long", side_effect=slow_agent), \
+             patch("orchestrator.main.NOTIFY_ON_COMPLETE", False):
+            body = {"transcript": "check", "commands": ["df -h"]}
+            first = (await async_client.post("/execute/background", json=body)).json()["session_id"]
+            second = (await async_client.post("/execute/background", json=body)).json()["session_id"]
+            rejected = await async_client.post("/execute/background", json=body)
+            await asyncio.sleep(0.01)
+
+            states = [
+                (await async_client.get(f"/context/{sid}")).json()["state"] for sid in (first, second)
+            ]
+            release.set()
+            while second in _executions:
+                await asyncio.sleep(0.01)
+            done = (await async_client.get(f"/context/{second}")).json()["state"]
+
+        assert rejected.status_code == 429
+        assert int(rejected.headers["retry-after"]) >= 1
+        assert states == ["running", "queued"]
+        assert done == "completed"
+
+
+class TestCancelExecution:
+    @pytest.mark.asyncio
+    async def test_cancel_running_execution(self, async_client):
+        """Test that DELETE stops a running agent and marks the run cancelled."""
+        started = asyncio.Event()
+
+        async def hung_agent(*args, **kwargs):
+            started.set()
+            await asyncio.Event().wait()
+
+        with patch("orchestrator.main.run_moltbot_long", side_effect=hung_agent):
+            response = await async_client.post("/execute/background", json={
+                "transcript": "check", "commands": ["df -h"],
+            })
+            session_id = response.json()["session_id"]
+            await started.wait()
+
+            cancelled = (await async_client.delete(f"/execute/{session_id}")).json()
+            again = (await async_client.delete(f"/execute/{session_id}")).json()
+
+        context = (await async_client.get(f"/context/{session_id}")).json()
+        assert cancelled == {"session_id": session_id, "state": "cancelled"}
+        assert session_id not in _executions
+        assert context["state"] == "cancelled"
+        assert "cancelled" in again["error"]
+
+    @pytest.mark.asyncio
+    async def test_cancel_before_task_starts(self, async_client):
+        """Test that cancelling right after accept frees the slot, the queue place and the entry."""
+        from orchestrator.main import _accept_background, cancel_execution
+        from orchestrator.scheduler import Scheduler
+
+        with patch("orchestrator.main.scheduler._scheduler", Scheduler(1, 1)) as sched, \
+             patch("orchestrator.main.run_moltbot_long", new_callable=AsyncMock) as mock_long:
+            running = _accept_background("check", ["df -h"], 0)
+            queued = _accept_background("check", ["free -h"], 0)
+            responses = [await cancel_execution(ctx.session_id) for ctx in (running, queued)]
+
+            assert sched.stats()["running"] == 0
+            assert sched.stats()["queued"] == 0
+        mock_long.assert_not_called()
+        assert [r["state"] for r in responses] == ["cancelled", "cancelled"]
+        for ctx in (running, queued):
+            assert ctx.session_id not in _executions
+            context = (await async_client.get(f"/context/{ctx.session_id}")).json()
+            assert context["state"] == "cancelled"
+
+    @pytest.mark.asyncio
+    async def test_cancel_unknown_session(self, async_client):
+        response = await async_client.delete("/execute/nope")
+        assert response.json() == {"error": "Session not found"}
+
+    @pytest.mark.asyncio
+    async def test_timeout_terminates_process_group(self):
+        """Test that a timed-out CLI command is killed before its worker is released."""
+        from orchestrator.main import _run_moltbot_cli
+        proc = AsyncMock()
+        proc.returncode = None
+        released_at_terminate = []
+
+        async def never_finishes(proc):
+            await asyncio.Event().wait()
+
+        def times_out(aw, timeout):
+            aw.close()
+            raise asyncio.TimeoutError
+
+        with patch("orchestrator.main.pool.acquire") as mock_acquire, \
+             patch("orchestrator.main._capture_output", never_finishes), \
+             patch("orchestrator.main.pool.terminate", new_callable=AsyncMock) as mock_terminate, \
+             patch("asyncio.wait_for", side_effect=times_out):
+            mock_acquire.return_value.__aenter__.return_value.spawn = AsyncMock(return_value=proc)
+            mock_terminate.side_effect = lambda proc: released_at_terminate.append(
+                mock_acquire.return_value.__aexit__.await_count
+            )
+            result = await _run_moltbot_cli("ls")
+
+        assert "timed out" in result
+        mock_terminate.assert_awaited_once_with(proc)
+        assert released_at_terminate == [0]
+        mock_acquire.return_value.__aexit__.assert_awaited_once()
+
+
+class _WebSocketSession:
+    """Drive the app's WebSocket route over raw ASGI messages on the test loop."""
+
+    def __init__(self, path: str):
+        self._inbound: asyncio.Queue = asyncio.Queue()
+        self._outbound: asyncio.Queue = asyncio.Queue()
+        scope = {
+            "type": "websocket", "path": path, "raw_path": path.encode(), "root_path": "",
+            "scheme": "ws", "query_string": b"", "headers": [], "subprotocols": [],
+            "server": ("test", 80), "client": ("test", 1234),
+        }
+        self._inbound.put_nowait({"type": "websocket.connect"})
+        self._task = asyncio.create_task(app(scope, self._inbound.get, self._outbound.put))
+
+    async def send_json(self, data) -> None:
+        await self._inbound.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json(self) -> dict:
+        while True:
+            message = await asyncio.wait_for(self._outbound.get(), timeout=5)
+            if message["type"] == "websocket.send":
+                return json.loads(message["text"])
+
+    async def close(self) -> None:
+        await self._inbound.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self._task, timeout=5)
+
+
+class TestTranscriptStream:
+    @pytest.mark.asyncio
+    async def test_endpoint_reuses_speculative_extraction(self):
+        """Test that a pause after punctuation ends the utterance and runs its speculation."""
+        hits = endpointing.SPECULATIONS.value(outcome="hit")
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", new_callable=AsyncMock) as mock_extract, \
+             patch("orchestrator.main.run_moltbot_long", new_callable=AsyncMock) as mock_long, \
+             patch("orchestrator.main.NOTIFY_ON_COMPLETE", False):
+            mock_extract.return_value = {"commands": ["df -h"]}
+            mock_long.return_value = "All done"
+            ws = _WebSocketSession("/transcript/stream")
+            for word in ("check", "the", "disk", "space."):
+                await ws.send_json({"type": "word", "text": word})
+
+            endpoint = await ws.receive_json()
+            execution = await ws.receive_json()
+            await ws.close()
+            while execution["session_id"] in _executions:
+                await asyncio.sleep(0.01)
+
+        assert endpoint == {"type": "endpoint", "transcript": "check the disk space."}
+        assert execution["type"] == "execution"
+        mock_extract.assert_awaited_once_with(["check the disk space."], [])
+        assert endpointing.SPECULATIONS.value(outcome="hit") == hits + 1
+
+    @pytest.mark.asyncio
+    async def test_end_message_forces_endpoint(self):
+        """Test that an explicit end closes a short utterance and reports errors."""
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", new_callable=AsyncMock) as mock_extract:
+            mock_extract.return_value = {"commands": []}
+            ws = _WebSocketSession("/transcript/stream")
+            await ws.send_json({"type": "word", "text": "hello"})
+            await ws.send_json({"type": "end"})
+
+            endpoint = await ws.receive_json()
+            error = await ws.receive_json()
+            await ws.close()
+
+        assert endpoint["transcript"] == "hello"
+        assert error["type"] == "error"
+        assert error["status"] == 422
+        # Too short to speculate on: the only extraction is the awaited one at the end
+        mock_extract.assert_awaited_once_with(["hello"], [])
+
+
+    @pytest.mark.asyncio
+    async def test_non_object_messages_ignored(self):
+        """Test that JSON values other than objects are skipped without closing the socket."""
+        with patch("orchestrator.main.llm.extract_commands_from_conversation", new_callable=AsyncMock) as mock_extract:
+            mock_extract.return_value = {"commands": []}
+            ws = _WebSocketSession("/transcript/stream")
+            for junk in ("hi", [1], 3, None):
+                await ws.send_json(junk)
+            await ws.send_json({"type": "word", "text": "hello"})
+            await ws.send_json({"type": "end"})
+
+            endpoint = await ws.receive_json()
+            await ws.receive_json()
+            await ws.close()
+
+        assert endpoint == {"type": "endpoint", "transcript": "hello"}
+
+
+async def _restart_store(path: str) -> None:
+    """Simulate a process restart: drop live runs and reopen the store."""
+    _executions.clear()
+    await store.stop()
+    await store.start(path)
+
+
+class TestDurableExecutions:
+    @pytest.mark.asyncio
+    async def test_finished_run_survives_restart(self, async_client, execution_store):
+        """Test that /context answers from the store after the run and the process are gone."""
+        with patch("orchestrator.main.run_moltbot_long", new_callable=AsyncMock) as mock_long, \
+             patch("orchestrator.main.NOTIFY_ON_COMPLETE", False):
+            mock_long.return_value = "All done"
+            response = await async_client.post("/execute/background", json={
+                "transcript": "check disk",
+                "commands": ["df -h"],
+            })
+            session_id = response.json()["session_id"]
+            for _ in range(100):
+                if session_id not in _executions:
+                    break
+                await asyncio.sleep(0.01)
+
+        assert session_id not in _executions
+        await _restart_store(execution_store)
+
+        context = (await async_client.get(f"/context/{session_id}")).json()
+        assert context["state"] == "completed"
+        assert context["results"] == [{"output": "All done"}]
+
+        stream = await async_client.get(f"/context/{session_id}/events")
+        assert [kind for _, kind, _ in _parse_sse(stream.text)] == ["snapshot"]
+
+    @pytest.mark.asyncio
+    async def test_finished_run_kept_without_persistence(self, async_client, tmp_path):
+        """Test that /context still answers after the run ends when the database is unavailable."""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        await store.stop()
+        await store.start(str(blocker / "executions.db"))
+        with patch("orchestrator.main.run_moltbot_long", new_callable=AsyncMock) as mock_long, \
+             patch("orchestrator.main.NOTIFY_ON_COMPLETE", False):
+            mock_long.return_value = "All done"
+            response = await async_client.post("/execute/background", json={
+                "transcript": "check disk",
+                "commands": ["df -h"],
+            })
+            session_id = response.json()["session_id"]
+            for _ in range(100):
+                if session_id not in _executions:
+                    break
+                await asyncio.sleep(0.01)
+
+        assert session_id not in _executions
+        context = (await async_client.get(f"/context/{session_id}")).json()
+        assert context["state"] == "completed"
+        assert context["results"] == [{"output": "All done"}]
+
+    @pytest.mark.asyncio
+    async def test_resume_after_restart(self, async_client, execution_store):
+        """Test that a question asked before a restart can still be answered."""
+        ctx = ExecutionContext(
+            commands=["docker restart"],
+            state=ExecutionState.WAITING_FOR_INPUT,
+            current_question="Which container?",
+        )
+        store.save(context_to_dict(ctx))
+        await _restart_store(execution_store)
+
+        with patch("orchestrator.main.run_moltbot_long", new_callable=AsyncMock) as mock_long, \
+             patch("orchestrator.main.NOTIFY_ON_COMPLETE", False):
+            mock_long.return_value = "Restarted web"
+            response = await async_client.post(f"/resume/{ctx.session_id}", json={"answer": "web"})
+            assert response.json() == {"session_id": ctx.session_id, "state": "resuming"}
+            for _ in range(100):
+                if ctx.session_id not in _executions:
+                    break
+                await asyncio.sleep(0.01)
+
+        instruction = mock_long.call_args.args[0]
+        assert "Q: Which container?\nA: web" in instruction
+        context = (await async_client.get(f"/context/{ctx.session_id}")).json()
+        assert context["state"] == "completed"
+        assert context["current_question"] is None
+        assert context["answers"] == [{"question": "Which container?", "answer": "web"}]
+
+    @pytest.mark.asyncio
+    async def test_interrupted_runs_marked_failed(self, execution_store):
+        """Test that runs cut off by a restart are failed instead of left running."""
+        running = ExecutionContext(commands=["df -h"], state=ExecutionState.RUNNING)
+        waiting = ExecutionContext(commands=["df -h"], state=ExecutionState.WAITING_FOR_INPUT)
+        store.save(context_to_dict(running))
+        store.save(context_to_dict(waiting))
+        await _restart_store(execution_store)
+
+        _recover_executions()
+
+        assert store.load(running.session_id)["state"] == "failed"
+        assert "restart" in store.load(running.session_id)["error_message"]
+        assert store.load(waiting.session_id)["state"] == "waiting_for_input"
+
+    @pytest.mark.asyncio
+    async def test_pending_confirmation_persisted(self, async_client, execution_store):
+        """Test that a pending destructive command is restored after a restart."""
+        with patch("orchestrator.main.llm.extract_command") as mock_extract:
+            mock_extract.return_value = {"command": "docker stop abc"}
+            await async_client.post("/process", json={
+                "transcript": "stop the docker container",
+                "session_id": "session1",
+            })
+        await _restart_store(execution_store)
+
+        assert store.load_pending()["session1"]["command"] == "docker stop abc"
+
+
+def _streaming_proc(returncode=0):
+    """Fake subprocess whose stdout/stderr are fed by the test."""
+    proc = MagicMock()
+    proc.stdout = asyncio.StreamReader()
+    proc.stderr = asyncio.StreamReader()
+    proc.returncode = returncode
+    exited = asyncio.Event()
+
+    async def wait():
+        await exited.wait()
+        return returncode
+
+    proc.wait = wait
+    proc.exit = exited.set
+    return proc
+
+
+class TestStreamingExecution:
+    @pytest.mark.asyncio
+    async def test_question_surfaced_before_process_exits(self):
+        """Test that NEED_INPUT is reported as soon as its end marker streams past."""
+        proc = _streaming_proc()
+        seen_questions = []
+        partial = []
+
+        async def on_question(parsed):
+            seen_questions.append(parsed["question"])
+
+        with patch("orchestrator.pool.MoltbotWorker.spawn", new_callable=AsyncMock) as mock_spawn, \
+             patch("orchestrator.pool.MoltbotWorker.needs_check", return_value=False):
+            mock_spawn.return_value = proc
+            task = asyncio.create_task(
+                run_moltbot_long("plan", "s1", on_output=partial.append, on_question=on_question)
+            )
+
+            proc.stdout.feed_data(b"Working on it\n<<<NEED_INPUT>>>\nWhich one?\n<<<CON")
+            await asyncio.sleep(0.01)
+            assert seen_questions == []
+            assert "".join(partial).startswith("Working on it")
+
+            proc.stdout.feed_data(b"TEXT>>>\nTwo candidates\n<<<END_INPUT>>>\n")
+            await asyncio.sleep(0.01)
+            assert seen_questions == ["Which one?"]
+            assert not task.done()
+
+            proc.stdout.feed_eof()
+            proc.stderr.feed_eof()
+            proc.exit()
+            output = await asyncio.wait_for(task, timeout=1)
+
+        assert "<<<END_INPUT>>>" in output
+
+    @pytest.mark.asyncio
+    async def test_multibyte_characters_split_across_reads(self):
+        """Test that UTF-8 sequences split between chunks decode cleanly."""
+        proc = _streaming_proc()
+        data = "disk ✓ ok\n".encode()
+
+        with patch("orchestrator.pool.MoltbotWorker.spawn", new_callable=AsyncMock) as mock_spawn, \
+             patch("orchestrator.pool.MoltbotWorker.needs_check", return_value=False):
+            mock_spawn.return_value = proc
+            task = asyncio.create_task(run_moltbot_long("plan", "s1"))
+            for i in range(len(data)):
+                proc.stdout.feed_data(data[i:i + 1])
+                await asyncio.sleep(0)
+            proc.stdout.feed_eof()
+            proc.stderr.feed_eof()
+            proc.exit()
+            output = await asyncio.wait_for(task, timeout=1)
+
+        assert output == "disk ✓ ok\n"
+
+    @pytest.mark.asyncio
+    async def test_partial_output_visible_on_context(self, async_client):
+        """Test that the running agent's output shows up on /context."""
+        proc = _streaming_proc()
+
+        with patch("orchestrator.pool.MoltbotWorker.spawn", new_callable=AsyncMock) as mock_spawn, \
+             patch("orchestrator.pool.MoltbotWorker.needs_check", return_value=False), \
+             patch("orchestrator.main.NOTIFY_ON_COMPLETE", False):
+            mock_spawn.return_value = proc
+            response = await async_client.post("/execute/background", json={
+                "transcript": "check disk",
+                "commands": ["df -h"],
+            })
+            session_id = response.json()["session_id"]
+
+            proc.stdout.feed_data(b"Filesystem  Size\n")
+            await asyncio.sleep(0.01)
+            context = (await async_client.get(f"/context/{session_id}")).json()
+            assert context["state"] == "running"
+            assert context["partial_output"] == "Filesystem  Size\n"
+
+            proc.stdout.feed_eof()
+            proc.stderr.feed_eof()
+            proc.exit()
+            await asyncio.sleep(0.01)
+            context = (await async_client.get(f"/context/{session_id}")).json()
+            assert context["state"] == "completed"
+            assert context["results"] == [{"output": "Filesystem  Size\n"}]
+
+    @pytest.mark.asyncio
+    async def test_long_run_output_is_capped(self):
+        """Test that run_moltbot_long keeps head and tail of huge output only."""
+        proc = _streaming_proc()
+
+        with patch("orchestrator.pool.MoltbotWorker.spawn", new_callable=AsyncMock) as mock_spawn, \
+             patch("orchestrator.pool.MoltbotWorker.needs_check", return_value=False):
+            mock_spawn.return_value = proc
+            task = asyncio.create_task(run_moltbot_long("plan", "s1"))
+            proc.stdout.feed_data(b"START\n" + b"x" * 500_000 + b"\nSUMMARY: all good")
+            proc.stdout.feed_eof()
+            proc.stderr.feed_eof()
+            proc.exit()
+            output = await asyncio.wait_for(task, timeout=1)
+
+        assert len(output) < 110_000
+        assert output.startswith("START")
+        assert output.endswith("SUMMARY: all good")
+        assert "truncated" in output
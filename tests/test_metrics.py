@@ -0,0 +1,52 @@
+from orchestrator.metrics import Counter, Gauge, Histogram
+
+
+class TestMetrics:
+    def test_counter_renders_per_label(self):
+        """Test that each label set gets its own sample."""
+        c = Counter("things_total", "Things.", ("kind",))
+        c.inc(kind="a")
+        c.inc(2, kind="b")
+        c.inc(kind="a")
+
+        assert c.render() == [
+            "# HELP things_total Things.",
+            "# TYPE things_total counter",
+            'things_total{kind="a"} 2',
+            'things_total{kind="b"} 2',
+        ]
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket placement, +Inf, sum and count."""
+        h = Histogram("op_seconds", "Op time.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            h.observe(value)
+
+        lines = h.render()
+        assert 'op_seconds_bucket{le="0.1"} 2' in lines
+        assert 'op_seconds_bucket{le="1.0"} 3' in lines
+        assert 'op_seconds_bucket{le="+Inf"} 4' in lines
+        assert "op_seconds_sum 3.65" in lines
+        assert "op_seconds_count 4" in lines
+
+    def test_histogram_time_observes_on_error(self):
+        """Test that a failing block is still timed."""
+        h = Histogram("op_seconds", "Op time.", ("mode",))
+        try:
+            with h.time(mode="cli"):
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        assert h.count(mode="cli") == 1
+
+    def test_gauge_reads_callback(self):
+        items = [1, 2, 3]
+        g = Gauge("items", "Items.", lambda: len(items))
+        items.append(4)
+        assert g.render()[-1] == "items 4"
+
+    def test_label_values_escaped(self):
+        c = Counter("x_total", "X.", ("v",))
+        c.inc(v='a"b\\c\n')
+        assert c.render()[-1] == 'x_total{v="a\\"b\\\\c\\n"} 1'
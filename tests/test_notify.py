@@ -0,0 +1,104 @@
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, patch
+from orchestrator import notify
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def dispatcher(tmp_path):
+    """Run each test with a fresh dispatcher, fast timings and a temp dead-letter log."""
+    dead_letter = tmp_path / "dead.jsonl"
+    with patch("orchestrator.notify.NOTIFY_DIGEST_WINDOW_SECONDS", 0.05), \
+         patch("orchestrator.notify.NOTIFY_RETRY_BASE_SECONDS", 0), \
+         patch("orchestrator.notify.NOTIFY_DEAD_LETTER_PATH", str(dead_letter)):
+        yield dead_letter
+        await notify.stop()
+
+
+async def _drain():
+    await asyncio.sleep(0.2)
+
+
+class TestDispatcher:
+    @pytest.mark.asyncio
+    async def test_send_returns_without_waiting_for_delivery(self):
+        """Test that queueing a notification doesn't block on the send."""
+        release = asyncio.Event()
+
+        async def slow_send(phone, message):
+            await release.wait()
+            return True
+
+        with patch("orchestrator.notify._send_whatsapp", side_effect=slow_send) as mock_send:
+            queued = await asyncio.wait_for(
+                notify.send_completion_notification("+1555", "done", "https://x", "s1"),
+                timeout=0.1,
+            )
+            assert queued
+            await asyncio.sleep(0.1)
+            mock_send.assert_called_once()
+            release.set()
+            await _drain()
+
+    @pytest.mark.asyncio
+    async def test_burst_merged_into_digest(self):
+        """Test that notifications inside the window become one message."""
+        with patch("orchestrator.notify._send_whatsapp", new_callable=AsyncMock) as mock_send:
+            mock_send.return_value = True
+            await notify.send_completion_notification("+1555", "disk ok", "https://x", "s1")
+            await notify.send_question_notification("+1555", "Which one?", "ctx", "https://x", "s2")
+            await notify.send_completion_notification("+1555", "memory ok", "https://x", "s3")
+            await _drain()
+
+        mock_send.assert_called_once()
+        phone, message = mock_send.call_args.args
+        assert phone == "+1555"
+        assert message.startswith("You have 3 updates")
+        assert "disk ok" in message and "Which one?" in message and "memory ok" in message
+
+    @pytest.mark.asyncio
+    async def test_single_notification_sent_verbatim(self):
+        """Test that a lone notification isn't wrapped in a digest."""
+        with patch("orchestrator.notify._send_whatsapp", new_callable=AsyncMock) as mock_send:
+            mock_send.return_value = True
+            await notify.send_completion_notification("+1555", "disk ok", "https://x", "s1")
+            await _drain()
+
+        assert mock_send.call_args.args[1].startswith("Task completed:")
+
+    @pytest.mark.asyncio
+    async def test_retries_until_success(self):
+        """Test that failed sends are retried."""
+        with patch("orchestrator.notify._send_whatsapp", new_callable=AsyncMock) as mock_send:
+            mock_send.side_effect = [False, False, True]
+            await notify.send_completion_notification("+1555", "done", "https://x", "s1")
+            await _drain()
+
+        assert mock_send.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_dead_letter_after_max_attempts(self, dispatcher):
+        """Test that undeliverable messages land in the dead-letter log."""
+        with patch("orchestrator.notify._send_whatsapp", new_callable=AsyncMock) as mock_send:
+            mock_send.return_value = False
+            await notify.send_completion_notification("+1555", "done", "https://x", "s1")
+            await _drain()
+
+        assert mock_send.call_count == notify.NOTIFY_MAX_ATTEMPTS
+        records = [json.loads(line) for line in dispatcher.read_text().splitlines()]
+        assert len(records) == 1
+        assert records[0]["phone"] == "+1555"
+        assert "failed after" in records[0]["reason"]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_dead_letters(self, dispatcher):
+        """Test that overflow is rejected and recorded rather than blocking."""
+        with patch("orchestrator.notify.NOTIFY_QUEUE_SIZE", 1), \
+             patch("orchestrator.notify._send_whatsapp", new_callable=AsyncMock):
+            await notify.stop()
+            assert await notify.send_completion_notification("+1555", "a", "https://x", "s1")
+            assert not await notify.send_completion_notification("+1555", "b", "https://x", "s2")
+
+        assert "queue full" in dispatcher.read_text()
@@ -0,0 +1,232 @@
+import asyncio
+import signal
+import pytest
+from unittest.mock import AsyncMock, patch
+from orchestrator import pool as moltbot_pool
+from orchestrator.pool import MoltbotPool, PoolExhausted, terminate
+
+
+def _fake_proc(returncode=0):
+    proc = AsyncMock()
+    proc.returncode = returncode
+    return proc
+
+
+class TestMoltbotPool:
+    @pytest.mark.asyncio
+    async def test_start_warms_all_workers(self):
+        """Test that start() health-checks every worker."""
+        pool = MoltbotPool(3)
+        with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec:
+            mock_exec.return_value = _fake_proc()
+            await pool.start()
+            await pool.stop()
+
+        assert mock_exec.call_count == 3
+        assert pool.stats()["healthy"] == 3
+        assert pool.stats()["idle"] == 3
+
+    @pytest.mark.asyncio
+    async def test_missing_binary_marks_unhealthy(self):
+        """Test that a missing moltbot binary fails the health check."""
+        pool = MoltbotPool(1)
+        with patch("asyncio.create_subprocess_exec", side_effect=FileNotFoundError):
+            await pool.start()
+            await pool.stop()
+
+        assert pool.stats()["healthy"] == 0
+
+    @pytest.mark.asyncio
+    async def test_hung_warmup_killed_and_reaped(self):
+        """Test that a warm-up past its deadline is killed and waited for."""
+        killed = asyncio.Event()
+        proc = AsyncMock()
+        proc.kill = killed.set
+        proc.wait.side_effect = killed.wait
+        worker = moltbot_pool.MoltbotWorker(0)
+        with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec, \
+             patch("orchestrator.pool.WARMUP_TIMEOUT_SECONDS", 0.01):
+            mock_exec.return_value = proc
+            assert not await worker.warm()
+
+        assert proc.wait.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_requests_queue_when_all_busy(self):
+        """Test that callers wait for a free worker instead of spawning more."""
+        pool = MoltbotPool(1)
+        with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec:
+            mock_exec.return_value = _fake_proc()
+            await pool.start()
+
+            order = []
+            release = asyncio.Event()
+
+            async def first():
+                async with pool.acquire():
+                    order.append("first")
+                    await release.wait()
+
+            async def second():
+                async with pool.acquire():
+                    order.append("second")
+
+            t1 = asyncio.create_task(first())
+            await asyncio.sleep(0)
+            t2 = asyncio.create_task(second())
+            await asyncio.sleep(0)
+
+            assert order == ["first"]
+            assert pool.stats()["waiting"] == 1
+
+            release.set()
+            await asyncio.gather(t1, t2)
+            await pool.stop()
+
+        assert order == ["first", "second"]
+        assert pool.stats()["idle"] == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_gives_up_after_timeout(self):
+        """Test that a caller stops waiting for a busy pool at its deadline."""
+        pool = MoltbotPool(1)
+        with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec:
+            mock_exec.return_value = _fake_proc()
+            await pool.start()
+
+            async with pool.acquire():
+                with pytest.raises(PoolExhausted):
+                    async with pool.acquire(timeout=0.01):
+                        pass
+            await pool.stop()
+
+        assert pool.stats()["waiting"] == 0
+        assert pool.stats()["idle"] == 1
+
+    @pytest.mark.asyncio
+    async def test_background_runs_leave_interactive_workers_free(self):
+        """Test that busy background workers don't hold up interactive acquires."""
+        with patch("orchestrator.pool._pool", MoltbotPool(1)), \
+             patch("orchestrator.pool._background_pool", MoltbotPool(1)), \
+             patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec:
+            mock_exec.return_value = _fake_proc()
+            await moltbot_pool.start()
+
+            async with moltbot_pool.acquire_background():
+                async with moltbot_pool.acquire(timeout=0.01):
+                    stats = moltbot_pool.stats()
+            await moltbot_pool.stop()
+
+        assert stats["busy"] == 1
+        assert stats["background"]["busy"] == 1
+
+    @pytest.mark.asyncio
+    async def test_worker_recycled_after_max_uses(self):
+        """Test that a worker is re-warmed once it reaches its use limit."""
+        pool = MoltbotPool(1)
+        with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec, \
+             patch("orchestrator.pool.MOLTBOT_WORKER_MAX_USES", 2):
+            mock_exec.return_value = _fake_proc()
+            await pool.start()
+
+            for _ in range(2):
+                async with pool.acquire() as worker:
+                    await worker.spawn("agent", "--message", "ls")
+
+            # 1 warm-up + 2 runs; the limit was hit, so it re-warms before its next use
+            assert mock_exec.call_count == 3
+            async with pool.acquire() as worker:
+                await worker.spawn("agent", "--message", "ls")
+            assert mock_exec.call_count == 5
+            assert mock_exec.call_args_list[3].args == ("moltbot", "--version")
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_due_check_runs_off_the_request_path(self):
+        """Test that an aged-out idle worker is re-warmed by the sweep, not by acquire."""
+        pool = MoltbotPool(1)
+        with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec, \
+             patch("orchestrator.pool.MOLTBOT_WORKER_CHECK_INTERVAL_SECONDS", 0.05):
+            mock_exec.return_value = _fake_proc()
+            await pool.start()
+            await asyncio.sleep(0.12)
+            swept = mock_exec.call_count
+
+            with patch("orchestrator.pool.MOLTBOT_WORKER_CHECK_INTERVAL_SECONDS", 300):
+                async with pool.acquire() as worker:
+                    await worker.spawn("agent", "--message", "ls")
+            await pool.stop()
+
+        assert swept >= 2
+        assert [c.args[1] for c in mock_exec.call_args_list[swept:]] == ["agent"]
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_worker_kept_out_while_others_serve(self):
+        """Test that a failed worker isn't handed out, and rejoins once it passes."""
+        pool = MoltbotPool(2)
+        results = iter([1, 0])  # first warm-up fails, second passes
+        with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec, \
+             patch("orchestrator.pool.UNHEALTHY_RETRY_SECONDS", 0.01):
+            mock_exec.side_effect = lambda *a, **k: _fake_proc(next(results, 0))
+            await pool.start()
+            assert pool.stats()["idle"] == 1
+
+            async with pool.acquire() as worker:
+                assert worker.healthy
+            await asyncio.sleep(0.05)
+            await pool.stop()
+
+        assert pool.stats()["idle"] == 2
+        assert pool.stats()["healthy"] == 2
+
+    @pytest.mark.asyncio
+    async def test_all_unhealthy_still_handed_out(self):
+        """Test that with no healthy worker callers get one (and its real error) instead of waiting."""
+        pool = MoltbotPool(1)
+        with patch("asyncio.create_subprocess_exec", side_effect=FileNotFoundError):
+            await pool.start()
+            await asyncio.sleep(0)
+            async with pool.acquire(timeout=0.1) as worker:
+                assert not worker.healthy
+            await pool.stop()
+
+
+def _alive(pid: int) -> bool:
+    """True unless the process is gone or a zombie waiting to be reaped."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+async def _spawn_group(script: str) -> tuple[asyncio.subprocess.Process, int]:
+    """Start `script` as a group leader; returns it and its background child's PID."""
+    proc = await asyncio.create_subprocess_exec(
+        "sh", "-c", f"{script} & echo $!; wait",
+        stdout=asyncio.subprocess.PIPE, start_new_session=True,
+    )
+    child = int(await proc.stdout.readline())
+    return proc, child
+
+
+class TestTerminate:
+    @pytest.mark.asyncio
+    async def test_kills_whole_process_group(self):
+        """Test that terminate() also stops children the agent started."""
+        proc, child = await _spawn_group("sleep 100")
+
+        await terminate(proc, grace=1.0)
+
+        assert proc.returncode is not None
+        assert not _alive(child)
+
+    @pytest.mark.asyncio
+    async def test_sigkill_after_grace_period(self):
+        """Test that a group ignoring SIGTERM is killed once the grace period ends."""
+        proc, child = await _spawn_group("trap '' TERM; sleep 100")
+
+        await terminate(proc, grace=0.2)
+
+        assert proc.returncode == -signal.SIGKILL
+        assert not _alive(child)
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from orchestrator import safety
+from orchestrator.results import ResultCache
+
+
+class TestResultCache:
+    @pytest.mark.asyncio
+    async def test_expires_after_ttl(self):
+        """Test that a result is reused within its TTL and re-run after it."""
+        cache = ResultCache(8)
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            return f"run {calls}"
+
+        assert await cache.run("free -h", 0.05, fn) == "run 1"
+        assert await cache.run("free -h", 0.05, fn) == "run 1"
+        await asyncio.sleep(0.06)
+        assert await cache.run("free -h", 0.05, fn) == "run 2"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_run(self):
+        """Test that a waiter going away leaves the run going for the others."""
+        cache = ResultCache(8)
+        release = asyncio.Event()
+
+        async def fn():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(cache.run("ps aux", 5, fn))
+        second = asyncio.create_task(cache.run("ps aux", 5, fn))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == "done"
+        assert first.cancelled()
+        assert cache.stats()["coalesced"] == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_and_are_not_cached(self):
+        """Test that every waiter sees the failure and the next call retries."""
+        cache = ResultCache(8)
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("gateway down")
+
+        outcomes = await asyncio.gather(
+            cache.run("df -h", 30, boom), cache.run("df -h", 30, boom), return_exceptions=True
+        )
+        assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+        async def ok():
+            return "fine"
+
+        assert await cache.run("df -h", 30, ok) == "fine"
+
+    @pytest.mark.asyncio
+    async def test_bounded(self):
+        """Test that the oldest entries are dropped past maxsize."""
+        cache = ResultCache(2)
+        for key in ("a", "b", "c"):
+            await cache.run(key, 30, lambda key=key: asyncio.sleep(0, key))
+
+        assert cache.stats()["size"] == 2
+
+
+class TestCacheTTL:
+    def test_read_only_commands_have_ttl(self):
+        assert safety.cache_ttl("df -h") > 0
+        assert safety.cache_ttl("systemctl status nginx") > 0
+
+    def test_destructive_and_unknown_commands_never_cached(self):
+        assert safety.cache_ttl("docker stop web") == 0
+        assert safety.cache_ttl("systemctl restart nginx") == 0
+        assert safety.cache_ttl("rm -rf /") == 0
+        assert safety.cache_ttl("") == 0
@@ -1,4 +1,6 @@
-from orchestrator.safety import validate_command
+import shlex
+from orchestrator.config import ALLOWED_CHARS, COMMAND_SCHEMAS
+from orchestrator.safety import validate_command, validate_command_safety, validate_many
 
 
 def test_allowed_command():
@@ -42,3 +44,65 @@ def test_pipe_injection():
 def test_subcommand_not_allowed():
     r = validate_command("systemctl enable nginx")
     assert not r["allowed"]
+
+
+def test_validate_many_keeps_order():
+    results = validate_many(["ls -la", "rm -rf /", "docker stop abc", "ls -la"])
+    assert [r["allowed"] for r in results] == [True, False, True, True]
+    assert results[0] == results[3] and results[0] is not results[3]
+
+
+def test_validate_many_dangerous_patterns():
+    results = validate_many(["install nginx", "then RM  -RF /tmp/x", "chmod 777 /srv"])
+    assert results[0] == {"allowed": True, "needs_confirmation": False, "reason": "OK"}
+    assert not results[1]["allowed"]
+    assert "rm\\s+-rf" in results[1]["reason"]
+    assert results[2]["reason"] == "Command matches dangerous pattern: chmod\\s+777"
+
+
+def test_validate_command_safety():
+    assert validate_command_safety("dd if=/dev/zero of=x") == (False, "Command matches dangerous pattern: dd\\s+if=")
+    assert validate_command_safety("echo > /dev/sdb") == (True, None)
+
+
+# The pre-compilation implementation, kept as an oracle
+def reference_validate(cmd: str) -> dict:
+    for char in cmd:
+        if char not in ALLOWED_CHARS:
+            return {"allowed": False, "needs_confirmation": False, "reason": f"Blocked character: {char!r}"}
+    tokens = shlex.split(cmd)
+    if not tokens:
+        return {"allowed": False, "needs_confirmation": False, "reason": "Empty command"}
+    base_cmd = tokens[0]
+    if base_cmd not in COMMAND_SCHEMAS:
+        return {"allowed": False, "needs_confirmation": False, "reason": f"Unknown command: {base_cmd}"}
+    schema = COMMAND_SCHEMAS[base_cmd]
+    args = tokens[1:]
+    destructive = schema.get("destructive_subcommands", [])
+    for arg in args:
+        if arg in destructive:
+            return {"allowed": True, "needs_confirmation": True, "reason": f"Destructive subcommand: {arg}"}
+    allowed_subs = schema.get("allowed_subcommands")
+    if allowed_subs is not None and args:
+        if args[0] not in allowed_subs and args[0] not in destructive:
+            return {"allowed": False, "needs_confirmation": False, "reason": f"Subcommand not allowed: {args[0]}"}
+    allowed_flags = schema.get("allowed_flags")
+    if allowed_flags is not None:
+        for arg in args:
+            if arg.startswith("-") and arg not in allowed_flags:
+                return {"allowed": False, "needs_confirmation": False, "reason": f"Flag not allowed: {arg}"}
+    return {"allowed": True, "needs_confirmation": False, "reason": "OK"}
+
+
+CORPUS = [
+    "ls -la", "ls", "df -h", "free -m", "top -b -n 1", "ps aux", "ps --forest",
+    "systemctl status nginx", "systemctl restart nginx", "systemctl enable nginx",
+    "docker ps", "docker logs web", "docker stop abc", "docker run alpine", "docker",
+    "rm -rf /", "ls | cat /etc/passwd", "ls --color=always", "", "   ", "ls\t-la",
+    "cat /etc/shadow", "df -h; reboot", "ls $(whoami)", "free -h -g",
+]
+
+
+def test_matches_reference_implementation():
+    for cmd in CORPUS:
+        assert validate_command(cmd) == reference_validate(cmd), cmd
@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from orchestrator.scheduler import Scheduler
+
+
+async def _hold(scheduler: Scheduler, ticket, release: asyncio.Event, order: list, name: str):
+    async with scheduler.run(ticket):
+        order.append(name)
+        await release.wait()
+
+
+class TestScheduler:
+    @pytest.mark.asyncio
+    async def test_caps_concurrency_and_orders_queue(self):
+        """Test the cap, priority order, and FIFO within a priority."""
+        s = Scheduler(concurrency=1, max_queued=3)
+        release = asyncio.Event()
+        order: list[str] = []
+        tickets = [("a", s.reserve()), ("b", s.reserve()), ("c", s.reserve()), ("urgent", s.reserve(priority=5))]
+        assert s.stats()["running"] == 1 and s.stats()["queued"] == 3
+        assert s.full()
+
+        tasks = [asyncio.create_task(_hold(s, t, release, order, n)) for n, t in tickets]
+        await asyncio.sleep(0)
+        assert order == ["a"]
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert order == ["a", "urgent", "b", "c"]
+        assert s.stats()["running"] == 0 and s.stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_gives_up_its_place(self):
+        s = Scheduler(concurrency=1, max_queued=1)
+        release = asyncio.Event()
+        order: list[str] = []
+        first = asyncio.create_task(_hold(s, s.reserve(), release, order, "first"))
+        waiting = asyncio.create_task(_hold(s, s.reserve(), release, order, "waiting"))
+        await asyncio.sleep(0)
+        assert s.full()
+
+        waiting.cancel()
+        await asyncio.sleep(0)
+        assert not s.full()
+        assert s.stats()["queued"] == 0
+
+        release.set()
+        await first
+        assert order == ["first"]
+        assert s.stats()["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_released_when_pass_fails(self):
+        s = Scheduler(concurrency=1, max_queued=0)
+        with pytest.raises(RuntimeError):
+            async with s.run(s.reserve()):
+                raise RuntimeError
+        assert s.stats()["running"] == 0
+        assert not s.full()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_tracks_run_time(self):
+        s = Scheduler(concurrency=2, max_queued=0)
+        for _ in range(30):
+            async with s.run(s.reserve()):
+                pass
+        assert s.retry_after() == 1
+
+    @pytest.mark.asyncio
+    async def test_discard_unused_reservations(self):
+        """Test that reservations dropped before run() give back their slot and place."""
+        s = Scheduler(concurrency=1, max_queued=1)
+        granted, waiting = s.reserve(), s.reserve()
+        s.discard(waiting)
+        s.discard(granted)
+        assert s.stats()["running"] == 0 and s.stats()["queued"] == 0
+
+        ticket = s.reserve()
+        assert ticket.done()
+
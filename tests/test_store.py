@@ -0,0 +1,197 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from orchestrator import store
+from orchestrator.execution import ExecutionContext, ExecutionState, context_to_dict
+
+
+@pytest_asyncio.fixture
+async def db_path(tmp_path):
+    path = str(tmp_path / "executions.db")
+    await store.start(path)
+    yield path
+    await store.stop()
+
+
+def _snapshot(state=ExecutionState.RUNNING, **fields) -> dict:
+    return context_to_dict(ExecutionContext(state=state, commands=["df -h"], **fields))
+
+
+def _rows(path: str) -> list[tuple]:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT session_id, state FROM executions ORDER BY session_id").fetchall()
+    finally:
+        conn.close()
+
+
+class TestExecutionStore:
+    @pytest.mark.asyncio
+    async def test_uses_wal_mode(self, db_path):
+        """Test that the database runs in WAL mode."""
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    @pytest.mark.asyncio
+    async def test_writes_are_deferred_but_readable(self, db_path):
+        """Test that save() doesn't touch disk yet load() sees the write."""
+        data = _snapshot()
+        store.save(data)
+
+        assert _rows(db_path) == []
+        assert store.load(data["session_id"]) == data
+
+        await store.flush()
+        assert _rows(db_path) == [(data["session_id"], "running")]
+        assert store.load(data["session_id"]) == data
+
+    @pytest.mark.asyncio
+    async def test_burst_coalesced_into_one_write(self, db_path):
+        """Test that repeated saves of a session write only the latest snapshot."""
+        ctx = ExecutionContext(commands=["df -h"])
+        for state in (ExecutionState.RUNNING, ExecutionState.WAITING_FOR_INPUT, ExecutionState.COMPLETED):
+            ctx.state = state
+            store.save(context_to_dict(ctx))
+        before = store.stats()["rows_written"]
+
+        await store.flush()
+
+        assert store.stats()["rows_written"] - before == 1
+        assert _rows(db_path) == [(ctx.session_id, "completed")]
+
+    @pytest.mark.asyncio
+    async def test_flusher_writes_in_background(self, db_path):
+        """Test that the flusher task commits without an explicit flush."""
+        data = _snapshot()
+        with patch("orchestrator.store.EXECUTION_STORE_FLUSH_SECONDS", 0):
+            store.save(data)
+            for _ in range(100):
+                if _rows(db_path):
+                    break
+                await asyncio.sleep(0.01)
+        assert _rows(db_path) == [(data["session_id"], "running")]
+
+    @pytest.mark.asyncio
+    async def test_survives_restart(self, db_path):
+        """Test that snapshots and pending confirmations outlive the process."""
+        data = _snapshot(ExecutionState.WAITING_FOR_INPUT, current_question="Which one?")
+        store.save(data)
+        store.save_pending("s1", {"command": "docker stop abc", "expires": time.time() + 60})
+        await store.stop()
+
+        await store.start(db_path)
+        assert store.load(data["session_id"]) == data
+        assert store.load_pending() == {"s1": {"command": "docker stop abc", "expires": pytest.approx(time.time() + 60, abs=5)}}
+
+    @pytest.mark.asyncio
+    async def test_lookup_by_state(self, db_path):
+        """Test that session_ids() combines stored and not-yet-flushed rows."""
+        running, waiting, done = (
+            _snapshot(ExecutionState.RUNNING),
+            _snapshot(ExecutionState.WAITING_FOR_INPUT),
+            _snapshot(ExecutionState.COMPLETED),
+        )
+        for data in (running, waiting, done):
+            store.save(data)
+        await store.flush()
+        # Unflushed change moves the running session to completed
+        store.save({**running, "state": "completed"})
+
+        assert store.session_ids("running") == []
+        assert store.session_ids("waiting_for_input") == [waiting["session_id"]]
+        assert store.session_ids("completed") == sorted([running["session_id"], done["session_id"]])
+
+    @pytest.mark.asyncio
+    async def test_expired_rows_evicted(self, db_path):
+        """Test TTL eviction of finished executions and pending confirmations."""
+        data = _snapshot(ExecutionState.COMPLETED)
+        with patch("orchestrator.store.EXECUTION_RETENTION_SECONDS", -1):
+            store.save(data)
+        store.save_pending("s1", {"command": "docker stop abc", "expires": time.time() - 1})
+        await store.flush()
+
+        assert store.load(data["session_id"]) is None
+        assert await store.evict_expired() == 1
+        assert _rows(db_path) == []
+        assert store.load_pending() == {}
+
+    @pytest.mark.asyncio
+    async def test_delete_pending(self, db_path):
+        """Test that a confirmed or expired pending command is removed."""
+        store.save_pending("s1", {"command": "docker stop abc", "expires": time.time() + 60})
+        await store.flush()
+        store.delete_pending("s1")
+
+        assert store.load_pending() == {}
+        await store.flush()
+        assert store.load_pending() == {}
+
+    @pytest.mark.asyncio
+    async def test_stop_waits_for_write_in_progress(self, tmp_path):
+        """Test that stop() lets a background write finish before closing the database."""
+        path = str(tmp_path / "executions.db")
+        entered, release = threading.Event(), threading.Event()
+        write = store._write
+
+        def slow_write(*args):
+            entered.set()
+            release.wait(5)
+            write(*args)
+
+        with patch("orchestrator.store.EXECUTION_STORE_FLUSH_SECONDS", 0), \
+             patch("orchestrator.store._write", slow_write):
+            await store.start(path)
+            data = _snapshot()
+            store.save(data)
+            assert await asyncio.to_thread(entered.wait, 5)
+
+            stopping = asyncio.create_task(store.stop())
+            await asyncio.sleep(0.05)
+            assert not stopping.done()
+            release.set()
+            await stopping
+
+        assert _rows(path) == [(data["session_id"], "running")]
+
+    @pytest.mark.asyncio
+    async def test_unwritable_path_keeps_executions_in_memory(self, tmp_path):
+        """Test that a bad path falls back to memory instead of crashing startup."""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        await store.start(str(blocker / "executions.db"))
+        try:
+            data = _snapshot(ExecutionState.COMPLETED)
+            store.save(data)
+            assert store.load(data["session_id"]) == data
+            assert store.session_ids("completed") == [data["session_id"]]
+
+            store.delete(data["session_id"])
+            assert store.load(data["session_id"]) is None
+        finally:
+            await store.stop()
+
+    @pytest.mark.asyncio
+    async def test_memory_fallback_bounded_and_expiring(self, tmp_path):
+        """Test that the in-memory fallback drops the oldest and expired executions."""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        await store.start(str(blocker / "executions.db"))
+        try:
+            with patch("orchestrator.store.MEMORY_MAX_EXECUTIONS", 2):
+                first, second, third = (_snapshot(ExecutionState.COMPLETED) for _ in range(3))
+                for data in (first, second, third):
+                    store.save(data)
+            assert store.load(first["session_id"]) is None
+            assert store.load(third["session_id"]) == third
+
+            with patch("orchestrator.store.EXECUTION_RETENTION_SECONDS", -1):
+                store.save(second)
+            assert store.load(second["session_id"]) is None
+            assert store.session_ids("completed") == [third["session_id"]]
+        finally:
+            await store.stop()
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import pytest
+from orchestrator import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    """Write traces to a temp file; read them back after tracing.stop()."""
+    path = tmp_path / "traces.jsonl"
+    tracing.start(str(path))
+    yield path
+    tracing.stop()
+
+
+def _read(path) -> list[dict]:
+    tracing.stop()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestTracing:
+    def test_spans_nest_and_record_errors(self, trace_file):
+        """Test parent links, durations, events and error capture."""
+        with tracing.traced("job", "abc123", kind="test"):
+            with tracing.span("outer", step=1):
+                tracing.event("marker")
+                with pytest.raises(ValueError):
+                    with tracing.span("inner"):
+                        raise ValueError
+
+        (trace,) = _read(trace_file)
+        assert trace["trace_id"] == "abc123"
+        assert trace["kind"] == "test"
+        outer, marker, inner = trace["spans"]
+        assert outer["attrs"] == {"step": 1} and outer["parent"] is None
+        assert marker["parent"] == outer["id"] and "duration_ms" not in marker
+        assert inner["parent"] == outer["id"] and inner["error"] == "ValueError"
+        assert outer["duration_ms"] >= inner["duration_ms"]
+
+    def test_no_trace_is_a_no_op(self):
+        with tracing.span("orphan"):
+            tracing.event("orphan")
+        assert tracing.current() is None
+
+    def test_invalid_client_trace_id_replaced(self):
+        assert tracing.new_trace_id("ok-id_1.2") == "ok-id_1.2"
+        assert len(tracing.new_trace_id("bad id\n")) == 32
+        assert len(tracing.new_trace_id("x" * 65)) == 32
+
+    @pytest.mark.asyncio
+    async def test_tasks_inherit_the_trace(self, trace_file):
+        """Test that spans from concurrent child tasks land in the parent trace."""
+        async def stage(n):
+            with tracing.span(f"stage{n}"):
+                await asyncio.sleep(0)
+
+        with tracing.traced("fanout"):
+            with tracing.span("gather"):
+                await asyncio.gather(stage(1), stage(2))
+
+        (trace,) = _read(trace_file)
+        gather, *stages = trace["spans"]
+        assert sorted(s["name"] for s in stages) == ["stage1", "stage2"]
+        assert all(s["parent"] == gather["id"] for s in stages)
+
+    def test_file_rotates(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tracing, "TRACE_MAX_BYTES", 2048)
+        monkeypatch.setattr(tracing, "TRACE_BACKUP_COUNT", 1)
+        path = tmp_path / "traces.jsonl"
+        tracing.start(str(path))
+        for _ in range(50):
+            with tracing.traced("x" * 100):
+                pass
+        tracing.stop()
+
+        assert (tmp_path / "traces.jsonl.1").exists()
+        assert path.stat().st_size <= 2048